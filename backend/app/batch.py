@@ -0,0 +1,259 @@
+# backend/app/batch.py
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from app.models import QuestionnaireRequest, Benefit
+from app.eligibility import MIN_CONFIDENCE, MAX_RESULTS, COMPILED_CATALOG, ScoredBenefit
+from app.rules import BOOLEAN_FIELDS, MATCH_FIELDS, CompiledCatalog
+from app.regions import resolve_region
+from app.income_tables import (
+    HOUSEHOLD_SIZES, MAX_HOUSEHOLD_SIZE, IncomeTables, get_income_tables, household_members
+)
+
+# rows evaluated per step; bounds the (rows x benefits) float64 temporaries
+CHUNK_SIZE = 32768
+
+
+@dataclass
+class BatchResult:
+    """
+    Confidence matrix for a cohort: one row per household, one column per
+    benefit (in catalog order). Ineligible cells are 0.0.
+    """
+    benefits: List[Benefit]
+    confidence: np.ndarray
+
+    @property
+    def benefit_ids(self) -> List[str]:
+        return [b.id for b in self.benefits]
+
+    def top_benefits(self, row: int, limit: int = MAX_RESULTS) -> List[ScoredBenefit]:
+        scores = np.round(self.confidence[row].astype(np.float64), 1)
+        # stable sort keeps catalog order on ties, like calculate_eligibility
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return [ScoredBenefit(self.benefits[i], float(scores[i])) for i in order if scores[i] > 0.0]
+
+
+def household_sizes(household_size: Sequence) -> np.ndarray:
+    """
+    Map a household size column to income table indices. Accepts the
+    questionnaire values ("1".."5+") or integer sizes (clipped to
+    1..MAX_HOUSEHOLD_SIZE).
+    """
+    values = np.asarray(household_size)
+    if values.dtype.kind in "iuf":
+        return np.clip(values.astype(np.int64), 1, MAX_HOUSEHOLD_SIZE)
+    return np.array([HOUSEHOLD_SIZES.get(str(v), 1) for v in values], dtype=np.int64)
+
+
+def resolve_regions(zip_code: Optional[Sequence[str]], n: int):
+    """
+    Per-row index into the returned region list; index 0 is the
+    unresolved region (None).
+    """
+    regions: List[Optional[str]] = [None]
+    row_region = np.zeros(n, dtype=np.int64)
+    if zip_code is None:
+        return row_region, regions
+    ids = {}
+    for i, code in enumerate(zip_code):
+        region = resolve_region(code)
+        if region is not None:
+            if region not in ids:
+                ids[region] = len(regions)
+                regions.append(region)
+            row_region[i] = ids[region]
+    return row_region, regions
+
+
+def columns_from_questionnaires(questionnaires: Sequence[QuestionnaireRequest]) -> dict:
+    """
+    Build evaluate_batch keyword arguments from parsed questionnaires.
+    """
+    return {
+        "annual_income": np.fromiter((q.annual_income for q in questionnaires), np.float64, len(questionnaires)),
+        "age": np.fromiter((q.age for q in questionnaires), np.float64, len(questionnaires)),
+        "household_size": np.fromiter((household_members(q) for q in questionnaires), np.int64, len(questionnaires)),
+        "has_children": np.fromiter((q.has_children for q in questionnaires), bool, len(questionnaires)),
+        "is_veteran": np.fromiter((q.is_veteran for q in questionnaires), bool, len(questionnaires)),
+        "is_disabled": np.fromiter((q.is_disabled for q in questionnaires), bool, len(questionnaires)),
+        "zip_code": [q.zip_code for q in questionnaires],
+        "match": {
+            field: [getattr(q, field).value if getattr(q, field) is not None else None for q in questionnaires]
+            for field in MATCH_FIELDS
+        },
+    }
+
+
+class _RuleArrays:
+    """
+    Per-benefit rule parameters laid out as column vectors.
+    """
+
+    def __init__(self, catalog: CompiledCatalog):
+        rules = sorted(catalog.rules, key=lambda r: r.position)
+        self.benefits = [r.benefit for r in rules]
+        self.max_fpl_ratio = np.array([r.max_fpl_ratio for r in rules])
+        self.max_smi_ratio = np.array([r.max_smi_ratio for r in rules])
+        self.base = np.array([r.base for r in rules])
+        self.slope = np.array([r.slope for r in rules])
+        self.cap = np.array([r.cap for r in rules])
+        self.min_age = np.array([r.min_age for r in rules])
+        self.max_age = np.array([r.max_age for r in rules])
+        self.max_income = np.array([r.max_income for r in rules])
+        self.match = [dict(r.match) for r in rules]
+        self.requires = {f: np.array([f in r.requires for r in rules]) for f in BOOLEAN_FIELDS}
+        # step k applies the k-th boost of every rule, so each rule's boosts
+        # are clamped in its own order as in the scalar engine; the order
+        # matters once a boost is negative
+        depth = max((len(r.boosts) for r in rules), default=0)
+        self.boost_steps = [
+            (
+                {f: np.array([len(r.boosts) > k and r.boosts[k][0] == f for r in rules]) for f in BOOLEAN_FIELDS},
+                np.array([r.boosts[k][1] if len(r.boosts) > k else 0.0 for r in rules]),
+            )
+            for k in range(depth)
+        ]
+        # DSL rules by column, scored with their NumPy-compiled expressions
+        self.dsl = [(j, r.dsl) for j, r in enumerate(rules) if r.dsl is not None]
+        self.rules = rules
+
+    def allowed(self, regions: List[Optional[str]]) -> np.ndarray:
+        """
+        (regions x benefits) matrix of programs offered in each region; an
+        unresolved region allows every program.
+        """
+        return np.array(
+            [[region is None or not r.regions or region in r.regions for r in self.rules] for region in regions],
+            dtype=bool,
+        ).reshape(len(regions), len(self.rules))
+
+    def accepted(self, field: str, values: Sequence[Optional[str]]):
+        """
+        Per-row index into a (distinct values x benefits) matrix of programs
+        accepting each value of `field`; None only passes programs that do
+        not restrict the field.
+        """
+        distinct, row_value = np.unique(np.array([v or "" for v in values], dtype=object), return_inverse=True)
+        table = np.array(
+            [[field not in m or (bool(value) and value in m[field]) for m in self.match] for value in distinct],
+            dtype=bool,
+        ).reshape(len(distinct), len(self.rules))
+        return row_value, table
+
+
+def evaluate_batch(
+    annual_income: Sequence[float],
+    household_size: Sequence,
+    has_children: Sequence[bool],
+    is_veteran: Optional[Sequence[bool]] = None,
+    is_disabled: Optional[Sequence[bool]] = None,
+    zip_code: Optional[Sequence[str]] = None,
+    age: Optional[Sequence[float]] = None,
+    match: Optional[Dict[str, Sequence[Optional[str]]]] = None,
+    catalog: CompiledCatalog = COMPILED_CATALOG,
+    tables: Optional[IncomeTables] = None,
+    dtype=np.float32,
+) -> BatchResult:
+    """
+    Score every household against every benefit with the same income tables
+    and formulas as calculate_eligibility, CHUNK_SIZE rows at a time. With
+    zip codes, regional programs only apply to households in their region
+    and regional FPL/SMI thresholds are used. `match` maps MATCH_FIELDS to
+    per-row values (None when unknown) for programs restricted to some of
+    them; a missing field only passes unrestricted programs. Without ages,
+    age limits pass and DSL age conditions are false.
+    Scores are float32 by default to halve the (rows x benefits) output;
+    pass dtype=np.float64 for scores identical to the scalar engine's.
+    """
+    tables = tables or get_income_tables()
+    income = np.asarray(annual_income, dtype=np.float64)
+    n = len(income)
+    flags = {
+        "has_children": np.asarray(has_children, dtype=bool),
+        "is_veteran": np.zeros(n, bool) if is_veteran is None else np.asarray(is_veteran, dtype=bool),
+        "is_disabled": np.zeros(n, bool) if is_disabled is None else np.asarray(is_disabled, dtype=bool),
+    }
+    sizes = household_sizes(household_size)
+    ages = np.full(n, np.nan) if age is None else np.asarray(age, dtype=np.float64)
+    row_region, regions = resolve_regions(zip_code, n)
+    fpl_by_region = np.array([tables.fpl_row(r) for r in regions])
+    # NaN where a region has no median income table: the SMI gate passes
+    smi_by_region = np.array([tables.smi_row(r) or (np.nan,) * (MAX_HOUSEHOLD_SIZE + 1) for r in regions])
+    fpl = fpl_by_region[row_region, sizes]
+    smi = smi_by_region[row_region, sizes]
+
+    if catalog.batch_arrays is None:
+        catalog.batch_arrays = _RuleArrays(catalog)
+    rules = catalog.batch_arrays
+    allowed = rules.allowed(regions)
+    smi_gated = bool(np.isfinite(rules.max_smi_ratio).any())
+    age_gated = bool(np.isfinite(rules.min_age).any() or np.isfinite(rules.max_age).any())
+    income_gated = bool(np.isfinite(rules.max_income).any())
+    match = match or {}
+    accepted = [
+        rules.accepted(field, match.get(field) or [None] * n)
+        for field in MATCH_FIELDS
+        if any(field in m for m in rules.match)
+    ]
+    out = np.zeros((n, len(rules.benefits)), dtype=dtype)
+
+    for start in range(0, n, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, n)
+        with np.errstate(divide="ignore"):
+            ratio = (income[start:stop] / fpl[start:stop])[:, None]
+            smi_ratio = (income[start:stop] / smi[start:stop])[:, None]
+
+        eligible = ratio < rules.max_fpl_ratio
+        if len(regions) > 1:
+            eligible &= allowed[row_region[start:stop]]
+        if smi_gated:
+            eligible &= ~(smi_ratio >= rules.max_smi_ratio)
+        if age_gated:
+            row_age = ages[start:stop, None]
+            eligible &= ~(row_age < rules.min_age) & ~(row_age > rules.max_age)
+        if income_gated:
+            eligible &= income[start:stop, None] <= rules.max_income
+        for row_value, table in accepted:
+            eligible &= table[row_value[start:stop]]
+        confidence = np.minimum(rules.cap, np.maximum(0.0, rules.base - ratio * rules.slope))
+        if rules.dsl:
+            cols = {
+                "fpl_ratio": ratio[:, 0],
+                # an unknown state median income passes SMI conditions
+                "smi_ratio": np.where(np.isnan(smi_ratio[:, 0]), 0.0, smi_ratio[:, 0]),
+                "household_size": sizes[start:stop],
+                "annual_income": income[start:stop],
+                "age": ages[start:stop],
+                **{field: flags[field][start:stop] for field in BOOLEAN_FIELDS},
+            }
+            for j, dsl in rules.dsl:
+                fires = np.broadcast_to(dsl.when_vector(cols, np), (stop - start,))
+                confidence[:, j] = np.where(fires, dsl.score_vector(cols, np), 0.0)
+                eligible[:, j] &= fires
+        for field in BOOLEAN_FIELDS:
+            flag = flags[field][start:stop, None]
+            if rules.requires[field].any():
+                eligible &= flag | ~rules.requires[field]
+        for fields, amount in rules.boost_steps:
+            fires = np.zeros(eligible.shape, dtype=bool)
+            for field, column in fields.items():
+                if column.any():
+                    fires |= flags[field][start:stop, None] & column
+            confidence = np.where(fires, np.minimum(100.0, confidence + amount), confidence)
+
+        eligible &= confidence > MIN_CONFIDENCE
+        out[start:stop] = np.where(eligible, confidence, 0.0)
+
+    return BatchResult(benefits=rules.benefits, confidence=out)
+
+
+def score_eligibility_batch(questionnaires: Sequence[QuestionnaireRequest]) -> List[List[ScoredBenefit]]:
+    """
+    score_eligibility for many questionnaires in one vectorized pass.
+    Results are in input order.
+    """
+    if not questionnaires:
+        return []
+    result = evaluate_batch(**columns_from_questionnaires(questionnaires), dtype=np.float64)
+    return [result.top_benefits(row) for row in range(len(questionnaires))]
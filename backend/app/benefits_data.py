@@ -1,9 +1,15 @@
 # backend/app/benefits_data.py
-from typing import List
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Tuple
 from app.models import Benefit
 
+# Written by `python -m app.categories.myscheme_scraper`; optional
+SCHEME_CATALOG_PATH = Path(__file__).resolve().parent.parent / "resources" / "myscheme_catalog.json"
+
 # Mock data for demonstration. Replace/extend with real programs per state/region.
-CALIFORNIA_BENEFITS = [
+CALIFORNIA_BENEFITS = (
     Benefit(
         id="calfresh",
         name="CalFresh (Food Assistance)",
@@ -61,9 +67,25 @@ CALIFORNIA_BENEFITS = [
             "Proof of income",
             "School enrollment records"
         ]
-    )
-]
+    ),
+)
+
+
+@lru_cache(maxsize=1)
+def load_scheme_catalog(path: Path = SCHEME_CATALOG_PATH) -> Tuple[Tuple[Benefit, ...], dict]:
+    """
+    Scraped myscheme.gov.in schemes and their eligibility rules, empty
+    when the catalog has not been generated.
+    """
+    if not path.exists():
+        return (), {}
+    with open(path, "r", encoding="utf-8") as f:
+        catalog = json.load(f)
+    return tuple(Benefit(**entry) for entry in catalog["benefits"]), catalog["rules"]
 
 
-def get_all_benefits() -> List[Benefit]:
-    return CALIFORNIA_BENEFITS
+def get_all_benefits() -> Tuple[Benefit, ...]:
+    """
+    The catalog is an immutable snapshot: a tuple of frozen Benefit models.
+    """
+    return CALIFORNIA_BENEFITS + load_scheme_catalog()[0]
@@ -0,0 +1,156 @@
+# backend/app/breakpoints.py
+import threading
+from bisect import bisect_right
+from itertools import accumulate
+from types import SimpleNamespace
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from app.rules import BOOLEAN_FIELDS, CompiledCatalog, CompiledRule
+
+# Tables hold one entry per eligible rule per segment, so their size grows
+# with the square of the catalog; larger catalogs use the compiled rules
+BREAKPOINT_MAX_RULES = 256
+
+
+class SegmentEntry(NamedTuple):
+    rule: CompiledRule
+    # fixed confidence when the rule is clamped across the segment,
+    # None when it is base - ratio * slope plus `boosts`
+    constant: Optional[float]
+    boosts: Tuple[float, ...]
+
+
+def rule_kinks(rule: CompiledRule, boosts: Sequence[float], min_confidence: float) -> List[float]:
+    """
+    FPL ratios where the rule's confidence changes shape or crosses the
+    cutoff. `boosts` are the applied boosts in rule order; each is added
+    and clamped at 100 in turn, so every running sum has its own kink.
+    """
+    points = [rule.max_fpl_ratio]
+    if rule.slope:
+        for level in (rule.cap, 0.0):
+            points.append((rule.base - level) / rule.slope)
+        for running in accumulate(boosts):
+            points.append((rule.base + running - 100.0) / rule.slope)
+        points.append((rule.base + sum(boosts) - min_confidence) / rule.slope)
+    return points
+
+
+def _unclamped(rule: CompiledRule, boosts: Sequence[float], raw: float) -> bool:
+    """
+    Whether a pre-boost confidence of `raw` reaches the final score with no
+    clamp, so the score is base - ratio * slope plus the boosts.
+    """
+    return bool(rule.slope) and 0.0 < raw < rule.cap and all(raw + running < 100.0 for running in accumulate(boosts))
+
+
+class BreakpointTable:
+    """
+    For one combination of questionnaire flags: the sorted FPL-ratio
+    breakpoints and, for each segment between them, the eligible rules
+    ranked by confidence. Within a segment every score is constant or
+    linear in the ratio, so lookup is a bisect plus one multiply per entry.
+    """
+
+    def __init__(self, rules: List[CompiledRule], flags: Dict[str, bool], min_confidence: float):
+        self.min_confidence = min_confidence
+        q = SimpleNamespace(**flags)
+        applicable = [r for r in rules if all(flags[f] for f in r.requires)]
+        boosts = {r.position: tuple(b for f, b in r.boosts if flags[f]) for r in applicable}
+
+        points = set()
+        for rule in applicable:
+            points.update(rule_kinks(rule, boosts[rule.position], min_confidence))
+        self.breakpoints = sorted(p for p in points if p not in (float("inf"), float("-inf")))
+
+        self.segments: List[List[SegmentEntry]] = []
+        bounds = [float("-inf")] + self.breakpoints + [float("inf")]
+        for lo, hi in zip(bounds, bounds[1:]):
+            self.segments.append(self._segment(applicable, boosts, q, self._midpoint(lo, hi)))
+
+    @staticmethod
+    def _midpoint(lo: float, hi: float) -> float:
+        if lo == float("-inf") and hi == float("inf"):
+            return 0.0
+        if lo == float("-inf"):
+            return hi - 1.0
+        if hi == float("inf"):
+            return lo + 1.0
+        return (lo + hi) / 2.0
+
+    def _segment(self, rules, boosts, q, mid: float) -> List[SegmentEntry]:
+        ranked = []
+        for rule in rules:
+            if not mid < rule.max_fpl_ratio:
+                continue
+            confidence = rule.score(q, mid)
+            if not confidence > self.min_confidence:
+                continue
+            applied = boosts[rule.position]
+            linear = _unclamped(rule, applied, rule.base - (mid * rule.slope))
+            entry = SegmentEntry(rule, None if linear else confidence, applied)
+            ranked.append((-confidence, rule.position, entry))
+        ranked.sort(key=lambda item: item[:2])
+        return [entry for _, _, entry in ranked]
+
+    def score(
+        self,
+        income_to_fpl_ratio: float,
+        min_confidence: Optional[float] = None,
+        income_to_smi_ratio: Optional[float] = None,
+    ) -> List[Tuple[float, CompiledRule]]:
+        """
+        (rounded confidence, rule) pairs above the cutoff. They come in the
+        segment's precomputed ranking, which rounding ties and rules crossing
+        inside the segment can perturb, so callers still select the top k.
+        A min_confidence below the table's own cutoff is not supported.
+        SMI gates depend on household and region, so they are checked here
+        rather than folded into the breakpoints.
+        """
+        if min_confidence is None:
+            min_confidence = self.min_confidence
+        scored = []
+        for rule, constant, boosts in self.segments[bisect_right(self.breakpoints, income_to_fpl_ratio)]:
+            if income_to_smi_ratio is not None and not income_to_smi_ratio < rule.max_smi_ratio:
+                continue
+            if constant is None:
+                confidence = rule.base - (income_to_fpl_ratio * rule.slope)
+                for boost in boosts:
+                    confidence = confidence + boost
+            else:
+                confidence = constant
+            # exact cutoff check for ratios sitting on a breakpoint
+            if confidence > min_confidence:
+                scored.append((round(confidence, 1), rule))
+        return scored
+
+
+class BreakpointIndex:
+    """
+    Lazily built BreakpointTables keyed by region and the flags
+    (has_children, is_veteran, is_disabled). The FPL ratio already folds
+    in household size, so one table per combination serves every household.
+    A region of None means unknown and keeps every regional program.
+    Only rules the tables can represent (CompiledRule.tabulated) are
+    included; callers score catalog.direct_candidates() alongside.
+    """
+
+    def __init__(self, catalog: CompiledCatalog, min_confidence: float):
+        self.catalog = catalog
+        self.min_confidence = min_confidence
+        self.enabled = len(catalog) <= BREAKPOINT_MAX_RULES
+        self._tables: Dict[tuple, BreakpointTable] = {}
+        self._lock = threading.Lock()
+
+    def table(self, flags: Tuple[bool, ...], region: Optional[str] = None) -> BreakpointTable:
+        key = (region, flags)
+        table = self._tables.get(key)
+        if table is None:
+            with self._lock:
+                table = self._tables.get(key)
+                if table is None:
+                    rules = self.catalog.tabulated_rules
+                    if region is not None:
+                        rules = [r for r in rules if not r.regions or region in r.regions]
+                    table = BreakpointTable(rules, dict(zip(BOOLEAN_FIELDS, flags)), self.min_confidence)
+                    self._tables[key] = table
+        return table
@@ -0,0 +1,112 @@
+# backend/app/cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+from app.models import QuestionnaireRequest
+
+
+def questionnaire_key(questionnaire: QuestionnaireRequest, round_income: bool = False) -> tuple:
+    """
+    Canonical form of the fields calculate_eligibility reads.
+    With round_income the income is bucketed to the cent.
+    """
+    income = questionnaire.annual_income
+    if round_income:
+        income = round(income, 2)
+    return (
+        questionnaire.household_size.value,
+        questionnaire.household_members,
+        float(income),
+        questionnaire.age,
+        questionnaire.has_children,
+        questionnaire.is_veteran,
+        questionnaire.is_disabled,
+        questionnaire.gender,
+        questionnaire.social_category,
+        questionnaire.occupation,
+    )
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL. Entries belong to a version
+    (e.g. catalog + FPL table); asking with a different version drops them.
+    maxsize <= 0 disables caching.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version: Hashable = None
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, version: Hashable):
+        if version != self.version:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self.version = version
+
+    def get(self, key: Hashable, version: Hashable = None) -> Any:
+        with self._lock:
+            self._check_version(version)
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, version: Hashable = None):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._check_version(version)
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> Any:
+        """
+        Remove and return an entry (None when absent), whatever its version.
+        """
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return entry[0] if entry is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "version": str(self.version),
+            }
@@ -1,5 +1,14 @@
+import json
+import logging
+from pathlib import Path
 import requests
 from bs4 import BeautifulSoup
+from app.categories.scheme_criteria import build_scheme_catalog
+
+logger = logging.getLogger(__name__)
+
+RESOURCES_DIR = Path(__file__).resolve().parent.parent.parent / "resources"
+SCHEME_CATALOG_PATH = RESOURCES_DIR / "myscheme_catalog.json"
 
 def fetch_myscheme_schemes():
     """
@@ -23,17 +32,72 @@ def fetch_myscheme_schemes():
             schemes.append({'title': title, 'link': link})
     return schemes
 
+def _section(soup, name):
+    """
+    Text items of a detail page section: the element with id `name`, or
+    the content after a heading reading `name`, up to the next heading.
+    """
+    container = soup.find(id=name)
+    if container is None:
+        heading = soup.find(lambda tag: tag.name in ('h2', 'h3', 'h4') and tag.get_text(strip=True).lower() == name)
+        if heading is None:
+            return []
+        items = []
+        for sibling in heading.find_next_siblings():
+            if sibling.name in ('h2', 'h3', 'h4'):
+                break
+            items.extend(_items(sibling))
+        return items
+    return _items(container)
+
+def _items(element):
+    # list items when the section is a list, otherwise its paragraphs
+    tags = element.select('li') or element.select('p') or [element]
+    return [text for text in (tag.get_text(' ', strip=True) for tag in tags) if text]
+
+def fetch_scheme_details(scheme, session=None):
+    """
+    Add the description, eligibility conditions, documents and state tag
+    from the scheme's detail page to a fetch_myscheme_schemes() entry.
+    """
+    response = (session or requests).get(scheme['link'], timeout=30)
+    response.raise_for_status()
+    soup = BeautifulSoup(response.text, 'html.parser')
+    details = _section(soup, 'details')
+    state_tag = soup.select_one('.scheme-state, [data-state]')
+    state = None
+    if state_tag is not None:
+        state = state_tag.get('data-state') or state_tag.get_text(strip=True)
+    return {
+        **scheme,
+        'description': details[0] if details else None,
+        'eligibility': _section(soup, 'eligibility'),
+        'documents': _section(soup, 'documents required'),
+        'state': state,
+    }
+
+def fetch_scheme_catalog():
+    """
+    Scrape every scheme with its detail page and extract structured
+    eligibility criteria; pages that fail to load are skipped.
+    """
+    schemes = []
+    with requests.Session() as session:
+        for scheme in fetch_myscheme_schemes():
+            try:
+                schemes.append(fetch_scheme_details(scheme, session))
+            except requests.RequestException as e:
+                logger.warning("Skipping %s: %s", scheme['link'], e)
+    return build_scheme_catalog(schemes)
+
 def save_schemes_to_resources(schemes, filepath):
     """
     Save the list of schemes to a resources file as JSON.
     """
-    import json
     with open(filepath, 'w', encoding='utf-8') as f:
         json.dump(schemes, f, ensure_ascii=False, indent=2)
 
 if __name__ == "__main__":
-    schemes = fetch_myscheme_schemes()
-    save_schemes_to_resources(schemes, '../../resources/schemes.json')
-    print(f"Saved {len(schemes)} schemes to resources/schemes.json")
-    for scheme in schemes:
-        print(scheme)
+    catalog = fetch_scheme_catalog()
+    save_schemes_to_resources(catalog, SCHEME_CATALOG_PATH)
+    print(f"Saved {len(catalog['benefits'])} schemes with eligibility criteria to {SCHEME_CATALOG_PATH}")
@@ -0,0 +1,356 @@
+# backend/app/categories/scheme_criteria.py
+"""
+Structured eligibility criteria from the free-text eligibility section of
+myscheme.gov.in scheme pages, and their translation into rule specs for
+rules.compile_rule. Extraction is keyword and pattern based; limits are
+read inclusively so a scheme is shown rather than hidden when the wording
+is ambiguous ("above 60 years" becomes min_age 60). For the same reason a
+group (gender, category, occupation, disability) only restricts a scheme
+when a sentence says who qualifies ("only for women", "the applicant must
+be a farmer", or a line that opens with the group); a bare mention such as
+"5% reservation for PwD candidates" restricts nothing.
+"""
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# myscheme.gov.in state names to the region codes in zip_regions.csv
+STATE_REGIONS = {
+    "andaman and nicobar": "IN-AN",
+    "andhra pradesh": "IN-AP",
+    "arunachal pradesh": "IN-AR",
+    "assam": "IN-AS",
+    "bihar": "IN-BR",
+    "chhattisgarh": "IN-CG",
+    "chandigarh": "IN-CH",
+    "delhi": "IN-DL",
+    "goa": "IN-GA",
+    "gujarat": "IN-GJ",
+    "himachal pradesh": "IN-HP",
+    "haryana": "IN-HR",
+    "jharkhand": "IN-JH",
+    "jammu and kashmir": "IN-JK",
+    "jammu & kashmir": "IN-JK",
+    "karnataka": "IN-KA",
+    "kerala": "IN-KL",
+    "ladakh": "IN-LA",
+    "maharashtra": "IN-MH",
+    "meghalaya": "IN-ML",
+    "manipur": "IN-MN",
+    "madhya pradesh": "IN-MP",
+    "mizoram": "IN-MZ",
+    "nagaland": "IN-NL",
+    "odisha": "IN-OD",
+    "orissa": "IN-OD",
+    "punjab": "IN-PB",
+    "puducherry": "IN-PY",
+    "pondicherry": "IN-PY",
+    "rajasthan": "IN-RJ",
+    "sikkim": "IN-SK",
+    "tamil nadu": "IN-TN",
+    "tripura": "IN-TR",
+    "telangana": "IN-TS",
+    "uttarakhand": "IN-UK",
+    "uttar pradesh": "IN-UP",
+    "west bengal": "IN-WB",
+}
+# Central schemes are offered in every state
+ALL_STATES = tuple(sorted(set(STATE_REGIONS.values())))
+
+# values are those of models.Gender / SocialCategory / Occupation
+GENDER_PATTERNS = {
+    "female": r"\b(?:women|woman|girls?|females?|widows?|mothers?|pregnant|daughters?)\b",
+    "male": r"\b(?:men|man|boys?|males?)\b",
+    "transgender": r"\b(?:transgenders?|third gender)\b",
+}
+# (abbreviation, matched case-sensitively so "st" or "sc" in prose do not
+# match; phrase, matched in any case)
+CATEGORY_PATTERNS = {
+    "sc": (r"\bSCs?\b", r"\bscheduled castes?\b"),
+    "st": (r"\bSTs?\b", r"\bscheduled tribes?\b"),
+    "obc": (r"\bOBCs?\b", r"\bother backward class(?:es)?\b"),
+    "ews": (r"\bEWS\b", r"\beconomically weaker sections?\b"),
+    "minority": (None, r"\bminorit(?:y|ies)\b"),
+}
+OCCUPATION_PATTERNS = {
+    "farmer": r"\b(?:farmers?|cultivators?|agricultur\w*)\b",
+    "student": r"\b(?:students?|scholars?|pursuing)\b",
+    "fisherman": r"\b(?:fisher(?:man|men|folk|s)?|fishing)\b",
+    "artisan": r"\b(?:artisans?|craftsm[ae]n|handicrafts?)\b",
+    "construction_worker": r"\b(?:construction workers?|building workers?)\b",
+    "street_vendor": r"\b(?:street vendors?|hawkers?)\b",
+    "weaver": r"\b(?:weavers?|handloom)\b",
+    "entrepreneur": r"\b(?:entrepreneurs?|start-?ups?|msmes?|self[- ]employed)\b",
+    "unemployed": r"\b(?:unemployed|job ?seekers?)\b",
+}
+DISABILITY_PATTERN = r"\b(?:disab\w*|divyang\w*|handicapped|pwds?)\b"
+
+_GENDER = [(value, re.compile(pattern, re.I)) for value, pattern in GENDER_PATTERNS.items()]
+_CATEGORY = [
+    (value, re.compile(f"{short}|(?i:{phrase})" if short else phrase, 0 if short else re.I))
+    for value, (short, phrase) in CATEGORY_PATTERNS.items()
+]
+_OCCUPATION = [(value, re.compile(pattern, re.I)) for value, pattern in OCCUPATION_PATTERNS.items()]
+_DISABILITY = re.compile(DISABILITY_PATTERN, re.I)
+# wording that makes a sentence say who qualifies
+_RESTRICTIVE = re.compile(
+    r"\b(?:only|exclusively|solely|must|should|shall|ha(?:s|ve) to|eligible|meant for|restricted to|limited to"
+    r"|belong(?:s|ing)? to)\b",
+    re.I,
+)
+# wording that makes a mention a preference within a wider scheme
+_PREFERENTIAL = re.compile(
+    r"\b(?:reserv\w*|quota|preferen\w*|preferred|priority|weightage|relaxation|concession\w*|additional|also"
+    r"|encouraged|including)\b",
+    re.I,
+)
+# what may precede a group that opens its sentence ("- All farmers ...")
+_LEAD = re.compile(r"[\W\d_]*(?:(?:the|all|any|an?|only)\s+)*", re.I)
+# ranking boost for schemes that mention disability without requiring it
+DISABILITY_MENTION_BOOST = 10.0
+_STATES = re.compile(r"\b(" + "|".join(re.escape(name) for name in STATE_REGIONS) + r")\b", re.I)
+
+# sentence ends, but not the "Rs." before an amount or "p.a." after one
+_SENTENCES = re.compile(r"(?<![Rr]s\.)(?<!p\.a\.)(?<=[.;!?])\s+|\n+")
+_AMOUNT = re.compile(
+    r"(?:rs\.?|inr|₹)\s*(\d[\d,]*(?:\.\d+)?)\s*(lakhs?|lacs?|crores?)?"
+    r"|(\d[\d,]*(?:\.\d+)?)\s*(lakhs?|lacs?|crores?)\b",
+    re.I,
+)
+_INCOME = re.compile(r"\bincome\b", re.I)
+# an amount is a ceiling when a limit word precedes it or "or less" follows
+_CEILING_BEFORE = re.compile(
+    r"(?:not (?:be )?(?:more than|exceed\w*|above)|less than|below|under|up ?to|within|maximum|limit|ceiling|<=?)"
+    r"[^\d]{0,12}$",
+    re.I,
+)
+_CEILING_AFTER = re.compile(
+    r"^[^\w]*(?:per annum|p\.?a\.?|annually|per year|per month)?[^\w]*(?:or|and) (?:less|below)", re.I
+)
+_MONTHLY = re.compile(r"\b(?:per month|monthly|a month|p\.m\.)", re.I)
+_AGE_CONTEXT = re.compile(r"\bage\b|\baged\b|years old|years of age|\d+\s*years and (?:above|older)", re.I)
+_AGE_RANGE = re.compile(r"(\d{1,3})\s*(?:-|–|to|and)\s*(\d{1,3})\s*years", re.I)
+_AGE_MIN = re.compile(
+    r"(?:above|over|at least|minimum(?: age)?(?: of)?|not less than|more than|completed)\s*(\d{1,3})\s*years"
+    r"|(\d{1,3})\s*years\s*(?:and|or)\s*(?:above|older|more)",
+    re.I,
+)
+_AGE_MAX = re.compile(
+    r"(?:below|under|less than|up ?to|maximum(?: age)?(?: of)?|not more than|not exceed(?:ing)?)\s*(\d{1,3})\s*years",
+    re.I,
+)
+_UNITS = {"lakh": 1e5, "lac": 1e5, "crore": 1e7}
+
+
+@dataclass(frozen=True)
+class SchemeCriteria:
+    """
+    Criteria found in a scheme's eligibility text. Empty tuples and None
+    mean the text does not restrict that dimension.
+    """
+    # annual family income ceiling, in rupees
+    max_income: Optional[float] = None
+    min_age: Optional[float] = None
+    max_age: Optional[float] = None
+    regions: Tuple[str, ...] = ()
+    gender: Tuple[str, ...] = ()
+    social_category: Tuple[str, ...] = ()
+    occupation: Tuple[str, ...] = ()
+    requires_disability: bool = False
+    # disability named without a restriction: ranks higher, hides nothing
+    mentions_disability: bool = False
+
+    @property
+    def kinds(self) -> int:
+        """
+        Number of dimensions the scheme restricts; the two age bounds count once.
+        """
+        return sum((
+            self.max_income is not None,
+            self.min_age is not None or self.max_age is not None,
+            bool(self.regions),
+            bool(self.gender),
+            bool(self.social_category),
+            bool(self.occupation),
+            self.requires_disability,
+        ))
+
+
+def _amount(number: str, unit: Optional[str]) -> float:
+    value = float(number.replace(",", ""))
+    if unit:
+        value *= _UNITS[unit.lower().rstrip("s")]
+    return value
+
+
+def _income_ceiling(sentences: List[str]) -> Optional[float]:
+    # the lowest annual limit stated in an income sentence
+    ceilings = []
+    for sentence in sentences:
+        if not _INCOME.search(sentence):
+            continue
+        for match in _AMOUNT.finditer(sentence):
+            before = sentence[max(0, match.start() - 40):match.start()]
+            if not (_CEILING_BEFORE.search(before) or _CEILING_AFTER.search(sentence[match.end():])):
+                continue
+            number, unit = (match.group(1), match.group(2)) if match.group(1) else (match.group(3), match.group(4))
+            value = _amount(number, unit)
+            if value > 0:
+                ceilings.append(value * 12 if _MONTHLY.search(sentence) else value)
+    return min(ceilings) if ceilings else None
+
+
+def _age_limits(sentences: List[str]) -> Tuple[Optional[float], Optional[float]]:
+    lows, highs = [], []
+    for sentence in sentences:
+        if not _AGE_CONTEXT.search(sentence):
+            continue
+        for match in _AGE_RANGE.finditer(sentence):
+            low, high = sorted((int(match.group(1)), int(match.group(2))))
+            lows.append(low)
+            highs.append(high)
+        remainder = _AGE_RANGE.sub(" ", sentence)
+        lows.extend(int(m.group(1) or m.group(2)) for m in _AGE_MIN.finditer(remainder))
+        highs.extend(int(m.group(1)) for m in _AGE_MAX.finditer(remainder))
+    lows = [a for a in lows if a <= 120]
+    highs = [a for a in highs if a <= 120]
+    return (float(min(lows)) if lows else None, float(max(highs)) if highs else None)
+
+
+def _restricts(sentence: str, match: re.Match) -> bool:
+    if _PREFERENTIAL.search(sentence):
+        return False
+    return bool(_RESTRICTIVE.search(sentence) or _LEAD.fullmatch(sentence[:match.start()]))
+
+
+def _groups(sentences: List[str], patterns) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    (values named in a sentence that restricts to them, values only
+    mentioned), each in pattern order.
+    """
+    required, mentioned = [], []
+    for value, pattern in patterns:
+        matches = [(sentence, m) for sentence in sentences for m in [pattern.search(sentence)] if m]
+        if any(_restricts(sentence, m) for sentence, m in matches):
+            required.append(value)
+        elif matches:
+            mentioned.append(value)
+    return tuple(required), tuple(mentioned)
+
+
+def extract_criteria(text: str, state: Optional[str] = None) -> SchemeCriteria:
+    """
+    Criteria from a scheme's eligibility text. `state` is the scheme's own
+    state tag when the listing has one; otherwise states named in the text
+    are used. Genders are only restricted when not every one is named.
+    """
+    sentences = [s for s in _SENTENCES.split(text) if s.strip()]
+    min_age, max_age = _age_limits(sentences)
+
+    names = [state] if state else _STATES.findall(text)
+    regions = tuple(sorted({STATE_REGIONS[name.lower()] for name in names if name.lower() in STATE_REGIONS}))
+
+    genders, other_genders = _groups(sentences, _GENDER)
+    if {"female", "male"} <= set(genders + other_genders):
+        genders = ()
+    disability, disability_mentioned = _groups(sentences, [(True, _DISABILITY)])
+
+    return SchemeCriteria(
+        max_income=_income_ceiling(sentences),
+        min_age=min_age,
+        max_age=max_age,
+        regions=regions,
+        gender=genders,
+        social_category=_groups(sentences, _CATEGORY)[0],
+        occupation=_groups(sentences, _OCCUPATION)[0],
+        requires_disability=bool(disability),
+        mentions_disability=bool(disability_mentioned),
+    )
+
+
+def criteria_to_rule(criteria: SchemeCriteria) -> dict:
+    """
+    Rule spec for compile_rule. Schemes carry no income formula, so the
+    confidence is flat and grows with the number of criteria the
+    household was checked against; a scheme that only mentions disability
+    scores higher for disabled applicants.
+
+    The income ceiling is in rupees but is checked against annual_income
+    as entered, the same field the dollar FPL rules read. Every rule is
+    therefore restricted to Indian states (all of them when the text
+    names none), so households whose code resolves to a US region never
+    meet it; those whose code resolves to no region still do.
+    """
+    confidence = min(90.0, 50.0 + 10.0 * criteria.kinds)
+    rule = {
+        "regions": list(criteria.regions or ALL_STATES),
+        "score": {"base": confidence, "slope": 0.0, "cap": confidence},
+        "boosts": {},
+    }
+    match = {
+        field: list(values)
+        for field, values in (
+            ("gender", criteria.gender),
+            ("social_category", criteria.social_category),
+            ("occupation", criteria.occupation),
+        )
+        if values
+    }
+    if match:
+        rule["match"] = match
+    if criteria.requires_disability:
+        rule["requires"] = ["is_disabled"]
+    elif criteria.mentions_disability:
+        rule["boosts"] = {"is_disabled": DISABILITY_MENTION_BOOST}
+    for key in ("min_age", "max_age", "max_income"):
+        value = getattr(criteria, key)
+        if value is not None:
+            rule[key] = value
+    return rule
+
+
+def scheme_id(title: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-")
+    return f"myscheme-{slug}"
+
+
+def build_scheme_catalog(schemes: Iterable[dict]) -> dict:
+    """
+    Catalog entries and rules for scraped schemes ({"title", "link",
+    "description", "eligibility": [...], "state"}), in the layout of
+    resources/myscheme_catalog.json. Schemes whose text yields no criteria
+    are left out, as are repeated titles; both are counted in a warning.
+    """
+    benefits: List[dict] = []
+    rules: Dict[str, dict] = {}
+    no_criteria = repeated = 0
+    for scheme in schemes:
+        eligibility = scheme.get("eligibility") or []
+        criteria = extract_criteria("\n".join(eligibility), scheme.get("state"))
+        benefit_id = scheme_id(scheme["title"])
+        if not criteria.kinds:
+            logger.debug("No criteria in %s", scheme["link"])
+            no_criteria += 1
+            continue
+        if benefit_id in rules:
+            repeated += 1
+            continue
+        benefits.append({
+            "id": benefit_id,
+            "name": scheme["title"],
+            "description": scheme.get("description") or scheme["title"],
+            "estimated_amount": "See scheme details",
+            "confidence_score": 0.0,
+            "requirements": eligibility,
+            "application_url": scheme["link"],
+            "documents_needed": scheme.get("documents") or [],
+        })
+        rules[benefit_id] = criteria_to_rule(criteria)
+    if no_criteria or repeated:
+        logger.warning(
+            "Left out %d schemes with no extractable criteria and %d repeated titles", no_criteria, repeated
+        )
+    return {"benefits": benefits, "rules": rules}
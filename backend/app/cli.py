@@ -0,0 +1,171 @@
+# backend/app/cli.py
+"""
+Bulk eligibility screening from the command line. Reads a CSV or NDJSON
+file of questionnaires, scores them CLI_BATCH_SIZE rows at a time and
+writes one result per valid row as CSV or NDJSON, so memory stays flat
+whatever the input size. Rows that fail validation are counted and, with
+--rejects, written out with their errors.
+
+    cd backend && python -m app.cli households.csv -o results.ndjson [--rejects rejects.ndjson]
+
+Formats follow the file extensions (.csv, .ndjson/.jsonl) unless given;
+"-" reads stdin or writes stdout.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass
+from itertools import islice
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from app.models import QuestionnaireRequest
+from app.batch import score_eligibility_batch
+from app.eligibility import ScoredBenefit
+
+# rows scored per evaluate_batch call; also the most rows held at once
+CLI_BATCH_SIZE = 4096
+# rows between progress lines on stderr
+PROGRESS_EVERY = 100_000
+
+CSV_COLUMNS = ["row", "benefit_ids", "confidence_scores"]
+
+
+@dataclass
+class RunStats:
+    rows: int = 0
+    scored: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.rows} rows, {self.scored} scored, {self.rejected} rejected "
+            f"in {self.seconds:.1f}s ({self.rows_per_second:.0f} rows/s)"
+        )
+
+
+def _format(path: str, given: Optional[str]) -> str:
+    if given:
+        return given
+    if path.endswith(".csv"):
+        return "csv"
+    if path.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    raise SystemExit(f"Cannot tell the format of {path!r}; pass --input-format/--output-format")
+
+
+def read_rows(stream: IO[str], fmt: str) -> Iterator[Tuple[int, object]]:
+    """
+    (line number, raw row) pairs. CSV rows are dicts with empty cells
+    dropped so optional fields take their defaults; NDJSON rows are the
+    line text, validated as JSON later. Blank NDJSON lines are skipped.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {key: value for key, value in row.items() if value not in ("", None)}
+    else:
+        for line_no, line in enumerate(stream, 1):
+            if line.strip():
+                yield line_no, line
+
+
+def _validate(raw) -> QuestionnaireRequest:
+    if isinstance(raw, str):
+        return QuestionnaireRequest.model_validate_json(raw)
+    return QuestionnaireRequest.model_validate(raw)
+
+
+class ResultWriter:
+    def __init__(self, stream: IO[str], fmt: str):
+        self.stream = stream
+        self.csv = csv.writer(stream) if fmt == "csv" else None
+        if self.csv:
+            self.csv.writerow(CSV_COLUMNS)
+
+    def write(self, row: int, scored: List[ScoredBenefit]):
+        if self.csv:
+            self.csv.writerow([
+                row,
+                ";".join(b.benefit.id for b in scored),
+                ";".join(str(b.confidence_score) for b in scored),
+            ])
+        else:
+            benefits = [{"id": b.benefit.id, "confidence_score": b.confidence_score} for b in scored]
+            self.stream.write(json.dumps({"row": row, "eligible_benefits": benefits}) + "\n")
+
+
+def screen_stream(
+    rows: Iterable[Tuple[int, object]],
+    writer: ResultWriter,
+    rejects: Optional[IO[str]] = None,
+    batch_size: int = CLI_BATCH_SIZE,
+    progress: Optional[IO[str]] = None,
+) -> RunStats:
+    """
+    Validate, score and write `rows` one batch at a time, in input order.
+    """
+    stats = RunStats()
+    start = time.perf_counter()
+    rows = iter(rows)
+    for batch in iter(lambda: list(islice(rows, batch_size)), []):
+        valid: List[Tuple[int, QuestionnaireRequest]] = []
+        for line_no, raw in batch:
+            try:
+                valid.append((line_no, _validate(raw)))
+            except ValidationError as e:
+                stats.rejected += 1
+                if rejects is not None:
+                    errors = e.errors(include_url=False, include_context=False, include_input=False)
+                    rejects.write(json.dumps({"row": line_no, "errors": errors}, default=str) + "\n")
+        if valid:
+            for (line_no, _), scored in zip(valid, score_eligibility_batch([q for _, q in valid])):
+                writer.write(line_no, scored)
+        stats.scored += len(valid)
+        previous, stats.rows = stats.rows, stats.rows + len(batch)
+        if progress is not None and stats.rows // PROGRESS_EVERY > previous // PROGRESS_EVERY:
+            stats.seconds = time.perf_counter() - start
+            print(stats.summary(), file=progress, flush=True)
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def _open(files: ExitStack, path: str, mode: str) -> IO[str]:
+    if path == "-":
+        return sys.stdin if mode == "r" else sys.stdout
+    # newline="" lets the csv module handle line endings
+    return files.enter_context(open(path, mode, encoding="utf-8", newline=""))
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser(description="Screen a CSV or NDJSON file of questionnaires.")
+    parser.add_argument("input", help="input file, - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, - for stdout")
+    parser.add_argument("--input-format", choices=("csv", "ndjson"))
+    parser.add_argument("--output-format", choices=("csv", "ndjson"))
+    parser.add_argument("--rejects", help="NDJSON file for rows that fail validation")
+    parser.add_argument("--batch-size", type=int, default=CLI_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    input_format = _format(args.input, args.input_format)
+    output_format = _format(args.output, args.output_format or ("ndjson" if args.output == "-" else None))
+    with ExitStack() as files:
+        source, sink = _open(files, args.input, "r"), _open(files, args.output, "w")
+        rejects = _open(files, args.rejects, "w") if args.rejects else None
+        stats = screen_stream(
+            read_rows(source, input_format), ResultWriter(sink, output_format), rejects, args.batch_size, sys.stderr
+        )
+        sink.flush()
+    print(stats.summary(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,5 +1,5 @@
 # backend/app/config.py
-from pydantic import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -7,10 +7,45 @@ class Settings(BaseSettings):
     API_ALLOWED_ORIGINS: str = "http://localhost:3000"
     HOST: str = "0.0.0.0"
     PORT: int = 8080
+    BATCH_MAX_ITEMS: int = 10000
+    # batch bodies larger than this are refused before they are parsed
+    BATCH_MAX_BYTES: int = 16 * 1024 * 1024
+    ELIGIBILITY_CACHE_SIZE: int = 4096
+    ELIGIBILITY_CACHE_TTL: float = 600.0
+    ELIGIBILITY_CACHE_ROUND_INCOME: bool = False
+    INCOME_TABLES_YEAR: str = "2024"
+    SESSION_MAX_COUNT: int = 10000
+    SESSION_TTL: float = 1800.0
+    # on-disk cache of compiled DSL rules, private to the server's user; empty disables it
+    RULE_CACHE_DIR: str = ""
+    # empty means MySQL from the MYSQL_* environment variables
+    DATABASE_URL: str = ""
+    # one pool per database per process, shared by every session
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_ECHO: bool = False
+    # schema creation normally runs once via `python -m app.init_db`; this also runs it on every start
+    DB_CREATE_SCHEMA_ON_STARTUP: bool = False
+    # use an async driver for databases that have one (MySQL); SQLite always stays sync
+    DATABASE_ASYNC: bool = True
+    # write-behind queue for eligibility submissions
+    SUBMISSION_QUEUE_SIZE: int = 10000
+    SUBMISSION_BATCH_SIZE: int = 500
+    SUBMISSION_FLUSH_INTERVAL: float = 0.2
+    # largest page of GET /api/submissions; rows fetched per round trip by its export
+    SUBMISSION_PAGE_MAX: int = 1000
+    SUBMISSION_EXPORT_CHUNK_SIZE: int = 1000
+    # shadow evaluation of /api/eligibility; off unless an engine and a rate are set
+    SHADOW_ENGINE: str = ""
+    SHADOW_SAMPLE_RATE: float = 0.0
+    SHADOW_QUEUE_SIZE: int = 1000
+    SHADOW_LOG_PATH: str = "shadow_diffs.ndjson"
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
+    # .env also holds variables read elsewhere (MYSQL_*)
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
 
 settings = Settings()
@@ -1,23 +1,269 @@
 # app/database.py
-from sqlalchemy import create_engine
+import os
+import threading
+import time
+from typing import Dict, Optional
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from .config import settings
 
-DATABASE_URL = settings.DATABASE_URL if hasattr(settings, "DATABASE_URL") else "sqlite:///./benefits.db"
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _default_url() -> str:
+    user = os.getenv("MYSQL_USER", "root")
+    password = os.getenv("MYSQL_PASSWORD", "password")
+    host = os.getenv("MYSQL_HOST", "localhost")
+    db = os.getenv("MYSQL_DB", "benefitsfinder")
+    return f"mysql+pymysql://{user}:{password}@{host}/{db}"
+
+
+# the app's database; MySQL from the MYSQL_* variables unless DATABASE_URL is set
+DATABASE_URL = settings.DATABASE_URL or _default_url()
+
 Base = declarative_base()
 
 
+class PoolStats:
+    """
+    Counters for one engine's connection pool. A wait is a checkout that
+    found no idle connection with the overflow used up, and so blocked
+    until one was returned (or timed out).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def waited(self, seconds: float, timed_out: bool):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            stats = {
+                "pool": type(pool).__name__,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 6),
+                "max_wait_seconds": round(self.max_wait_seconds, 6),
+                "timeouts": self.timeouts,
+            }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(), checked_in=pool.checkedin(), checked_out=pool.checkedout(), overflow=pool.overflow()
+            )
+        return stats
+
+
+def _timed_pool_class(pool_class, stats: PoolStats):
+    """
+    `pool_class` with checkouts that block on a saturated pool timed into
+    `stats`. A subclass rather than an instance patch, so the pool that
+    engine.dispose() recreates keeps reporting.
+    """
+
+    class TimedPool(pool_class):
+        def _do_get(self):
+            saturated = -1 < self._max_overflow <= self._overflow and self.checkedin() == 0
+            if not saturated:
+                return super()._do_get()
+            start = time.perf_counter()
+            try:
+                conn = super()._do_get()
+            except exc.TimeoutError:
+                stats.waited(time.perf_counter() - start, True)
+                raise
+            stats.waited(time.perf_counter() - start, False)
+            return conn
+
+    TimedPool.__name__ = pool_class.__name__
+    return TimedPool
+
+
+def _instrument(engine: Engine, stats: PoolStats):
+    event.listen(engine, "connect", lambda *args: stats.count("connects"))
+    event.listen(engine, "checkout", lambda *args: stats.count("checkouts"))
+    event.listen(engine, "checkin", lambda *args: stats.count("checkins"))
+    event.listen(engine, "invalidate", lambda *args: stats.count("invalidations"))
+
+
+def _pool_args(url: str, pool_class) -> dict:
+    if url.startswith("sqlite"):
+        # SQLite keeps its default pool; file databases are shared across threadpool workers
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "poolclass": pool_class,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+# url -> (engine, its pool stats); one pool per database per process
+_ENGINES: Dict[str, tuple] = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def get_engine(url: Optional[str] = None) -> Engine:
+    """
+    The process-wide engine for `url` (DATABASE_URL by default), created
+    on first use with the configured pool and instrumented for pool_stats().
+    """
+    url = url or DATABASE_URL
+    with _ENGINES_LOCK:
+        if url not in _ENGINES:
+            stats = PoolStats()
+            args = _pool_args(url, _timed_pool_class(QueuePool, stats))
+            engine = create_engine(url, echo=settings.DB_ECHO, **args)
+            _instrument(engine, stats)
+            _ENGINES[url] = (engine, stats)
+        return _ENGINES[url][0]
+
+
+def _reset_after_fork():
+    """
+    In a forked child, drop the pooled connections inherited from the
+    parent without closing them (they are the parent's sockets), so each
+    engine opens its own; and replace a lock another thread may have held.
+    """
+    global _ENGINES_LOCK
+    _ENGINES_LOCK = threading.Lock()
+    for engine, _ in _ENGINES.values():
+        getattr(engine, "sync_engine", engine).dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def pool_stats() -> Dict[str, dict]:
+    """
+    Pool counters and current checkouts/overflow for every engine, keyed
+    by URL with the password hidden.
+    """
+    with _ENGINES_LOCK:
+        engines = list(_ENGINES.values())
+    report = {}
+    for engine, stats in engines:
+        # async engines wrap a sync engine that owns the pool
+        pool = getattr(engine, "sync_engine", engine).pool
+        report[engine.url.render_as_string(hide_password=True)] = stats.snapshot(pool)
+    return report
+
+
+def dispose_engines():
+    with _ENGINES_LOCK:
+        engines = [engine for engine, _ in _ENGINES.values() if not hasattr(engine, "sync_engine")]
+    for engine in engines:
+        engine.dispose()
+
+
+_SESSION_FACTORIES: Dict[str, sessionmaker] = {}
+
+
+def get_sessionmaker(url: Optional[str] = None) -> sessionmaker:
+    """
+    Sessions on get_engine(url); the engine is created on first call, not
+    at import.
+    """
+    url = url or DATABASE_URL
+    if url not in _SESSION_FACTORIES:
+        _SESSION_FACTORIES[url] = sessionmaker(autocommit=False, autoflush=False, bind=get_engine(url))
+    return _SESSION_FACTORIES[url]
+
+
+# sync driver URL prefix -> the async driver for the same database; SQLite
+# has none configured and keeps the sync engine
+ASYNC_DRIVERS = {
+    "mysql+pymysql://": "mysql+aiomysql://",
+    "mysql://": "mysql+aiomysql://",
+}
+
+
+def async_database_url(url: str) -> Optional[str]:
+    for prefix, async_prefix in ASYNC_DRIVERS.items():
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return None
+
+
+def get_async_engine(url: Optional[str] = None):
+    """
+    The process-wide async engine for the async-driver equivalent of `url`,
+    or None when there is none (SQLite) or DATABASE_ASYNC is off.
+    sqlalchemy.ext.asyncio (and greenlet) is only imported when an async
+    driver is used.
+    """
+    async_url = async_database_url(url or DATABASE_URL)
+    if async_url is None or not settings.DATABASE_ASYNC:
+        return None
+    with _ENGINES_LOCK:
+        if async_url not in _ENGINES:
+            from sqlalchemy.ext.asyncio import create_async_engine
+            from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+            stats = PoolStats()
+            args = _pool_args(async_url, _timed_pool_class(AsyncAdaptedQueuePool, stats))
+            engine = create_async_engine(async_url, echo=settings.DB_ECHO, **args)
+            _instrument(engine.sync_engine, stats)
+            _ENGINES[async_url] = (engine, stats)
+        return _ENGINES[async_url][0]
+
+
+def create_async_session_factory(url: Optional[str] = None):
+    """
+    An async_sessionmaker on get_async_engine(url), or None when there is
+    none, in which case callers fall back to sync sessions run on the
+    threadpool.
+    """
+    engine = get_async_engine(url)
+    if engine is None:
+        return None
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def dispose_async_engines():
+    with _ENGINES_LOCK:
+        engines = [engine for engine, _ in _ENGINES.values() if hasattr(engine, "sync_engine")]
+    for engine in engines:
+        await engine.dispose()
+
+
 # Dependency to use in routes
 def get_db():
-    db = SessionLocal()
+    """
+    A request-scoped session, rolled back if the request fails and always
+    closed.
+    """
+    db = get_sessionmaker()()
     try:
         yield db
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
@@ -1,29 +1,56 @@
 # backend/app/eligibility.py
-from typing import List
+import heapq
+from typing import List, NamedTuple, Optional, Tuple
 from app.models import QuestionnaireRequest, Benefit
-from app.benefits_data import get_all_benefits
+from app.benefits_data import get_all_benefits, load_scheme_catalog
+from app.rules import BOOLEAN_FIELDS, compile_catalog, load_rule_spec
+from app.breakpoints import BreakpointIndex
+from app.cache import LRUCache, questionnaire_key
+from app.config import settings
+from app.regions import resolve_region
+from app.income_tables import IncomeTables, get_income_tables, household_members
 
-# Simplified Federal Poverty Level numbers (example values)
-FPL_2024 = {
-    "1": 15060,
-    "2": 20440,
-    "3": 25820,
-    "4": 31200,
-    "5+": 36580
-}
+MIN_CONFIDENCE = 30.0
+MAX_RESULTS = 10
 
+# Rules are compiled once at import so requests only run closures; scraped
+# schemes bring their own rules
+RULE_SPEC = load_rule_spec()
+RULE_SPEC["rules"] = {**RULE_SPEC["rules"], **load_scheme_catalog()[1]}
+COMPILED_CATALOG = compile_catalog(get_all_benefits(), RULE_SPEC)
+BREAKPOINT_INDEX = BreakpointIndex(COMPILED_CATALOG, MIN_CONFIDENCE)
 
-def calculate_eligibility(questionnaire: QuestionnaireRequest) -> List[Benefit]:
+ELIGIBILITY_CACHE = LRUCache(maxsize=settings.ELIGIBILITY_CACHE_SIZE, ttl=settings.ELIGIBILITY_CACHE_TTL)
+
+
+class ScoredBenefit(NamedTuple):
+    """
+    A reference into the catalog plus its score; turned into a Benefit
+    only when a response is built.
+    """
+    benefit: Benefit
+    confidence_score: float
+
+    def materialize(self) -> Benefit:
+        return self.benefit.model_copy(update={"confidence_score": self.confidence_score})
+
+
+def cache_version(tables: IncomeTables) -> tuple:
     """
-    Mock eligibility logic for demonstration.
-    Returns a list of Benefit objects with confidence_score populated.
+    Cached results are only valid for the catalog and income tables they were computed with.
     """
-    eligible_benefits: List[Benefit] = []
-    all_benefits = get_all_benefits()
+    return (COMPILED_CATALOG.fingerprint, tables.version)
 
-    # Map household_size to FPL key
-    household_key = questionnaire.household_size.value
-    fpl = FPL_2024.get(household_key, FPL_2024["1"])
+
+def income_ratios(
+    questionnaire: QuestionnaireRequest, region: Optional[str], tables: IncomeTables
+) -> Tuple[float, Optional[float]]:
+    """
+    Income relative to the poverty guideline and, where the region has
+    one, to the state median income, both read by household size index.
+    """
+    size = household_members(questionnaire)
+    fpl = tables.fpl_row(region)[size]
 
     # Avoid division by zero
     if fpl == 0:
@@ -31,42 +58,115 @@ def calculate_eligibility(questionnaire: QuestionnaireRequest) -> List[Benefit]:
     else:
         income_to_fpl_ratio = questionnaire.annual_income / fpl
 
-    for benefit in all_benefits:
-        confidence = 0.0
-
-        if benefit.id == "calfresh":
-            # CalFresh: income < 200% FPL
-            if income_to_fpl_ratio < 2.0:
-                confidence = min(95.0, max(0.0, 100.0 - (income_to_fpl_ratio * 30.0)))
-            else:
-                confidence = 0.0
-
-        elif benefit.id == "liheap":
-            # LIHEAP: income < 150% FPL typically
-            if income_to_fpl_ratio < 1.5:
-                confidence = min(90.0, max(0.0, 95.0 - (income_to_fpl_ratio * 40.0)))
-            else:
-                confidence = 0.0
-
-        elif benefit.id == "calworks":
-            # CalWORKs: families with children, very low income
-            if questionnaire.has_children and income_to_fpl_ratio < 1.0:
-                confidence = min(85.0, max(0.0, 90.0 - (income_to_fpl_ratio * 50.0)))
-            else:
-                confidence = 0.0
-
-        # Optionally extend: adjust confidence if veteran/disabled
-        if questionnaire.is_veteran:
-            confidence = min(100.0, confidence + 5.0)
-        if questionnaire.is_disabled:
-            confidence = min(100.0, confidence + 5.0)
-
-        if confidence > 30.0:
-            # copy benefit dict to avoid mutating global mock
-            b = Benefit(**benefit.model_dump())
-            b.confidence_score = round(confidence, 1)
-            eligible_benefits.append(b)
-
-    # sort descending by confidence
-    eligible_benefits.sort(key=lambda x: x.confidence_score, reverse=True)
-    return eligible_benefits[:10]  # cap to top 10
+    smi = tables.smi_row(region)
+    income_to_smi_ratio = questionnaire.annual_income / smi[size] if smi else None
+    return income_to_fpl_ratio, income_to_smi_ratio
+
+
+def calculate_eligibility(questionnaire: QuestionnaireRequest) -> List[Benefit]:
+    """
+    score_eligibility with the default limit and threshold, as catalog
+    Benefit objects with confidence_score populated, best first.
+    """
+    return [scored.materialize() for scored in score_eligibility(questionnaire)]
+
+
+def score_eligibility(
+    questionnaire: QuestionnaireRequest,
+    limit: int = MAX_RESULTS,
+    min_confidence: float = MIN_CONFIDENCE,
+    early_exit: bool = False,
+) -> List[ScoredBenefit]:
+    """
+    Top `limit` matches scoring above `min_confidence`, as (catalog benefit,
+    confidence) records, best first. With early_exit, rules are visited by
+    their best possible score and scoring stops once none of the remaining
+    ones can enter the top `limit`; the result is the same.
+    Results are memoized on the normalized questionnaire in ELIGIBILITY_CACHE.
+    """
+    # national programs plus those of the zip code's state; all of them
+    # when the zip code cannot be resolved
+    region = resolve_region(questionnaire.zip_code)
+    tables = get_income_tables()
+    key = (questionnaire_key(questionnaire, settings.ELIGIBILITY_CACHE_ROUND_INCOME), region, limit, min_confidence)
+    version = cache_version(tables)
+    cached = ELIGIBILITY_CACHE.get(key, version)
+    if cached is not None:
+        return list(cached)
+
+    eligible_benefits = _evaluate(questionnaire, region, tables, limit, min_confidence, early_exit)
+    ELIGIBILITY_CACHE.put(key, tuple(eligible_benefits), version)
+    return eligible_benefits
+
+
+def _rank_key(item):
+    # descending by rounded confidence, ties keep catalog order
+    return (-item[0], item[1].position)
+
+
+def _score_rules(
+    questionnaire: QuestionnaireRequest,
+    region: Optional[str],
+    ratio: float,
+    smi_ratio: Optional[float],
+    min_confidence: float,
+) -> list:
+    scored = []
+    # only rules whose hard constraints pass are visited
+    for rule in COMPILED_CATALOG.candidates(ratio, questionnaire, region, smi_ratio):
+        confidence = rule.score(questionnaire, ratio, smi_ratio)
+        if confidence > min_confidence:
+            scored.append((round(confidence, 1), rule))
+    return scored
+
+
+def _score_rules_early_exit(
+    questionnaire: QuestionnaireRequest,
+    region: Optional[str],
+    ratio: float,
+    smi_ratio: Optional[float],
+    limit: int,
+    min_confidence: float,
+) -> list:
+    mask = COMPILED_CATALOG.candidate_mask(ratio, questionnaire, region, smi_ratio)
+    slots = COMPILED_CATALOG.slots
+    # min-heap of (confidence, -position, rule), so heap[0] is the k-th best
+    heap = []
+    for rule in COMPILED_CATALOG.by_max_score:
+        if len(heap) == limit and round(rule.max_score, 1) < heap[0][0]:
+            break
+        if not (mask >> slots[rule.position]) & 1:
+            continue
+        confidence = rule.score(questionnaire, ratio, smi_ratio)
+        if confidence > min_confidence:
+            item = (round(confidence, 1), -rule.position, rule)
+            if len(heap) < limit:
+                heapq.heappush(heap, item)
+            elif item[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, item)
+    return [(confidence, rule) for confidence, _, rule in heap]
+
+
+def _evaluate(
+    questionnaire: QuestionnaireRequest,
+    region: Optional[str],
+    tables: IncomeTables,
+    limit: int,
+    min_confidence: float,
+    early_exit: bool,
+) -> List[ScoredBenefit]:
+    ratio, smi_ratio = income_ratios(questionnaire, region, tables)
+
+    if early_exit:
+        scored = _score_rules_early_exit(questionnaire, region, ratio, smi_ratio, limit, min_confidence)
+    elif BREAKPOINT_INDEX.enabled and min_confidence >= BREAKPOINT_INDEX.min_confidence:
+        flags = tuple(bool(getattr(questionnaire, field)) for field in BOOLEAN_FIELDS)
+        scored = BREAKPOINT_INDEX.table(flags, region).score(ratio, min_confidence, smi_ratio)
+        for rule in COMPILED_CATALOG.direct_candidates(ratio, questionnaire, region, smi_ratio):
+            confidence = rule.score(questionnaire, ratio, smi_ratio)
+            if confidence > min_confidence:
+                scored.append((round(confidence, 1), rule))
+    else:
+        scored = _score_rules(questionnaire, region, ratio, smi_ratio, min_confidence)
+
+    return [ScoredBenefit(rule.benefit, confidence) for confidence, rule in heapq.nsmallest(limit, scored, key=_rank_key)]
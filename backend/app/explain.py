@@ -0,0 +1,181 @@
+# backend/app/explain.py
+"""
+Explanation traces for eligibility decisions. Tracing is a separate pass
+over the catalog run only for requests that ask for it, so
+score_eligibility and the paths behind it carry no instrumentation.
+"""
+import heapq
+from typing import List, Optional
+import numpy as np
+from app.models import QuestionnaireRequest, PredicateTrace, BoostTrace, BenefitTrace, EligibilityExplanation
+from app.eligibility import COMPILED_CATALOG, MAX_RESULTS, MIN_CONFIDENCE, income_ratios, _rank_key
+from app.rules import CompiledRule
+from app.regions import resolve_region
+from app.income_tables import get_income_tables, household_members
+
+
+def _predicates(
+    rule: CompiledRule,
+    questionnaire: QuestionnaireRequest,
+    region: Optional[str],
+    ratio: float,
+    smi_ratio: Optional[float],
+) -> List[PredicateTrace]:
+    predicates = []
+    if rule.regions:
+        if region is None:
+            predicates.append(PredicateTrace(name="region", passed=True, detail="region unknown, all programs kept"))
+        else:
+            predicates.append(PredicateTrace(
+                name="region", passed=region in rule.regions, detail=f"{region} in {', '.join(rule.regions)}"
+            ))
+    for field in rule.requires:
+        value = bool(getattr(questionnaire, field))
+        predicates.append(PredicateTrace(name=field, passed=value, detail=f"{field} is {value}"))
+    for field, accepted in rule.match:
+        value = getattr(questionnaire, field)
+        value = value.value if value is not None else None
+        predicates.append(PredicateTrace(
+            name=field, passed=value in accepted, detail=f"{value or 'unknown'} in {', '.join(accepted)}"
+        ))
+    if rule.min_age != float("-inf"):
+        predicates.append(PredicateTrace(
+            name="age >= min_age",
+            passed=questionnaire.age >= rule.min_age,
+            detail=f"{questionnaire.age} >= {rule.min_age:g}",
+        ))
+    if rule.max_age != float("inf"):
+        predicates.append(PredicateTrace(
+            name="age <= max_age",
+            passed=questionnaire.age <= rule.max_age,
+            detail=f"{questionnaire.age} <= {rule.max_age:g}",
+        ))
+    if rule.max_income != float("inf"):
+        predicates.append(PredicateTrace(
+            name="annual_income <= max_income",
+            passed=questionnaire.annual_income <= rule.max_income,
+            detail=f"{questionnaire.annual_income:g} <= {rule.max_income:g}",
+        ))
+    if rule.max_fpl_ratio != float("inf"):
+        predicates.append(PredicateTrace(
+            name="income_to_fpl_ratio < max_fpl_ratio",
+            passed=ratio < rule.max_fpl_ratio,
+            detail=f"{ratio:.4f} < {rule.max_fpl_ratio}",
+        ))
+    if rule.max_smi_ratio != float("inf"):
+        if smi_ratio is None:
+            predicates.append(PredicateTrace(
+                name="income_to_smi_ratio < max_smi_ratio", passed=True, detail="no state median income, gate skipped"
+            ))
+        else:
+            predicates.append(PredicateTrace(
+                name="income_to_smi_ratio < max_smi_ratio",
+                passed=smi_ratio < rule.max_smi_ratio,
+                detail=f"{smi_ratio:.4f} < {rule.max_smi_ratio}",
+            ))
+    return predicates
+
+
+def _dsl_columns(questionnaire: QuestionnaireRequest, ratio: float, smi_ratio: Optional[float]) -> dict:
+    # the NumPy-compiled expressions also evaluate element-wise on scalars
+    return {
+        "fpl_ratio": ratio,
+        "smi_ratio": 0.0 if smi_ratio is None else smi_ratio,
+        "household_size": household_members(questionnaire),
+        "annual_income": questionnaire.annual_income,
+        "age": questionnaire.age,
+        "has_children": questionnaire.has_children,
+        "is_veteran": questionnaire.is_veteran,
+        "is_disabled": questionnaire.is_disabled,
+    }
+
+
+def trace_rule(
+    rule: CompiledRule,
+    questionnaire: QuestionnaireRequest,
+    region: Optional[str],
+    ratio: float,
+    smi_ratio: Optional[float],
+    min_confidence: float,
+) -> BenefitTrace:
+    """
+    Trace one rule the way the engine evaluates it: hard constraints, then
+    the raw score, its clamp and each boost. The outcome is provisional
+    until the top-k selection in explain_eligibility.
+    """
+    predicates = _predicates(rule, questionnaire, region, ratio, smi_ratio)
+    raw = clamped = final = None
+    boosts: List[BoostTrace] = []
+
+    if all(p.passed for p in predicates):
+        if rule.dsl is None:
+            raw = rule.base - (ratio * rule.slope)
+            clamped = min(rule.cap, max(0.0, raw))
+        else:
+            cols = _dsl_columns(questionnaire, ratio, smi_ratio)
+            fires = bool(rule.dsl.when_vector(cols, np))
+            predicates.append(PredicateTrace(name="when", passed=fires, detail=rule.dsl.when_source or "always"))
+            if fires:
+                raw = clamped = float(rule.dsl.score_vector(cols, np))
+
+    if clamped is not None:
+        confidence = clamped
+        for field, amount in rule.boosts:
+            if getattr(questionnaire, field):
+                confidence = min(100.0, confidence + amount)
+                boosts.append(BoostTrace(field=field, amount=amount, confidence_after=round(confidence, 4)))
+        final = rule.score(questionnaire, ratio, smi_ratio)
+        outcome = "selected" if final > min_confidence else "below_cutoff"
+    else:
+        outcome = "gate_failed"
+
+    return BenefitTrace(
+        benefit_id=rule.benefit.id,
+        predicates=predicates,
+        raw_confidence=None if raw is None else round(raw, 4),
+        clamped_confidence=None if clamped is None else round(clamped, 4),
+        boosts=boosts,
+        final_confidence=None if final is None else round(final, 4),
+        outcome=outcome,
+    )
+
+
+def explain_eligibility(
+    questionnaire: QuestionnaireRequest, limit: int = MAX_RESULTS, min_confidence: float = MIN_CONFIDENCE
+) -> EligibilityExplanation:
+    """
+    Why each benefit was selected, failed a hard constraint, fell below
+    the `min_confidence` cutoff or was cut by the top-`limit` cap. Selects
+    the same benefits as score_eligibility for the same arguments.
+    """
+    region = resolve_region(questionnaire.zip_code)
+    tables = get_income_tables()
+    size = household_members(questionnaire)
+    ratio, smi_ratio = income_ratios(questionnaire, region, tables)
+    smi_row = tables.smi_row(region)
+
+    rules = sorted(COMPILED_CATALOG.rules, key=lambda r: r.position)
+    traces = [trace_rule(rule, questionnaire, region, ratio, smi_ratio, min_confidence) for rule in rules]
+
+    eligible = [
+        (round(rule.score(questionnaire, ratio, smi_ratio), 1), rule)
+        for rule, trace in zip(rules, traces)
+        if trace.outcome == "selected"
+    ]
+    selected = {rule.position for _, rule in heapq.nsmallest(limit, eligible, key=_rank_key)}
+    for rule, trace in zip(rules, traces):
+        if trace.outcome == "selected" and rule.position not in selected:
+            trace.outcome = "beyond_limit"
+
+    return EligibilityExplanation(
+        region=region,
+        household_members=size,
+        fpl=tables.fpl_row(region)[size],
+        income_to_fpl_ratio=round(ratio, 6),
+        smi=smi_row[size] if smi_row else None,
+        income_to_smi_ratio=None if smi_ratio is None else round(smi_ratio, 6),
+        min_confidence=min_confidence,
+        limit=limit,
+        income_tables=tables.version,
+        benefits=traces,
+    )
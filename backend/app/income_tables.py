@@ -0,0 +1,113 @@
+# backend/app/income_tables.py
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from app.models import QuestionnaireRequest, HouseholdSize
+from app.config import settings
+
+TABLES_PATH = Path(__file__).resolve().parent.parent / "resources" / "income_tables.json"
+
+# Threshold arrays are precomputed for sizes 1..MAX_HOUSEHOLD_SIZE;
+# larger households use the last entry
+MAX_HOUSEHOLD_SIZE = 20
+NATIONAL = "US"
+
+# "5+" households without an exact member count are treated as 5
+HOUSEHOLD_SIZES = {size.value: i + 1 for i, size in enumerate(HouseholdSize)}
+
+
+def household_members(questionnaire: QuestionnaireRequest) -> int:
+    """
+    Exact household size, clamped to 1..MAX_HOUSEHOLD_SIZE.
+    """
+    size = questionnaire.household_members or HOUSEHOLD_SIZES[questionnaire.household_size.value]
+    return min(max(size, 1), MAX_HOUSEHOLD_SIZE)
+
+
+class IncomeTables:
+    """
+    One year's poverty guidelines and state median incomes, precomputed as
+    tuples indexed by household size (index 0 is unused). Instances are
+    never mutated; a new year or a corrected table is installed by
+    swapping the whole object.
+    """
+
+    def __init__(self, year: str, fpl: Dict[str, Tuple[float, ...]], smi: Dict[str, Tuple[float, ...]], fingerprint: str):
+        self.year = year
+        self.fpl = fpl
+        self.smi = smi
+        self.national_fpl = fpl[NATIONAL]
+        self.fingerprint = fingerprint
+
+    @property
+    def version(self) -> str:
+        return f"{self.year}:{self.fingerprint[:12]}"
+
+    def fpl_row(self, region: Optional[str]) -> Tuple[float, ...]:
+        """
+        FPL by household size for a region (Alaska and Hawaii have their own).
+        """
+        return self.fpl.get(region, self.national_fpl) if region else self.national_fpl
+
+    def smi_row(self, region: Optional[str]) -> Optional[Tuple[float, ...]]:
+        """
+        State median income by household size, None when the region has no table.
+        """
+        return self.smi.get(region) if region else None
+
+
+def build_income_tables(spec: dict, year: str) -> IncomeTables:
+    if year not in spec["years"]:
+        raise ValueError(f"No income tables for {year}; available: {', '.join(sorted(spec['years']))}")
+    data = spec["years"][year]
+    sizes = range(1, MAX_HOUSEHOLD_SIZE + 1)
+
+    fpl = {}
+    for region, guideline in data["fpl"].items():
+        base, per_person = float(guideline["base"]), float(guideline["per_person"])
+        fpl[region] = (0.0,) + tuple(base + per_person * (n - 1) for n in sizes)
+
+    factors = spec["smi_size_factors"]
+    extra = spec["smi_extra_person_factor"]
+    size_factors = [factors[n - 1] if n <= len(factors) else factors[-1] + extra * (n - len(factors)) for n in sizes]
+    smi = {
+        region: (0.0,) + tuple(float(median_4) * factor for factor in size_factors)
+        for region, median_4 in data.get("smi_4", {}).items()
+    }
+
+    digest = hashlib.sha1(json.dumps([year, data, factors, extra], sort_keys=True).encode("utf-8"))
+    return IncomeTables(year, fpl, smi, digest.hexdigest())
+
+
+def load_income_tables(year: str, path: Path = TABLES_PATH) -> IncomeTables:
+    with open(path, "r", encoding="utf-8") as f:
+        return build_income_tables(json.load(f), year)
+
+
+_current: Optional[IncomeTables] = None
+_lock = threading.Lock()
+
+
+def get_income_tables() -> IncomeTables:
+    """
+    The active tables. Callers read this once per evaluation so a swap
+    never mixes two versions within one result.
+    """
+    global _current
+    if _current is None:
+        with _lock:
+            if _current is None:
+                _current = load_income_tables(settings.INCOME_TABLES_YEAR)
+    return _current
+
+
+def install_income_tables(tables: IncomeTables) -> IncomeTables:
+    """
+    Atomically replace the active tables; returns the previous ones.
+    """
+    global _current
+    with _lock:
+        previous, _current = _current, tables
+    return previous
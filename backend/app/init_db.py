@@ -0,0 +1,36 @@
+# backend/app/init_db.py
+"""
+Create the database schema. Run once per database (and after adding
+tables) instead of on every app start:
+
+    cd backend && python -m app.init_db [--url sqlite:///./benefits.db]
+
+Only missing tables are created; existing ones are left as they are.
+"""
+import argparse
+import sys
+from typing import List, Optional
+from app.database import DATABASE_URL, get_engine
+from app.orm import Base
+
+
+def create_schema(url: Optional[str] = None) -> List[str]:
+    """
+    Create every app table missing from the database at `url`
+    (DATABASE_URL by default); returns the tables the app defines.
+    """
+    Base.metadata.create_all(bind=get_engine(url))
+    return sorted(Base.metadata.tables)
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser(description="Create the BenefitsFinder database schema.")
+    parser.add_argument("--url", default=DATABASE_URL, help="database URL; DATABASE_URL or MYSQL_* by default")
+    args = parser.parse_args(argv)
+    tables = create_schema(args.url)
+    print(f"Schema ready: {', '.join(tables)}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,20 +1,50 @@
 # backend/app/main.py
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request, Query, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from typing import List
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from pydantic_core import from_json
+from typing import AsyncIterator, List, Literal, Optional, Tuple
+import logging
 import re
-import os
+import sys
+from contextlib import asynccontextmanager
+from datetime import datetime
 from pathlib import Path
-from app.models import QuestionnaireRequest, EligibilityResponse, OCRRequest, OCRResponse
-from app.eligibility import calculate_eligibility
-from app.pdf_utils import render_benefit_summary_to_html, generate_pdf_from_html
+from app.models import (
+    QuestionnaireRequest, QuestionnaireDelta, EligibilityResponse, SessionResponse, SensitivityResponse,
+    OCRRequest, OCRResponse, HouseholdSize,
+)
+from app.eligibility import calculate_eligibility, score_eligibility, ELIGIBILITY_CACHE, MAX_RESULTS, MIN_CONFIDENCE
+from app.sessions import EligibilitySession, create_session, get_session, end_session
+from app.sensitivity import income_sensitivity
+from app.responses import encode_eligibility_response
 from app.config import settings
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.models import Base, EligibilitySubmission
+from app.submissions import SubmissionFilters, SubmissionStore, SubmissionWriter
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    if settings.DB_CREATE_SCHEMA_ON_STARTUP:
+        from app.init_db import create_schema
+
+        await run_in_threadpool(create_schema)
+    SUBMISSION_WRITER.start()
+    yield
+    if SHADOW is not None:
+        SHADOW.close()
+    await SUBMISSION_WRITER.close()
+    if "app.database" in sys.modules:
+        from app.database import dispose_async_engines, dispose_engines
+
+        dispose_engines()
+        await dispose_async_engines()
 
-app = FastAPI(title="BenefitsFinder API", version="1.0.0")
+
+app = FastAPI(title="BenefitsFinder API", version="1.0.0", lifespan=lifespan)
 
 origins = [o.strip() for o in settings.API_ALLOWED_ORIGINS.split(",") if o.strip()]
 
@@ -26,44 +56,287 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# SQLAlchemy setup
-MYSQL_USER = os.getenv("MYSQL_USER", "root")
-MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD", "password")
-MYSQL_HOST = os.getenv("MYSQL_HOST", "localhost")
-MYSQL_DB = os.getenv("MYSQL_DB", "benefitsfinder")
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}/{MYSQL_DB}"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, echo=True, future=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# one store (and pool) on the app's database, DATABASE_URL or the MYSQL_* variables
+SUBMISSIONS = SubmissionStore()
+# eligibility endpoints queue their submissions here rather than waiting on the insert
+SUBMISSION_WRITER = SubmissionWriter(
+    SUBMISSIONS, settings.SUBMISSION_QUEUE_SIZE, settings.SUBMISSION_BATCH_SIZE, settings.SUBMISSION_FLUSH_INTERVAL
+)
+
+# Modules only some endpoints need (numpy-backed batch and explain code,
+# the PDF stack, SQLAlchemy and the database drivers) are imported on
+# first use, and the schema is created by `python -m app.init_db` rather
+# than on every start, so a cold start only pays for /api/eligibility.
+
+# compares a sample of /api/eligibility answers against an alternate engine
+SHADOW = None
+if settings.SHADOW_ENGINE and settings.SHADOW_SAMPLE_RATE > 0.0:
+    from app.shadow import create_shadow_runner
+
+    SHADOW = create_shadow_runner()
 
-# Create tables if not exist
-Base.metadata.create_all(bind=engine)
 
 @app.get("/")
 def read_root():
     return {
         "message": "BenefitsFinder API",
         "version": "1.0.0",
-        "endpoints": ["/api/eligibility", "/api/ocr", "/api/pdf"]
+        "endpoints": [
+            "/api/eligibility", "/api/eligibility/batch", "/api/eligibility/sessions",
+            "/api/eligibility/what-if", "/api/ocr", "/api/pdf",
+        ]
     }
 
 
 @app.post("/api/eligibility", response_model=EligibilityResponse)
-def check_eligibility(questionnaire: QuestionnaireRequest):
+async def check_eligibility(
+    questionnaire: QuestionnaireRequest,
+    limit: int = Query(MAX_RESULTS, ge=1, le=100),
+    min_confidence: float = Query(MIN_CONFIDENCE, ge=0.0, le=100.0),
+    early_exit: bool = False,
+    explain: bool = False,
+):
     """
     Calculate benefit eligibility based on questionnaire responses and save submission.
+    Returns the top `limit` benefits scoring above `min_confidence`; with
+    explain=true, also a trace of how each benefit was decided.
+    """
+    try:
+        # scoring and explaining are CPU-bound; keep them off the event loop
+        eligible_benefits = await run_in_threadpool(score_eligibility, questionnaire, limit, min_confidence, early_exit)
+        if SHADOW is not None:
+            SHADOW.submit(questionnaire, limit, min_confidence, eligible_benefits, early_exit)
+        explanation = None
+        if explain:
+            from app.explain import explain_eligibility
+
+            explanation = await run_in_threadpool(explain_eligibility, questionnaire, limit, min_confidence)
+        # Queue the submission; it is inserted in the next batch
+        await SUBMISSION_WRITER.enqueue(questionnaire.model_dump())
+        # already-encoded JSON; response_model only documents the shape
+        return Response(
+            encode_eligibility_response(eligible_benefits, questionnaire, explanation), media_type="application/json"
+        )
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Eligibility check failed")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+# Questionnaires evaluated per threadpool hop, so a large batch never holds
+# the event loop or one worker thread for its whole duration
+BATCH_CHUNK_SIZE = 1000
+_questionnaire_list = TypeAdapter(List[QuestionnaireRequest])
+
+
+def _too_many_items() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Batch exceeds {settings.BATCH_MAX_ITEMS} items")
+
+
+def _body_too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Batch body exceeds {settings.BATCH_MAX_BYTES} bytes")
+
+
+async def _stream_batch_body(request: Request) -> AsyncIterator[bytes]:
     """
+    The request body chunk by chunk, refused with a 413 as soon as its
+    Content-Length or the bytes actually received exceed BATCH_MAX_BYTES.
+    """
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > settings.BATCH_MAX_BYTES:
+        raise _body_too_large()
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > settings.BATCH_MAX_BYTES:
+            raise _body_too_large()
+        yield chunk
+
+
+def _validate_ndjson_lines(lines: List[Tuple[int, bytes]]) -> List[QuestionnaireRequest]:
+    questionnaires = []
+    for line_no, line in lines:
+        try:
+            questionnaires.append(QuestionnaireRequest.model_validate_json(line))
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail={"line": line_no, "errors": e.errors(include_url=False)})
+    return questionnaires
+
+
+async def _read_ndjson_batch(request: Request) -> List[QuestionnaireRequest]:
+    # lines are counted as they arrive and only validated, on the threadpool,
+    # once the whole batch is known to be within BATCH_MAX_ITEMS
+    lines: List[Tuple[int, bytes]] = []
+    line_no = 0
+
+    def keep(line: bytes):
+        if not line.strip():
+            return
+        if len(lines) >= settings.BATCH_MAX_ITEMS:
+            raise _too_many_items()
+        lines.append((line_no, line))
+
+    buffer = b""
+    async for chunk in _stream_batch_body(request):
+        buffer += chunk
+        *complete, buffer = buffer.split(b"\n")
+        for line in complete:
+            line_no += 1
+            keep(line)
+    line_no += 1
+    keep(buffer)
+
+    questionnaires: List[QuestionnaireRequest] = []
+    for start in range(0, len(lines), BATCH_CHUNK_SIZE):
+        questionnaires += await run_in_threadpool(_validate_ndjson_lines, lines[start:start + BATCH_CHUNK_SIZE])
+    return questionnaires
+
+
+def _validate_json_batch(body: bytes) -> List[QuestionnaireRequest]:
+    """
+    Parse the array, check its length, then validate it; run on the
+    threadpool, as a full batch takes too long for the event loop.
+    """
+    try:
+        items = from_json(body)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=[{"type": "json_invalid", "loc": [], "msg": f"Invalid JSON: {e}"}])
+    if isinstance(items, list) and len(items) > settings.BATCH_MAX_ITEMS:
+        raise _too_many_items()
     try:
-        eligible_benefits: List = calculate_eligibility(questionnaire)
-        # Save submission to DB
-        db = SessionLocal()
-        submission = EligibilitySubmission(submission_data=questionnaire.model_dump())
-        db.add(submission)
-        db.commit()
-        db.refresh(submission)
-        db.close()
-        return EligibilityResponse(eligible_benefits=eligible_benefits, user_data=questionnaire)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        return _questionnaire_list.validate_python(items)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+
+
+async def _read_json_batch(request: Request) -> List[QuestionnaireRequest]:
+    body = b"".join([chunk async for chunk in _stream_batch_body(request)])
+    return await run_in_threadpool(_validate_json_batch, body)
+
+
+@app.post("/api/eligibility/batch", response_model=List[EligibilityResponse])
+async def check_eligibility_batch(request: Request):
+    """
+    Screen many questionnaires in one call. The body is either a JSON array
+    or NDJSON (Content-Type: application/x-ndjson, one questionnaire per line).
+    Results are returned in input order.
+    """
+    if "ndjson" in request.headers.get("content-type", ""):
+        questionnaires = await _read_ndjson_batch(request)
+    else:
+        questionnaires = await _read_json_batch(request)
+
+    try:
+        from app.batch import score_eligibility_batch
+
+        results = []
+        for start in range(0, len(questionnaires), BATCH_CHUNK_SIZE):
+            chunk = questionnaires[start:start + BATCH_CHUNK_SIZE]
+            scored = await run_in_threadpool(score_eligibility_batch, chunk)
+            results.extend(encode_eligibility_response(s, q) for q, s in zip(chunk, scored))
+        for q in questionnaires:
+            await SUBMISSION_WRITER.enqueue(q.model_dump())
+        return Response(b"[" + b",".join(results) + b"]", media_type="application/json")
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Batch eligibility check failed")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.post("/api/eligibility/what-if", response_model=SensitivityResponse)
+def check_income_sensitivity(
+    questionnaire: QuestionnaireRequest,
+    min_confidence: float = Query(MIN_CONFIDENCE, ge=0.0, le=100.0),
+):
+    """
+    For each program, the income range where this household qualifies and
+    the confidence curve over income, with everything else held fixed.
+    """
+    try:
+        return SensitivityResponse(
+            programs=income_sensitivity(questionnaire, min_confidence), user_data=questionnaire
+        )
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Income sensitivity failed")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+def _session_response(session: EligibilitySession, limit: int, min_confidence: float) -> SessionResponse:
+    return SessionResponse(
+        session_id=session.id,
+        eligible_benefits=[b.materialize() for b in session.results(limit, min_confidence)],
+        missing_fields=session.missing_fields(),
+        rescored=session.rescored,
+    )
+
+
+@app.post("/api/eligibility/sessions", response_model=SessionResponse)
+def start_eligibility_session(
+    answers: Optional[QuestionnaireDelta] = None,
+    limit: int = Query(MAX_RESULTS, ge=1, le=100),
+    min_confidence: float = Query(MIN_CONFIDENCE, ge=0.0, le=100.0),
+):
+    """
+    Start a questionnaire session, optionally with the answers so far.
+    Results appear once every required answer is in.
+    """
+    session = create_session()
+    if answers is not None:
+        session.apply(answers)
+    return _session_response(session, limit, min_confidence)
+
+
+@app.patch("/api/eligibility/sessions/{session_id}", response_model=SessionResponse)
+def update_eligibility_session(
+    session_id: str,
+    delta: QuestionnaireDelta,
+    limit: int = Query(MAX_RESULTS, ge=1, le=100),
+    min_confidence: float = Query(MIN_CONFIDENCE, ge=0.0, le=100.0),
+):
+    """
+    Apply changed answers and return updated results. Only the rules that
+    read a changed field are re-scored.
+    """
+    session = get_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    try:
+        session.apply(delta)
+        return _session_response(session, limit, min_confidence)
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Session update failed")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.delete("/api/eligibility/sessions/{session_id}", status_code=204)
+def delete_eligibility_session(session_id: str):
+    if not end_session(session_id):
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+
+
+@app.get("/api/eligibility/cache")
+def get_eligibility_cache_stats():
+    """
+    Hit/miss/eviction counters for the eligibility result cache.
+    """
+    return ELIGIBILITY_CACHE.stats()
+
+
+@app.get("/api/eligibility/shadow")
+def get_shadow_stats():
+    """
+    Shadow evaluation counters: requests sampled and compared, mismatches
+    against the alternate engine and the latency difference.
+    """
+    if SHADOW is None:
+        return {"enabled": False}
+    return {"enabled": True, **SHADOW.stats()}
 
 
 @app.post("/api/ocr", response_model=OCRResponse)
@@ -120,6 +393,8 @@ def create_benefit_pdf(questionnaire: QuestionnaireRequest):
     Create a PDF summary for the provided questionnaire and return path to download the PDF.
     """
     try:
+        from app.pdf_utils import render_benefit_summary_to_html, generate_pdf_from_html
+
         benefits = calculate_eligibility(questionnaire)
         user = questionnaire.model_dump()
         # optionally add name if provided via extra fields in future
@@ -135,22 +410,71 @@ def create_benefit_pdf(questionnaire: QuestionnaireRequest):
 
         return FileResponse(path=str(output_path), filename=filename, media_type="application/pdf")
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"PDF generation failed: {str(e)}")
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("PDF generation failed")
+        raise HTTPException(status_code=500, detail="PDF generation failed")
+
+
+@app.get("/api/submissions/queue")
+def get_submission_queue_stats():
+    """
+    Write-behind queue depth and insert counters.
+    """
+    return SUBMISSION_WRITER.stats()
+
+
+@app.get("/api/database/pool")
+def get_database_pool_stats():
+    """
+    Connection pool counters per engine: checkouts, waits on a saturated
+    pool and their duration, timeouts, and current checkouts and overflow.
+    """
+    from app.database import pool_stats
+
+    return pool_stats()
+
+
+def submission_filters(
+    since: Optional[datetime] = Query(None, description="Created at or after"),
+    until: Optional[datetime] = Query(None, description="Created before"),
+    zip_prefix: Optional[str] = Query(None, max_length=10),
+    household_size: Optional[HouseholdSize] = None,
+) -> SubmissionFilters:
+    return SubmissionFilters(since, until, zip_prefix, household_size.value if household_size else None)
 
 
 @app.get("/api/submissions")
-def get_submissions():
+async def get_submissions(
+    limit: int = Query(100, ge=1, le=settings.SUBMISSION_PAGE_MAX),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    filters: SubmissionFilters = Depends(submission_filters),
+    db=Depends(SUBMISSIONS.session),
+):
     """
-    Return all eligibility submissions (for admin/demo purposes).
+    One page of eligibility submissions, newest first (for admin/demo
+    purposes). Follow next_cursor until it is null for the rest.
     """
-    db = SessionLocal()
-    submissions = db.query(EligibilitySubmission).all()
-    db.close()
-    return [
-        {"id": s.id, "data": s.submission_data, "created_at": str(s.created_at)}
-        for s in submissions
-    ]
+    page = await SUBMISSIONS.page(db, filters, limit, cursor)
+    return {"submissions": page.submissions, "next_cursor": page.next_cursor}
+
+
+@app.get("/api/submissions/export")
+async def export_submissions(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    filters: SubmissionFilters = Depends(submission_filters),
+):
+    """
+    Every matching submission, newest first, streamed as NDJSON or CSV in
+    chunks read from a server-side cursor.
+    """
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    chunks = SUBMISSIONS.export(filters, fmt, settings.SUBMISSION_EXPORT_CHUNK_SIZE)
+    return StreamingResponse(
+        chunks, media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="submissions.{fmt}"'},
+    )
 
 
 if __name__ == "__main__":
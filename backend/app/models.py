@@ -1,11 +1,7 @@
 # backend/app/models.py
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, List, Literal
 from enum import Enum
-from sqlalchemy import Column, Integer, String, JSON, TIMESTAMP, ForeignKey
-from sqlalchemy.orm import declarative_base
-
-Base = declarative_base()
 
 class HouseholdSize(str, Enum):
     ONE = "1"
@@ -15,17 +11,74 @@ class HouseholdSize(str, Enum):
     FIVE_PLUS = "5+"
 
 
+class Gender(str, Enum):
+    FEMALE = "female"
+    MALE = "male"
+    TRANSGENDER = "transgender"
+
+
+class SocialCategory(str, Enum):
+    GENERAL = "general"
+    SC = "sc"
+    ST = "st"
+    OBC = "obc"
+    EWS = "ews"
+    MINORITY = "minority"
+
+
+class Occupation(str, Enum):
+    FARMER = "farmer"
+    STUDENT = "student"
+    FISHERMAN = "fisherman"
+    ARTISAN = "artisan"
+    CONSTRUCTION_WORKER = "construction_worker"
+    STREET_VENDOR = "street_vendor"
+    WEAVER = "weaver"
+    ENTREPRENEUR = "entrepreneur"
+    UNEMPLOYED = "unemployed"
+    OTHER = "other"
+
+
 class QuestionnaireRequest(BaseModel):
     age: int
     zip_code: str
     annual_income: float
     household_size: HouseholdSize
+    # exact member count, used for thresholds when the size is "5+"
+    household_members: Optional[int] = None
     has_children: bool
     is_veteran: bool = False
     is_disabled: bool = False
+    # optional; schemes restricted on one of these never match while it is unset
+    gender: Optional[Gender] = None
+    social_category: Optional[SocialCategory] = None
+    occupation: Optional[Occupation] = None
+
+
+class QuestionnaireDelta(BaseModel):
+    """
+    Answers changed since the last step of a questionnaire session;
+    unset fields are left as they were.
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    age: Optional[int] = None
+    zip_code: Optional[str] = None
+    annual_income: Optional[float] = None
+    household_size: Optional[HouseholdSize] = None
+    household_members: Optional[int] = None
+    has_children: Optional[bool] = None
+    is_veteran: Optional[bool] = None
+    is_disabled: Optional[bool] = None
+    gender: Optional[Gender] = None
+    social_category: Optional[SocialCategory] = None
+    occupation: Optional[Occupation] = None
 
 
 class Benefit(BaseModel):
+    # catalog entries are shared; scored copies are made with model_copy
+    model_config = ConfigDict(frozen=True)
+
     id: str
     name: str
     description: str
@@ -36,9 +89,90 @@ class Benefit(BaseModel):
     documents_needed: List[str]
 
 
+class PredicateTrace(BaseModel):
+    name: str
+    passed: bool
+    # the values compared, e.g. "0.7746 < 2.0"
+    detail: str
+
+
+class BoostTrace(BaseModel):
+    field: str
+    amount: float
+    confidence_after: float
+
+
+class BenefitTrace(BaseModel):
+    benefit_id: str
+    predicates: List[PredicateTrace]
+    # scores are None when a predicate failed and the rule was not scored
+    raw_confidence: Optional[float]
+    clamped_confidence: Optional[float]
+    boosts: List[BoostTrace]
+    final_confidence: Optional[float]
+    outcome: Literal["selected", "gate_failed", "below_cutoff", "beyond_limit"]
+
+
+class EligibilityExplanation(BaseModel):
+    region: Optional[str]
+    household_members: int
+    fpl: float
+    income_to_fpl_ratio: float
+    smi: Optional[float]
+    income_to_smi_ratio: Optional[float]
+    min_confidence: float
+    limit: int
+    income_tables: str
+    benefits: List[BenefitTrace]
+
+
 class EligibilityResponse(BaseModel):
     eligible_benefits: List[Benefit]
     user_data: QuestionnaireRequest
+    # only with explain=true
+    explanation: Optional[EligibilityExplanation] = None
+
+
+class SessionResponse(BaseModel):
+    session_id: str
+    eligible_benefits: List[Benefit]
+    # required answers still missing; results stay empty until there are none
+    missing_fields: List[str]
+    # rules re-scored for this step
+    rescored: int
+
+
+class IncomeInterval(BaseModel):
+    # eligible for min_income <= annual_income < max_income (<= when
+    # max_inclusive, for absolute income ceilings); None is unbounded
+    min_income: float
+    max_income: Optional[float]
+    max_inclusive: bool = False
+
+
+class ConfidencePoint(BaseModel):
+    annual_income: float
+    confidence_score: float
+
+
+class ProgramSensitivity(BaseModel):
+    benefit_id: str
+    name: str
+    # False for rules written as DSL expressions, which are only scored
+    # at the current income
+    analytic: bool
+    # None when no income qualifies
+    eligible_income: Optional[IncomeInterval]
+    current_confidence: float
+    # how much more the household could earn and stay eligible
+    income_headroom: Optional[float]
+    # vertices of the piecewise-linear confidence over eligible_income
+    confidence_curve: List[ConfidencePoint]
+
+
+class SensitivityResponse(BaseModel):
+    programs: List[ProgramSensitivity]
+    user_data: QuestionnaireRequest
 
 
 class OCRRequest(BaseModel):
@@ -51,37 +185,13 @@ class OCRResponse(BaseModel):
     address: Optional[str]
 
 
-class User(Base):
-    __tablename__ = 'users'
-    id = Column(Integer, primary_key=True)
-    username = Column(String(255), unique=True, nullable=False)
-    password_hash = Column(String(255), nullable=False)
-    name = Column(String(255))
-    age = Column(Integer)
-    created_at = Column(TIMESTAMP)
-
-
-class EligibilitySubmission(Base):
-    __tablename__ = 'eligibility_submissions'
-    id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.id'), nullable=True)
-    submission_data = Column(JSON, nullable=False)
-    created_at = Column(TIMESTAMP)
-
-# app/models.py
-from sqlalchemy import Column, Integer, String, Float, Boolean, Text
-from .database import Base
-
-class BenefitORM(Base):
-    __tablename__ = "benefits"
-
-    id = Column(Integer, primary_key=True, index=True)
-    benefit_id = Column(String, unique=True, nullable=False)
-    name = Column(String, nullable=False)
-    description = Column(Text)
-    estimated_amount = Column(String)
-    confidence_score = Column(Float, default=0)
-    requirements = Column(Text)
-    application_url = Column(String)
-    documents_needed = Column(Text)
-    is_active = Column(Boolean, default=True)
+# SQLAlchemy models live in app.orm and are imported on first access, so
+# the request and response models load without SQLAlchemy
+_ORM_NAMES = {"Base", "User", "EligibilitySubmission", "BenefitORM"}
+
+
+def __getattr__(name):
+    if name in _ORM_NAMES:
+        from app import orm
+        return getattr(orm, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,43 @@
+# backend/app/orm.py
+"""
+SQLAlchemy models, all on app.database.Base. app.models re-exports them
+on first access, so only code that touches the database loads SQLAlchemy.
+"""
+from sqlalchemy import Column, Integer, String, Float, Boolean, Text, JSON, TIMESTAMP, ForeignKey, func
+from app.database import Base
+
+
+class User(Base):
+    __tablename__ = 'users'
+    id = Column(Integer, primary_key=True)
+    username = Column(String(255), unique=True, nullable=False)
+    password_hash = Column(String(255), nullable=False)
+    name = Column(String(255))
+    age = Column(Integer)
+    created_at = Column(TIMESTAMP)
+
+
+class EligibilitySubmission(Base):
+    __tablename__ = 'eligibility_submissions'
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=True)
+    submission_data = Column(JSON, nullable=False)
+    # as in mysql/init.sql; tables from older create_all runs lack the
+    # default, which SubmissionStore does not rely on
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+
+class BenefitORM(Base):
+    __tablename__ = "benefits"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # MySQL needs a length on every VARCHAR
+    benefit_id = Column(String(255), unique=True, nullable=False)
+    name = Column(String(255), nullable=False)
+    description = Column(Text)
+    estimated_amount = Column(String(255))
+    confidence_score = Column(Float, default=0)
+    requirements = Column(Text)
+    application_url = Column(String(2048))
+    documents_needed = Column(Text)
+    is_active = Column(Boolean, default=True)
@@ -0,0 +1,143 @@
+# backend/app/regions.py
+import csv
+import json
+import mmap
+import struct
+import threading
+from bisect import bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+RESOURCES_DIR = Path(__file__).resolve().parent.parent / "resources"
+REGIONS_CSV = RESOURCES_DIR / "zip_regions.csv"
+REGIONS_INDEX = RESOURCES_DIR / "zip_regions.bin"
+
+# Postal code length per country; US ZIPs and Indian PINs never collide
+# because they differ in length, so both share one integer key space
+CODE_DIGITS = {"US": 5, "IN": 6}
+
+# magic, format version, record count, region table offset and length
+_HEADER = struct.Struct("<4sHxxIII")
+_MAGIC = b"ZIPR"
+_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Region:
+    country: str
+    state: str
+    district: Optional[str] = None
+
+
+def postal_key(code: str) -> Optional[int]:
+    """
+    Integer key for a ZIP ("94110", "94110-1234") or PIN ("560 001") code.
+    """
+    if code.isdigit() and 5 <= len(code) <= 6:
+        return int(code)
+    digits = code.strip().replace(" ", "").split("-", 1)[0]
+    if len(digits) not in (5, 6) or not digits.isdigit():
+        return None
+    return int(digits)
+
+
+def build_index(csv_path: Path = REGIONS_CSV, index_path: Path = REGIONS_INDEX) -> int:
+    """
+    Compile the prefix ranges in `csv_path` into the binary index read by
+    PostalIndex: sorted uint32 range starts, uint32 range ends, uint16
+    region ids, then the region table as JSON. Ranges must not overlap.
+    Returns the number of ranges written.
+    """
+    rows = []
+    regions: List[tuple] = []
+    region_ids = {}
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(line for line in f if not line.startswith("#")):
+            width = CODE_DIGITS[row["country"]]
+            first, last = row["first"], row["last"]
+            start = int(first.ljust(width, "0"))
+            end = int(last.ljust(width, "9"))
+            region = (row["country"], row["region"], row["district"] or None)
+            if region not in region_ids:
+                region_ids[region] = len(regions)
+                regions.append(region)
+            rows.append((start, end, region_ids[region]))
+
+    rows.sort()
+    for (_, prev_end, _), (start, _, _) in zip(rows, rows[1:]):
+        if start <= prev_end:
+            raise ValueError(f"Overlapping postal ranges at {start}")
+
+    count = len(rows)
+    table = json.dumps(regions).encode("utf-8")
+    body = struct.pack(f"<{count}I", *(r[0] for r in rows))
+    body += struct.pack(f"<{count}I", *(r[1] for r in rows))
+    body += struct.pack(f"<{count}H", *(r[2] for r in rows))
+    offset = _HEADER.size + len(body)
+    with open(index_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, count, offset, len(table)))
+        f.write(body)
+        f.write(table)
+    return count
+
+
+class PostalIndex:
+    """
+    Read-only, memory-mapped postal code -> Region index. Lookups bisect
+    the mapped range starts directly, so nothing but the small region
+    table is copied into the process.
+    """
+
+    def __init__(self, path: Path = REGIONS_INDEX):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, offset, length = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a postal region index")
+        view = memoryview(self._mm)
+        starts_at = _HEADER.size
+        self._starts = view[starts_at:starts_at + 4 * count].cast("I")
+        self._ends = view[starts_at + 4 * count:starts_at + 8 * count].cast("I")
+        self._region_ids = view[starts_at + 8 * count:starts_at + 10 * count].cast("H")
+        self.regions = [Region(*r) for r in json.loads(bytes(self._mm[offset:offset + length]))]
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def lookup_key(self, key: int) -> Optional[Region]:
+        i = bisect_right(self._starts, key) - 1
+        if i < 0 or key > self._ends[i]:
+            return None
+        return self.regions[self._region_ids[i]]
+
+    def lookup(self, code: str) -> Optional[Region]:
+        key = postal_key(code)
+        return None if key is None else self.lookup_key(key)
+
+
+_index: Optional[PostalIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_postal_index() -> PostalIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = PostalIndex()
+    return _index
+
+
+def resolve_region(zip_code: str) -> Optional[str]:
+    """
+    State/territory code (e.g. "US-CA", "IN-KA") for a ZIP or PIN code,
+    or None when the code is malformed or not covered.
+    """
+    region = get_postal_index().lookup(zip_code)
+    return region.state if region else None
+
+
+if __name__ == "__main__":
+    written = build_index()
+    print(f"Wrote {written} postal ranges to {REGIONS_INDEX}")
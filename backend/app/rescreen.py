@@ -0,0 +1,201 @@
+# backend/app/rescreen.py
+"""
+Offline re-screening across a process pool.
+
+The catalog source (benefits and rule spec) and the income tables are
+sent to each worker once, through the pool initializer. For stored
+submissions the parent only hands out id ranges: each worker reads its
+shard from the database, scores it and returns its NDJSON output as
+bytes, so the parent does O(1) work per chunk and throughput scales with
+the number of workers. At most `max_in_flight` chunks are queued or
+running at a time, and output is written in id order.
+
+    cd backend && python -m app.rescreen [--workers N] [--output results.ndjson]
+"""
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from typing import BinaryIO, Callable, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from app.models import Benefit, QuestionnaireRequest, EligibilitySubmission
+from app.eligibility import COMPILED_CATALOG, MAX_RESULTS, RULE_SPEC
+from app.batch import columns_from_questionnaires, evaluate_batch
+from app.benefits_data import get_all_benefits
+from app.income_tables import IncomeTables, get_income_tables
+from app.database import get_engine
+from app.rules import CompiledCatalog, catalog_fingerprint, compile_catalog
+
+# rows per task: large enough that scheduling is noise next to
+# evaluate_batch, small enough to keep per-worker memory modest
+RESCREEN_CHUNK_SIZE = 4096
+
+# (benefit id, confidence) best first; None when the row failed validation
+Screening = Optional[List[Tuple[str, float]]]
+
+_catalog: Optional[CompiledCatalog] = None
+_tables: Optional[IncomeTables] = None
+_limit = MAX_RESULTS
+_engine = None
+
+
+def _init_worker(
+    benefits: Tuple[Benefit, ...], spec: dict, tables: IncomeTables, limit: int, database_url: Optional[str]
+):
+    global _catalog, _tables, _limit, _engine
+    # compiled closures do not pickle, so workers get the source; a forked
+    # or freshly imported worker usually has it compiled already, which the
+    # fingerprint of the source shows without compiling it again
+    if catalog_fingerprint(benefits, spec) == COMPILED_CATALOG.fingerprint:
+        _catalog = COMPILED_CATALOG
+    else:
+        _catalog = compile_catalog(benefits, spec)
+    _tables = tables
+    _limit = limit
+    # the worker's own engine from the registry; app.database resets
+    # engines inherited through fork, so no connection crosses processes
+    _engine = get_engine(database_url) if database_url else None
+
+
+def screen_rows(rows: Sequence[dict]) -> List[Screening]:
+    """
+    Validate and score one chunk of questionnaire dicts in the worker's catalog.
+    """
+    questionnaires, valid = [], []
+    for i, row in enumerate(rows):
+        try:
+            questionnaires.append(QuestionnaireRequest.model_validate(row))
+            valid.append(i)
+        except ValidationError:
+            pass
+    results: List[Screening] = [None] * len(rows)
+    if questionnaires:
+        batch = evaluate_batch(
+            **columns_from_questionnaires(questionnaires), catalog=_catalog, tables=_tables, dtype=np.float64
+        )
+        for row, i in enumerate(valid):
+            results[i] = [(b.benefit.id, b.confidence_score) for b in batch.top_benefits(row, _limit)]
+    return results
+
+
+def screening_line(key: Hashable, screening: Screening) -> str:
+    eligible = None if screening is None else [{"id": b, "confidence_score": c} for b, c in screening]
+    return json.dumps({"id": key, "eligible_benefits": eligible}) + "\n"
+
+
+def screen_id_range(first: int, last: int) -> bytes:
+    """
+    Score the stored submissions with first <= id < last, as NDJSON.
+    """
+    query = (
+        select(EligibilitySubmission.id, EligibilitySubmission.submission_data)
+        .where(EligibilitySubmission.id >= first, EligibilitySubmission.id < last)
+        .order_by(EligibilitySubmission.id)
+    )
+    with _engine.connect() as conn:
+        rows = conn.execute(query).all()
+    screenings = screen_rows([data for _, data in rows])
+    return "".join(screening_line(key, s) for (key, _), s in zip(rows, screenings)).encode("utf-8")
+
+
+def _ordered(pool: Executor, tasks: Iterable[Tuple[object, Callable, tuple]], max_in_flight: int) -> Iterator:
+    """
+    (tag, result) for each (tag, fn, args) task, in submission order,
+    keeping at most `max_in_flight` tasks queued or running. `tasks` is
+    read lazily.
+    """
+    pending = deque()
+    for tag, fn, args in tasks:
+        if len(pending) >= max_in_flight:
+            tag_done, future = pending.popleft()
+            yield tag_done, future.result()
+        pending.append((tag, pool.submit(fn, *args)))
+    while pending:
+        tag_done, future = pending.popleft()
+        yield tag_done, future.result()
+
+
+def _pool(workers: int, limit: int, database_url: Optional[str] = None) -> ProcessPoolExecutor:
+    initargs = (get_all_benefits(), RULE_SPEC, get_income_tables(), limit, database_url)
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs)
+
+
+def rescreen(
+    items: Iterable[Tuple[Hashable, dict]],
+    workers: Optional[int] = None,
+    chunk_size: int = RESCREEN_CHUNK_SIZE,
+    max_in_flight: Optional[int] = None,
+    limit: int = MAX_RESULTS,
+) -> Iterator[Tuple[Hashable, Screening]]:
+    """
+    Score (key, questionnaire dict) pairs across `workers` processes
+    (default: all cores) and yield (key, screening) in input order. The
+    input is read lazily, so memory is bounded by `max_in_flight` chunks
+    (default: two per worker). The rows themselves pass through this
+    process; rescreen_submissions avoids that for stored submissions.
+    """
+    workers = workers or os.cpu_count() or 1
+    items = iter(items)
+    chunks = iter(lambda: list(islice(items, chunk_size)), [])
+    tasks = (([key for key, _ in chunk], screen_rows, ([row for _, row in chunk],)) for chunk in chunks)
+    with _pool(workers, limit) as pool:
+        for keys, screenings in _ordered(pool, tasks, max_in_flight or 2 * workers):
+            yield from zip(keys, screenings)
+
+
+def rescreen_submissions(
+    database_url: str,
+    output: BinaryIO,
+    workers: Optional[int] = None,
+    chunk_size: int = RESCREEN_CHUNK_SIZE,
+    max_in_flight: Optional[int] = None,
+    limit: int = MAX_RESULTS,
+) -> int:
+    """
+    Re-screen every stored submission, sharded into id ranges of
+    `chunk_size`, writing one NDJSON line per submission to `output` in id
+    order. Returns the number of submissions written.
+    """
+    workers = workers or os.cpu_count() or 1
+    with get_engine(database_url).connect() as conn:
+        first, last = conn.execute(
+            select(func.min(EligibilitySubmission.id), func.max(EligibilitySubmission.id))
+        ).one()
+    if first is None:
+        return 0
+
+    tasks = ((None, screen_id_range, (lo, lo + chunk_size)) for lo in range(first, last + 1, chunk_size))
+    written = 0
+    with _pool(workers, limit, database_url) as pool:
+        for _, lines in _ordered(pool, tasks, max_in_flight or 2 * workers):
+            output.write(lines)
+            written += lines.count(b"\n")
+    return written
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser(description="Re-screen every stored submission against the current catalog.")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=RESCREEN_CHUNK_SIZE)
+    parser.add_argument("--output", default="-", help="NDJSON output path, - for stdout")
+    args = parser.parse_args(argv)
+
+    from app.database import DATABASE_URL
+
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        written = rescreen_submissions(DATABASE_URL, out, args.workers, args.chunk_size)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(f"Re-screened {written} submissions", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,85 @@
+# backend/app/responses.py
+"""
+Eligibility responses written straight to JSON bytes. A benefit's static
+fields never change, so each catalog entry is encoded once into the bytes
+before and after its confidence score; a response only splices in the
+scores. The output is byte-for-byte what EligibilityResponse.model_dump_json()
+would produce.
+"""
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.models import Benefit, EligibilityExplanation, QuestionnaireRequest
+from app.eligibility import ScoredBenefit
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - the standard library is only slower
+    orjson = None
+
+
+def dumps(obj) -> bytes:
+    """
+    Compact JSON with non-ASCII characters kept, as pydantic writes it.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+# benefit id -> (catalog entry, bytes before the score, bytes after it)
+_FRAGMENTS: Dict[str, Tuple[Benefit, bytes, bytes]] = {}
+
+
+def benefit_fragments(benefit: Benefit) -> Tuple[bytes, bytes]:
+    """
+    The benefit's JSON object split around its confidence score, encoded
+    on first use. Entries are checked by identity, so a reloaded catalog
+    re-encodes its benefits.
+    """
+    entry = _FRAGMENTS.get(benefit.id)
+    if entry is None or entry[0] is not benefit:
+        head: List[bytes] = []
+        tail: List[bytes] = []
+        part = head
+        for name, value in benefit.model_dump(mode="json").items():
+            if name == "confidence_score":
+                part = tail
+            else:
+                part.append(dumps(name) + b":" + dumps(value))
+        entry = (
+            benefit,
+            b"{" + b"".join(p + b"," for p in head) + b'"confidence_score":',
+            b"".join(b"," + p for p in tail) + b"}",
+        )
+        _FRAGMENTS[benefit.id] = entry
+    return entry[1], entry[2]
+
+
+def encode_benefits(scored: Iterable[ScoredBenefit]) -> bytes:
+    parts = []
+    for s in scored:
+        head, tail = benefit_fragments(s.benefit)
+        parts.append(head + repr(float(s.confidence_score)).encode() + tail)
+    return b"[" + b",".join(parts) + b"]"
+
+
+def encode_eligibility_response(
+    scored: List[ScoredBenefit],
+    questionnaire: QuestionnaireRequest,
+    explanation: Optional[EligibilityExplanation] = None,
+) -> bytes:
+    """
+    EligibilityResponse(eligible_benefits=..., user_data=questionnaire,
+    explanation=...) as JSON, without building the Benefit copies.
+    """
+    return b"".join((
+        b'{"eligible_benefits":',
+        encode_benefits(scored),
+        b',"user_data":',
+        # straight to bytes, skipping model_dump_json's str round trip
+        questionnaire.__pydantic_serializer__.to_json(questionnaire),
+        b',"explanation":',
+        explanation.model_dump_json().encode("utf-8") if explanation is not None else b"null",
+        b"}",
+    ))
+
@@ -0,0 +1,319 @@
+# backend/app/rule_dsl.py
+"""
+A small expression language for eligibility rules, e.g.
+
+    when:  "has_children and fpl_ratio < 1.0"
+    score: "min(85, max(0, 90 - fpl_ratio * 50))"
+
+Expressions use Python syntax restricted to numbers, booleans, the
+variables in VARIABLES, arithmetic (+ - * /), comparisons, and/or/not,
+`a if cond else b` and min()/max(). Each rule is parsed once and compiled
+with ast/compile into a scalar function for single requests and NumPy
+functions for the batch engine. Division by zero gives inf/nan in both,
+as NumPy does. With RULE_CACHE_DIR set, the code objects are marshalled
+to an on-disk cache keyed by the rule's hash, so later processes skip
+parsing; cached code is executed, so the directory and its files must be
+owned by this user and writable by no one else.
+"""
+import ast
+import copy
+import hashlib
+import importlib.util
+import json
+import marshal
+import math
+import os
+import stat
+import types
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+from app.config import settings
+from app.income_tables import household_members
+
+# Bump when the generated code changes shape, to orphan old cache entries
+DSL_VERSION = 2
+
+# Computed per request and passed as arguments
+DERIVED = ("fpl_ratio", "smi_ratio", "household_size")
+# Read from the questionnaire
+FIELDS = ("age", "annual_income", "has_children", "is_veteran", "is_disabled")
+VARIABLES = DERIVED + FIELDS
+
+_FUNCTIONS = {"min": "minimum", "max": "maximum"}
+_BIN_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div)
+_CMP_OPS = (ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq)
+_UNARY_OPS = (ast.Not, ast.USub, ast.UAdd)
+
+# Operators are separate nodes in the tree, so allowing these containers
+# still rejects e.g. `**` or `in` when the walk reaches the operator
+_STRUCTURAL = (
+    (ast.Expression, ast.Load, ast.BoolOp, ast.And, ast.Or, ast.BinOp, ast.UnaryOp, ast.Compare, ast.IfExp)
+    + _BIN_OPS + _CMP_OPS + _UNARY_OPS
+)
+
+
+class RuleSyntaxError(ValueError):
+    pass
+
+
+def _validate(node: ast.AST, source: str):
+    for child in ast.walk(node):
+        if isinstance(child, _STRUCTURAL):
+            continue
+        if isinstance(child, ast.Constant) and type(child.value) in (int, float, bool):
+            continue
+        if isinstance(child, ast.Name) and (child.id in VARIABLES or child.id in _FUNCTIONS):
+            continue
+        if (
+            isinstance(child, ast.Call)
+            and isinstance(child.func, ast.Name)
+            and child.func.id in _FUNCTIONS
+            and child.args
+            and not child.keywords
+        ):
+            continue
+        raise RuleSyntaxError(f"Unsupported syntax {type(child).__name__} in rule expression {source!r}")
+
+
+def parse_expression(source: str) -> ast.expr:
+    try:
+        tree = ast.parse(source.strip(), mode="eval")
+    except SyntaxError as e:
+        raise RuleSyntaxError(f"Invalid rule expression {source!r}: {e.msg}") from None
+    _validate(tree, source)
+    return tree.body
+
+
+def _divide(a, b):
+    """
+    a / b, with NumPy's results for a zero divisor (inf signed by the
+    operands, nan for 0 / 0) instead of ZeroDivisionError.
+    """
+    try:
+        return a / b
+    except ZeroDivisionError:
+        if a == 0 or math.isnan(a):
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+
+def _vector_divide(np, a, b):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.true_divide(a, b)
+
+
+def _divide_call(name: str, node: ast.BinOp, *args: ast.expr) -> ast.expr:
+    call = ast.Call(ast.Name(name, ast.Load()), [*args, node.left, node.right], [])
+    return ast.copy_location(call, node)
+
+
+class _ScalarTransformer(ast.NodeTransformer):
+    """
+    Questionnaire fields become attribute reads on `q`; derived values are
+    already function arguments. Integer literals become floats so scores
+    are always floats, and division goes through _divide.
+    """
+
+    def visit_BinOp(self, node: ast.BinOp):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Div):
+            return _divide_call("_divide", node)
+        return node
+
+    def visit_Name(self, node: ast.Name):
+        if node.id in FIELDS:
+            return ast.copy_location(ast.Attribute(ast.Name("q", ast.Load()), node.id, ast.Load()), node)
+        return node
+
+    def visit_Constant(self, node: ast.Constant):
+        if type(node.value) is int:
+            return ast.copy_location(ast.Constant(float(node.value)), node)
+        return node
+
+
+def _np_call(name: str, *args: ast.expr) -> ast.expr:
+    return ast.Call(ast.Attribute(ast.Name("np", ast.Load()), name, ast.Load()), list(args), [])
+
+
+def _reduce(name: str, args) -> ast.expr:
+    result = args[0]
+    for arg in args[1:]:
+        result = _np_call(name, result, arg)
+    return result
+
+
+class _VectorTransformer(ast.NodeTransformer):
+    """
+    Variables become columns of `cols` and control flow becomes
+    element-wise NumPy operations.
+    """
+
+    def visit_Name(self, node: ast.Name):
+        return ast.copy_location(
+            ast.Subscript(ast.Name("cols", ast.Load()), ast.Constant(node.id), ast.Load()), node
+        )
+
+    def visit_BinOp(self, node: ast.BinOp):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Div):
+            return _divide_call("_vector_divide", node, ast.Name("np", ast.Load()))
+        return node
+
+    def visit_BoolOp(self, node: ast.BoolOp):
+        self.generic_visit(node)
+        name = "logical_and" if isinstance(node.op, ast.And) else "logical_or"
+        return ast.copy_location(_reduce(name, node.values), node)
+
+    def visit_UnaryOp(self, node: ast.UnaryOp):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return ast.copy_location(_np_call("logical_not", node.operand), node)
+        return node
+
+    def visit_Compare(self, node: ast.Compare):
+        self.generic_visit(node)
+        operands = [node.left] + node.comparators
+        pairs = [ast.Compare(left, [op], [right]) for left, op, right in zip(operands, node.ops, operands[1:])]
+        return ast.copy_location(_reduce("logical_and", pairs), node)
+
+    def visit_IfExp(self, node: ast.IfExp):
+        self.generic_visit(node)
+        return ast.copy_location(_np_call("where", node.test, node.body, node.orelse), node)
+
+    def visit_Call(self, node: ast.Call):
+        args = [self.visit(arg) for arg in node.args]
+        return ast.copy_location(_reduce(_FUNCTIONS[node.func.id], args), node)
+
+
+def _scalar_source(when: Optional[ast.expr], score: ast.expr, boosts: Tuple[Tuple[str, float], ...]) -> str:
+    """
+    One function per rule: defaults, condition, score and boosts inline,
+    so scoring a rule is a single call.
+    """
+    names = {
+        node.id for expr in (when, score) if expr is not None for node in ast.walk(expr) if isinstance(node, ast.Name)
+    }
+    lines = ["def score(q, fpl_ratio, smi_ratio=None, household_size=None):"]
+    if "smi_ratio" in names:
+        # an unknown state median income passes, as with max_smi_ratio
+        lines.append("    if smi_ratio is None: smi_ratio = 0.0")
+    if "household_size" in names:
+        lines.append("    if household_size is None: household_size = household_members(q)")
+    if when is not None:
+        lines.append(f"    if not ({ast.unparse(_ScalarTransformer().visit(when))}): return 0.0")
+    lines.append(f"    confidence = {ast.unparse(_ScalarTransformer().visit(score))}")
+    for field, boost in boosts:
+        lines.append(f"    if q.{field}: confidence = min(100.0, confidence + {boost!r})")
+    lines.append("    return confidence")
+    return "\n".join(lines)
+
+
+def _vector_function(name: str, body: ast.expr) -> ast.FunctionDef:
+    func = ast.parse(f"def {name}(cols, np):\n    return None").body[0]
+    func.body[0].value = _VectorTransformer().visit(body)
+    return func
+
+
+def compile_rule_source(
+    when: Optional[str], score: str, boosts: Tuple[Tuple[str, float], ...] = (), name: str = "<rule>"
+):
+    """
+    Module code object defining `score` (scalar, boosts included) and
+    `when_vector`/`score_vector` (NumPy, boosts left to the caller).
+    """
+    when_expr = parse_expression(when) if when else None
+    score_expr = parse_expression(score)
+
+    module = ast.parse(_scalar_source(copy.deepcopy(when_expr), copy.deepcopy(score_expr), boosts))
+    module.body.append(_vector_function("when_vector", when_expr or ast.Constant(True)))
+    module.body.append(_vector_function("score_vector", score_expr))
+    return compile(ast.fix_missing_locations(module), name, "exec")
+
+
+def default_cache_dir() -> Optional[Path]:
+    """
+    RULE_CACHE_DIR, or None (no disk cache) when it is not set. There is
+    deliberately no shared default such as a directory in /tmp, where
+    another user could plant code for the server to run.
+    """
+    return Path(settings.RULE_CACHE_DIR) if settings.RULE_CACHE_DIR else None
+
+
+def _private(path: Path) -> bool:
+    """
+    Whether `path` is owned by this process's user and not writable by
+    group or others, so no one else can have put code there.
+    """
+    if not hasattr(os, "getuid"):
+        return True
+    info = path.stat()
+    return info.st_uid == os.getuid() and not info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def rule_hash(when: Optional[str], score: str, boosts: Tuple[Tuple[str, float], ...] = ()) -> str:
+    payload = json.dumps([DSL_VERSION, importlib.util.MAGIC_NUMBER.hex(), when, score, boosts])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DslRule:
+    """
+    A compiled rule. `score(q, fpl_ratio, smi_ratio=None, household_size=None)`
+    returns the boosted confidence, 0.0 when the condition fails; the vector
+    functions take a dict of column arrays and the numpy module.
+    """
+
+    def __init__(self, when_source: Optional[str], score_source: str, code):
+        self.when_source = when_source
+        self.score_source = score_source
+        namespace = {"household_members": household_members, "_divide": _divide, "_vector_divide": _vector_divide}
+        exec(code, namespace)
+        self.score: Callable[..., float] = namespace["score"]
+        self.when_vector: Callable = namespace["when_vector"]
+        self.score_vector: Callable = namespace["score_vector"]
+        # every variable is a cols["..."] subscript in the vector functions
+        self.variables = frozenset(
+            const
+            for func in (self.when_vector, self.score_vector)
+            for const in func.__code__.co_consts
+            if const in VARIABLES
+        )
+
+
+def load_dsl_rule(
+    when: Optional[str],
+    score: str,
+    boosts: Tuple[Tuple[str, float], ...] = (),
+    cache_dir: Optional[Path] = None,
+) -> DslRule:
+    """
+    Compile a rule, reusing the marshalled code object from the on-disk
+    cache when this exact rule was compiled before. Without a cache
+    directory the rule is compiled in memory. Entries are only loaded from
+    a private directory (created with mode 0700) and only when the file is
+    private too. Cache write failures (e.g. a read-only filesystem) only
+    cost the reuse.
+    """
+    cache_dir = cache_dir or default_cache_dir()
+    digest = rule_hash(when, score, boosts)
+    name = f"<rule {digest[:12]}>"
+    if cache_dir is None:
+        return DslRule(when, score, compile_rule_source(when, score, boosts, name=name))
+    path = cache_dir / f"{digest}.bin"
+    try:
+        if not (_private(cache_dir) and _private(path)):
+            raise ValueError(f"{path} is not private to this user")
+        code = marshal.loads(path.read_bytes())
+        if not isinstance(code, types.CodeType):
+            raise ValueError(f"{path} is not a compiled rule")
+    except (OSError, ValueError, EOFError, TypeError):
+        code = compile_rule_source(when, score, boosts, name=name)
+        try:
+            cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+            if _private(cache_dir):
+                tmp = path.with_suffix(f".{os.getpid()}.tmp")
+                tmp.write_bytes(marshal.dumps(code))
+                os.chmod(tmp, 0o600)
+                os.replace(tmp, path)
+        except OSError:
+            pass
+    return DslRule(when, score, code)
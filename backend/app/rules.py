@@ -0,0 +1,405 @@
+# backend/app/rules.py
+import hashlib
+import json
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple
+from app.models import QuestionnaireRequest, Benefit, Gender, SocialCategory, Occupation
+from app.rule_dsl import DslRule, load_dsl_rule
+
+RULES_PATH = Path(__file__).resolve().parent.parent / "resources" / "eligibility_rules.json"
+
+# Questionnaire flags a rule may require or boost on
+BOOLEAN_FIELDS = ("has_children", "is_veteran", "is_disabled")
+
+# Categorical questionnaire fields a rule may restrict to some values
+MATCH_FIELDS = {"gender": Gender, "social_category": SocialCategory, "occupation": Occupation}
+
+# Questionnaire fields behind the FPL and SMI ratios (the zip code picks
+# the regional thresholds)
+INCOME_FIELDS = ("annual_income", "household_size", "household_members", "zip_code")
+# ... and behind each derived DSL variable
+DERIVED_FIELDS = {
+    "fpl_ratio": INCOME_FIELDS,
+    "smi_ratio": INCOME_FIELDS,
+    "household_size": ("household_size", "household_members"),
+}
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """
+    A catalog entry with its eligibility rule compiled into closures.
+    `position` is the benefit's index in the catalog and breaks score ties.
+    Rules written as DSL expressions keep them in `dsl`; their base, slope
+    and cap are unused and their max_score is unbounded.
+    """
+    benefit: Benefit
+    position: int
+    max_fpl_ratio: float
+    # income / state median income must stay below this; inf when ungated
+    max_smi_ratio: float
+    requires: Tuple[str, ...]
+    # state/region codes the program is limited to; empty means national
+    regions: Tuple[str, ...]
+    base: float
+    slope: float
+    cap: float
+    boosts: Tuple[Tuple[str, float], ...]
+    # upper bound on the confidence this rule can produce
+    max_score: float
+    applies: Callable[[QuestionnaireRequest], bool]
+    # (questionnaire, fpl ratio, smi ratio or None, household size or None)
+    score: Callable[..., float]
+    dsl: Optional[DslRule] = None
+    # questionnaire fields the gates and score read
+    fields: FrozenSet[str] = frozenset()
+    # (field, accepted values) for MATCH_FIELDS the rule restricts
+    match: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()
+    # inclusive age range and annual income ceiling, in absolute terms
+    min_age: float = float("-inf")
+    max_age: float = float("inf")
+    max_income: float = float("inf")
+
+    @property
+    def linear(self) -> bool:
+        """
+        Whether the score is the clamped linear formula in the FPL ratio.
+        """
+        return self.dsl is None
+
+    @property
+    def tabulated(self) -> bool:
+        """
+        Whether breakpoint tables, which only know the flags, region and
+        income ratios, can precompute this rule.
+        """
+        return (
+            self.linear
+            and not self.match
+            and self.min_age == float("-inf")
+            and self.max_age == float("inf")
+            and self.max_income == float("inf")
+        )
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """
+    Indices of the set bits of `mask`, lowest first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class CompiledCatalog:
+    """
+    Compiled rules ordered by their FPL ratio limit, so the rules that can
+    fire for a given ratio are a suffix found with one bisect.
+
+    Hard constraints are also indexed as posting lists, stored as int
+    bitsets over that order: the rules each False flag still allows, the
+    rules of each region and those accepting each categorical value.
+    Limits (SMI ratio, age, absolute income) are sorted with prefix masks
+    of the rules failing below each. Candidates for a questionnaire are the
+    intersection of the lists that apply.
+    """
+
+    def __init__(self, rules: Sequence[CompiledRule], version: int = 0, fingerprint: str = ""):
+        self.rules: List[CompiledRule] = sorted(rules, key=lambda r: r.max_fpl_ratio)
+        self.ratio_limits: List[float] = [r.max_fpl_ratio for r in self.rules]
+        # best possible score first, for early-exit top-k selection
+        self.by_max_score: List[CompiledRule] = sorted(rules, key=lambda r: (-r.max_score, r.position))
+        self.tabulated_rules: List[CompiledRule] = [r for r in self.rules if r.tabulated]
+        self.dsl_rules: List[CompiledRule] = [r for r in self.rules if not r.linear]
+        self.version = version
+        # content hash of the rules and catalog, changes on any edit
+        self.fingerprint = fingerprint
+        # column layout for app.batch, built by its first evaluation
+        self.batch_arrays = None
+
+        # bit of each rule in the posting lists, by catalog position
+        self.slots: Dict[int, int] = {r.position: i for i, r in enumerate(self.rules)}
+        self._all = (1 << len(self.rules)) - 1
+        self._without: Dict[str, int] = {field: 0 for field in BOOLEAN_FIELDS}
+        self._national = 0
+        self._direct = 0
+        self._regions: Dict[str, int] = {}
+        self._reads: Dict[str, int] = {}
+        # only fields some rule restricts: rules accepting each value, and
+        # rules that do not restrict the field
+        restricted = {field for rule in self.rules for field, _ in rule.match}
+        self._accepts: Dict[str, Dict[str, int]] = {field: {} for field in restricted}
+        self._unrestricted: Dict[str, int] = {field: 0 for field in restricted}
+        for i, rule in enumerate(self.rules):
+            bit = 1 << i
+            for field in rule.fields:
+                self._reads[field] = self._reads.get(field, 0) | bit
+            for field in BOOLEAN_FIELDS:
+                if field not in rule.requires:
+                    self._without[field] |= bit
+            accepted = dict(rule.match)
+            for field, accepts in self._accepts.items():
+                if field not in accepted:
+                    self._unrestricted[field] |= bit
+                for value in accepted.get(field, ()):
+                    accepts[value] = accepts.get(value, 0) | bit
+            if not rule.tabulated:
+                self._direct |= bit
+            if not rule.regions:
+                self._national |= bit
+            for region in rule.regions:
+                self._regions[region] = self._regions.get(region, 0) | bit
+
+        # SMI-gated rules by limit; _smi_failing[i] has the bits of the
+        # first i of them, which all fail for a ratio >= their limits
+        smi_gated = sorted((r for r in self.rules if r.max_smi_ratio != float("inf")), key=lambda r: r.max_smi_ratio)
+        self.smi_limits: List[float] = [r.max_smi_ratio for r in smi_gated]
+        self._smi_failing: List[int] = [0]
+        for rule in smi_gated:
+            self._smi_failing.append(self._smi_failing[-1] | (1 << self.slots[rule.position]))
+
+        # inclusive ceilings; a minimum age is a ceiling on -age
+        self._ceilings = [
+            ("age", 1.0, self._ceiling_masks(lambda r: r.max_age)),
+            ("age", -1.0, self._ceiling_masks(lambda r: -r.min_age)),
+            ("annual_income", 1.0, self._ceiling_masks(lambda r: r.max_income)),
+        ]
+        self._ceilings = [c for c in self._ceilings if c[2][0]]
+
+    def _ceiling_masks(self, limit_of: Callable[[CompiledRule], float]) -> Tuple[List[float], List[int]]:
+        """
+        Finite limits in ascending order, and masks where masks[i] holds the
+        bits of the first i rules, which all fail for a value above their limits.
+        """
+        gated = sorted((r for r in self.rules if limit_of(r) != float("inf")), key=limit_of)
+        masks = [0]
+        for rule in gated:
+            masks.append(masks[-1] | (1 << self.slots[rule.position]))
+        return [limit_of(r) for r in gated], masks
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def candidate_mask(
+        self,
+        income_to_fpl_ratio: float,
+        questionnaire: Optional[QuestionnaireRequest] = None,
+        region: Optional[str] = None,
+        income_to_smi_ratio: Optional[float] = None,
+    ) -> int:
+        """
+        Bitset of rules whose hard constraints pass: the income gates, the
+        questionnaire gates (flags, categorical matches, age and absolute
+        income, when a questionnaire is given) and the region (when known).
+        SMI gates are skipped when the ratio is unknown. A categorical field
+        left unset only passes rules that do not restrict it.
+        """
+        mask = self._all & ~((1 << bisect_right(self.ratio_limits, income_to_fpl_ratio)) - 1)
+        if questionnaire is not None:
+            for field in BOOLEAN_FIELDS:
+                if not getattr(questionnaire, field):
+                    mask &= self._without[field]
+            for field, accepts in self._accepts.items():
+                value = getattr(questionnaire, field)
+                allowed = self._unrestricted[field]
+                if value is not None:
+                    allowed |= accepts.get(value.value, 0)
+                mask &= allowed
+            for field, sign, (limits, failing) in self._ceilings:
+                mask &= ~failing[bisect_left(limits, sign * getattr(questionnaire, field))]
+        if region is not None:
+            mask &= self._national | self._regions.get(region.upper(), 0)
+        if income_to_smi_ratio is not None and self.smi_limits:
+            mask &= ~self._smi_failing[bisect_right(self.smi_limits, income_to_smi_ratio)]
+        return mask
+
+    def dependents(self, fields: Iterable[str]) -> int:
+        """
+        Bitset of rules reading any of `fields`, i.e. those whose result
+        may change when they do.
+        """
+        mask = 0
+        for field in fields:
+            mask |= self._reads.get(field, 0)
+        return mask
+
+    def direct_candidates(
+        self,
+        income_to_fpl_ratio: float,
+        questionnaire: Optional[QuestionnaireRequest] = None,
+        region: Optional[str] = None,
+        income_to_smi_ratio: Optional[float] = None,
+    ) -> List[CompiledRule]:
+        """
+        The candidates() breakpoint tables do not cover (see
+        CompiledRule.tabulated); callers score these directly.
+        """
+        if not self._direct:
+            return []
+        mask = self.candidate_mask(income_to_fpl_ratio, questionnaire, region, income_to_smi_ratio) & self._direct
+        rules = self.rules
+        return [rules[i] for i in iter_bits(mask)]
+
+    def candidates(
+        self,
+        income_to_fpl_ratio: float,
+        questionnaire: Optional[QuestionnaireRequest] = None,
+        region: Optional[str] = None,
+        income_to_smi_ratio: Optional[float] = None,
+    ) -> List[CompiledRule]:
+        """
+        Rules whose hard constraints pass; with only a ratio, the rules
+        whose FPL income gate (ratio < max_fpl_ratio) passes.
+        """
+        if questionnaire is None and region is None and income_to_smi_ratio is None:
+            return self.rules[bisect_right(self.ratio_limits, income_to_fpl_ratio):]
+        mask = self.candidate_mask(income_to_fpl_ratio, questionnaire, region, income_to_smi_ratio)
+        rules = self.rules
+        return [rules[i] for i in iter_bits(mask)]
+
+
+def load_rule_spec(path: Path = RULES_PATH) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _compile_predicate(requires: Tuple[str, ...]) -> Callable[[QuestionnaireRequest], bool]:
+    if not requires:
+        return lambda q: True
+    if len(requires) == 1:
+        field = requires[0]
+        return lambda q: bool(getattr(q, field))
+    return lambda q: all(getattr(q, field) for field in requires)
+
+
+def _compile_score(
+    base: float, slope: float, cap: float, boosts: Tuple[Tuple[str, float], ...]
+) -> Callable[[QuestionnaireRequest, float], float]:
+    def score(q: QuestionnaireRequest, income_to_fpl_ratio: float, income_to_smi_ratio=None, size=None) -> float:
+        confidence = min(cap, max(0.0, base - (income_to_fpl_ratio * slope)))
+        for field, boost in boosts:
+            if getattr(q, field):
+                confidence = min(100.0, confidence + boost)
+        return confidence
+
+    return score
+
+
+def compile_rule(benefit: Benefit, position: int, rule: dict, boosts: Dict[str, float]) -> CompiledRule:
+    """
+    Compile one declarative rule, e.g.
+    {"max_fpl_ratio": 1.0, "requires": ["has_children"], "regions": ["US-CA"],
+     "score": {"base": 90.0, "slope": 50.0, "cap": 85.0}}
+    into a confidence of min(cap, max(0, base - ratio * slope)) plus boosts.
+    An optional "max_smi_ratio" also gates on income / state median income.
+
+    "score" may instead be a rule_dsl expression, with an optional "when"
+    condition, e.g. {"when": "age >= 60", "score": "min(90, 110 - fpl_ratio * 40)"};
+    the structured gates and boosts still apply around it.
+
+    Further gates: "match" restricts MATCH_FIELDS to some values, e.g.
+    {"gender": ["female"], "occupation": ["farmer", "fisherman"]};
+    "min_age"/"max_age" bound the age and "max_income" the annual income,
+    all inclusive.
+    """
+    requires = tuple(rule.get("requires", ()))
+    regions = tuple(region.upper() for region in rule.get("regions", ()))
+    boost_items = tuple((field, float(value)) for field, value in rule.get("boosts", boosts).items())
+    for field in requires + tuple(field for field, _ in boost_items):
+        if field not in BOOLEAN_FIELDS:
+            raise ValueError(f"Rule for '{benefit.id}' references unknown field '{field}'")
+
+    match = []
+    for field, values in sorted(rule.get("match", {}).items()):
+        if field not in MATCH_FIELDS:
+            raise ValueError(f"Rule for '{benefit.id}' matches on unknown field '{field}'")
+        allowed = {member.value for member in MATCH_FIELDS[field]}
+        unknown = sorted(set(values) - allowed)
+        if unknown:
+            raise ValueError(f"Rule for '{benefit.id}' matches unknown {field} values: {', '.join(unknown)}")
+        match.append((field, tuple(sorted(set(values)))))
+
+    max_fpl_ratio = float(rule.get("max_fpl_ratio", float("inf")))
+    max_smi_ratio = float(rule.get("max_smi_ratio", float("inf")))
+    min_age = float(rule.get("min_age", float("-inf")))
+    max_age = float(rule.get("max_age", float("inf")))
+    max_income = float(rule.get("max_income", float("inf")))
+    fields = set(requires) | {field for field, _ in boost_items} | {field for field, _ in match}
+    if regions:
+        fields.add("zip_code")
+    if min_age != float("-inf") or max_age != float("inf"):
+        fields.add("age")
+    if max_income != float("inf"):
+        fields.add("annual_income")
+
+    score = rule["score"]
+    dsl = None
+    if isinstance(score, str):
+        dsl = load_dsl_rule(rule.get("when"), score, boost_items)
+        base, slope, cap = 0.0, 0.0, float("inf")
+        max_score = float("inf")
+        for variable in dsl.variables:
+            fields.update(DERIVED_FIELDS.get(variable, (variable,)))
+        if max_fpl_ratio != float("inf") or max_smi_ratio != float("inf"):
+            fields.update(INCOME_FIELDS)
+    else:
+        base, slope, cap = float(score["base"]), float(score["slope"]), float(score.get("cap", 100.0))
+        boost_total = sum(value for _, value in boost_items if value > 0)
+        max_score = max(cap, min(100.0, cap + boost_total)) if boost_total else cap
+        fields.update(INCOME_FIELDS)
+
+    return CompiledRule(
+        benefit=benefit,
+        position=position,
+        max_fpl_ratio=max_fpl_ratio,
+        max_smi_ratio=max_smi_ratio,
+        requires=requires,
+        regions=regions,
+        base=base,
+        slope=slope,
+        cap=cap,
+        boosts=boost_items,
+        max_score=max_score,
+        applies=_compile_predicate(requires),
+        score=dsl.score if dsl else _compile_score(base, slope, cap, boost_items),
+        dsl=dsl,
+        fields=frozenset(fields),
+        match=tuple(match),
+        min_age=min_age,
+        max_age=max_age,
+        max_income=max_income,
+    )
+
+
+def catalog_fingerprint(benefits: Sequence[Benefit], spec: dict) -> str:
+    """
+    Digest of a catalog's source, the rule spec (with its version) and
+    the benefits; equal fingerprints compile to the same catalog.
+    """
+    digest = hashlib.sha1(json.dumps(spec, sort_keys=True).encode("utf-8"))
+    for benefit in benefits:
+        digest.update(benefit.model_dump_json().encode("utf-8"))
+    return digest.hexdigest()
+
+
+def compile_catalog(benefits: Sequence[Benefit], spec: dict) -> CompiledCatalog:
+    """
+    Attach compiled rules to catalog entries. Benefits without a rule are
+    never scored; rules for benefits missing from the catalog are an error.
+    """
+    rules = spec.get("rules", {})
+    boosts = spec.get("boosts", {})
+    known = {b.id for b in benefits}
+    unknown = sorted(set(rules) - known)
+    if unknown:
+        raise ValueError(f"Eligibility rules reference unknown benefits: {', '.join(unknown)}")
+
+    compiled = [
+        compile_rule(benefit, position, rules[benefit.id], boosts)
+        for position, benefit in enumerate(benefits)
+        if benefit.id in rules
+    ]
+    return CompiledCatalog(compiled, version=spec.get("version", 0), fingerprint=catalog_fingerprint(benefits, spec))
@@ -0,0 +1,104 @@
+# backend/app/sensitivity.py
+from typing import List, Optional, Tuple
+from app.models import QuestionnaireRequest, IncomeInterval, ConfidencePoint, ProgramSensitivity
+from app.breakpoints import rule_kinks
+from app.eligibility import COMPILED_CATALOG, MIN_CONFIDENCE, income_ratios
+from app.rules import CompiledRule
+from app.regions import resolve_region
+from app.income_tables import get_income_tables, household_members
+
+
+def _eligible_ratios(
+    rule: CompiledRule, questionnaire: QuestionnaireRequest, gate: float, kinks: List[float], min_confidence: float
+) -> Optional[Tuple[float, float]]:
+    """
+    The FPL-ratio interval [lo, hi) where the rule scores above the cutoff.
+    Between consecutive kinks the score is linear, so each segment is
+    entirely above or below; scores are monotone in the ratio, so the
+    qualifying segments are contiguous.
+    """
+    bounds = sorted({0.0, *(k for k in kinks if 0.0 < k < gate)})
+    bounds.append(gate)
+    qualifying = []
+    for lo, hi in zip(bounds, bounds[1:]):
+        probe = lo + 1.0 if hi == float("inf") else (lo + hi) / 2.0
+        if rule.score(questionnaire, probe) > min_confidence:
+            qualifying.append((lo, hi))
+    if not qualifying:
+        return None
+    return qualifying[0][0], qualifying[-1][1]
+
+
+def income_sensitivity(
+    questionnaire: QuestionnaireRequest, min_confidence: float = MIN_CONFIDENCE
+) -> List[ProgramSensitivity]:
+    """
+    For every program the household's flags and region allow: the income
+    interval where it qualifies and its confidence curve over income,
+    derived from the rule formulas rather than by re-scoring sampled
+    incomes. Household size, region and flags are held fixed.
+    """
+    region = resolve_region(questionnaire.zip_code)
+    tables = get_income_tables()
+    size = household_members(questionnaire)
+    fpl = tables.fpl_row(region)[size]
+    smi_row = tables.smi_row(region)
+    ratio, smi_ratio = income_ratios(questionnaire, region, tables)
+    income = questionnaire.annual_income
+
+    # every income gate open, so only flags, region, age and categorical
+    # matches constrain
+    at_zero = questionnaire.model_copy(update={"annual_income": 0.0})
+    allowed = COMPILED_CATALOG.candidate_mask(float("-inf"), at_zero, region)
+    current = COMPILED_CATALOG.candidate_mask(ratio, questionnaire, region, smi_ratio)
+
+    programs = []
+    for rule in sorted(COMPILED_CATALOG.rules, key=lambda r: r.position):
+        slot = COMPILED_CATALOG.slots[rule.position]
+        if not (allowed >> slot) & 1:
+            continue
+        confidence = rule.score(questionnaire, ratio, smi_ratio) if (current >> slot) & 1 else 0.0
+        current_confidence = round(confidence, 1) if confidence > min_confidence else 0.0
+
+        interval = None
+        curve: List[ConfidencePoint] = []
+        if rule.linear and fpl > 0:
+            # the SMI and absolute income gates in FPL-ratio terms, for this
+            # household; only the latter includes its limit
+            gate = rule.max_fpl_ratio
+            if smi_row and rule.max_smi_ratio != float("inf"):
+                gate = min(gate, rule.max_smi_ratio * smi_row[size] / fpl)
+            inclusive = rule.max_income != float("inf") and rule.max_income / fpl <= gate
+            gate = min(gate, rule.max_income / fpl)
+            applied = [b for f, b in rule.boosts if getattr(questionnaire, f)]
+            kinks = rule_kinks(rule, applied, min_confidence)
+            ratios = _eligible_ratios(rule, questionnaire, gate, kinks, min_confidence)
+            if ratios is not None:
+                lo, hi = ratios
+                interval = IncomeInterval(
+                    min_income=round(lo * fpl, 2),
+                    max_income=None if hi == float("inf") else round(hi * fpl, 2),
+                    max_inclusive=inclusive and hi == gate,
+                )
+                vertices = sorted({lo, *(k for k in kinks if lo < k < hi)} | ({hi} if hi != float("inf") else set()))
+                curve = [
+                    ConfidencePoint(
+                        annual_income=round(r * fpl, 2), confidence_score=round(rule.score(questionnaire, r), 1)
+                    )
+                    for r in vertices
+                ]
+
+        headroom = None
+        if interval is not None and current_confidence and interval.max_income is not None:
+            headroom = round(max(0.0, interval.max_income - income), 2)
+
+        programs.append(ProgramSensitivity(
+            benefit_id=rule.benefit.id,
+            name=rule.benefit.name,
+            analytic=rule.linear,
+            eligible_income=interval,
+            current_confidence=current_confidence,
+            income_headroom=headroom,
+            confidence_curve=curve,
+        ))
+    return programs
@@ -0,0 +1,115 @@
+# backend/app/sessions.py
+import heapq
+import secrets
+import threading
+from typing import Any, Dict, List, Optional
+from app.models import QuestionnaireRequest, QuestionnaireDelta
+from app.eligibility import (
+    COMPILED_CATALOG, MAX_RESULTS, MIN_CONFIDENCE, ScoredBenefit, cache_version, income_ratios, _rank_key
+)
+from app.cache import LRUCache
+from app.config import settings
+from app.regions import resolve_region
+from app.rules import INCOME_FIELDS, iter_bits
+from app.income_tables import get_income_tables
+
+REQUIRED_FIELDS = tuple(name for name, field in QuestionnaireRequest.model_fields.items() if field.is_required())
+
+_UNSET = object()
+
+
+class EligibilitySession:
+    """
+    Evaluation state for a questionnaire answered step by step: the answers
+    so far and every rule's last confidence (by catalog slot). Applying a
+    delta re-scores only the rules that read a changed field; a new catalog
+    or income table version re-scores everything.
+    """
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.answers: Dict[str, Any] = {}
+        self.version = None
+        # confidence by catalog slot, 0.0 where a hard constraint fails
+        self.scores: List[float] = [0.0] * len(COMPILED_CATALOG)
+        self.rescored = 0
+        self._context: Optional[tuple] = None
+        self._lock = threading.Lock()
+
+    def missing_fields(self) -> List[str]:
+        return [field for field in REQUIRED_FIELDS if self.answers.get(field) is None]
+
+    def apply(self, delta: QuestionnaireDelta):
+        """
+        Merge the fields set in `delta` and re-score the rules that depend
+        on those that changed.
+        """
+        answers = delta.model_dump(exclude_unset=True)
+        with self._lock:
+            changed = {field for field, value in answers.items() if self.answers.get(field, _UNSET) != value}
+            self.answers.update(answers)
+            self.rescored = 0
+            if self.missing_fields():
+                # changes made meanwhile are not tracked; start over when complete
+                self.version = None
+                return
+
+            tables = get_income_tables()
+            version = cache_version(tables)
+            if version != self.version:
+                self.version = version
+                self._context = None
+                dirty = (1 << len(COMPILED_CATALOG)) - 1
+            else:
+                dirty = COMPILED_CATALOG.dependents(changed)
+            if not dirty:
+                return
+
+            # every answer was validated as part of a QuestionnaireDelta
+            questionnaire = QuestionnaireRequest.model_construct(**self.answers)
+            if self._context is None or not changed.isdisjoint(INCOME_FIELDS):
+                region = resolve_region(questionnaire.zip_code)
+                self._context = (region,) + income_ratios(questionnaire, region, tables)
+            region, ratio, smi_ratio = self._context
+
+            mask = COMPILED_CATALOG.candidate_mask(ratio, questionnaire, region, smi_ratio)
+            rules = COMPILED_CATALOG.rules
+            for i in iter_bits(dirty):
+                self.scores[i] = rules[i].score(questionnaire, ratio, smi_ratio) if (mask >> i) & 1 else 0.0
+                self.rescored += 1
+
+    def results(self, limit: int = MAX_RESULTS, min_confidence: float = MIN_CONFIDENCE) -> List[ScoredBenefit]:
+        """
+        Top matches from the stored scores, ranked like score_eligibility.
+        """
+        with self._lock:
+            if self.missing_fields():
+                return []
+            rules = COMPILED_CATALOG.rules
+            scored = [(round(c, 1), rules[i]) for i, c in enumerate(self.scores) if c > min_confidence]
+        ranked = heapq.nsmallest(limit, scored, key=_rank_key)
+        return [ScoredBenefit(rule.benefit, confidence) for confidence, rule in ranked]
+
+
+SESSIONS = LRUCache(maxsize=settings.SESSION_MAX_COUNT, ttl=settings.SESSION_TTL)
+
+
+def create_session() -> EligibilitySession:
+    session = EligibilitySession(secrets.token_urlsafe(16))
+    SESSIONS.put(session.id, session)
+    return session
+
+
+def end_session(session_id: str) -> bool:
+    return SESSIONS.pop(session_id) is not None
+
+
+def get_session(session_id: str) -> Optional[EligibilitySession]:
+    """
+    The session, or None once it expired or was evicted. Each read
+    restarts its TTL.
+    """
+    session = SESSIONS.get(session_id)
+    if session is not None:
+        SESSIONS.put(session_id, session)
+    return session
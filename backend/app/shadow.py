@@ -0,0 +1,267 @@
+# backend/app/shadow.py
+"""
+Shadow evaluation: a sample of /api/eligibility requests is re-scored by
+an alternate engine on a background thread and compared with the answer
+the user got. Differences go to an NDJSON log and every comparison to
+counters (GET /api/eligibility/shadow), so a new engine can be measured
+on live traffic before it serves anyone.
+
+The request thread only samples and enqueues; when the queue is full the
+request is dropped from the sample rather than waiting. Latency is not
+taken from the request, whose answer may have come from the eligibility
+cache: the background thread times the primary engine uncached, back to
+back with the shadow engine, so the deltas compare engines alone.
+"""
+import heapq
+import json
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from app.models import QuestionnaireRequest
+from app.eligibility import (
+    MIN_CONFIDENCE, ScoredBenefit, _evaluate, _rank_key, _score_rules, income_ratios,
+)
+from app.batch import columns_from_questionnaires, evaluate_batch
+from app.config import settings
+from app.regions import resolve_region
+from app.income_tables import get_income_tables
+
+# an engine maps (questionnaire, limit, min_confidence) to ranked results, uncached
+Engine = Callable[[QuestionnaireRequest, int, float], List[ScoredBenefit]]
+
+# latency deltas kept for the percentiles in stats()
+LATENCY_WINDOW = 10000
+
+
+def _linear_engine(questionnaire: QuestionnaireRequest, limit: int, min_confidence: float) -> List[ScoredBenefit]:
+    # every candidate rule scored by its closure; no breakpoint tables
+    region = resolve_region(questionnaire.zip_code)
+    ratio, smi_ratio = income_ratios(questionnaire, region, get_income_tables())
+    scored = _score_rules(questionnaire, region, ratio, smi_ratio, min_confidence)
+    top = heapq.nsmallest(limit, scored, key=_rank_key)
+    return [ScoredBenefit(rule.benefit, confidence) for confidence, rule in top]
+
+
+def _early_exit_engine(questionnaire: QuestionnaireRequest, limit: int, min_confidence: float) -> List[ScoredBenefit]:
+    region = resolve_region(questionnaire.zip_code)
+    return _evaluate(questionnaire, region, get_income_tables(), limit, min_confidence, True)
+
+
+def _batch_engine(questionnaire: QuestionnaireRequest, limit: int, min_confidence: float) -> List[ScoredBenefit]:
+    # the vectorized engine gates at MIN_CONFIDENCE; a stricter threshold is
+    # applied to its unrounded scores, as score_eligibility does
+    result = evaluate_batch(**columns_from_questionnaires([questionnaire]), dtype=np.float64)
+    row = result.confidence[0]
+    row[row <= max(min_confidence, MIN_CONFIDENCE)] = 0.0
+    return result.top_benefits(0, limit)
+
+
+SHADOW_ENGINES: Dict[str, Engine] = {
+    "linear": _linear_engine,
+    "early_exit": _early_exit_engine,
+    "batch": _batch_engine,
+}
+
+
+def register_engine(name: str, engine: Engine):
+    """
+    Make `engine` available as settings.SHADOW_ENGINE = name.
+    """
+    SHADOW_ENGINES[name] = engine
+
+
+def diff_results(primary: List[ScoredBenefit], shadow: List[ScoredBenefit]) -> Optional[dict]:
+    """
+    How the shadow ranking differs from the primary one, or None when
+    they are identical (same benefits, order and scores).
+    """
+    expected = [(s.benefit.id, s.confidence_score) for s in primary]
+    actual = [(s.benefit.id, s.confidence_score) for s in shadow]
+    if expected == actual:
+        return None
+    expected_scores, actual_scores = dict(expected), dict(actual)
+    common = [b for b, _ in expected if b in actual_scores]
+    return {
+        "missing": [b for b, _ in expected if b not in actual_scores],
+        "extra": [b for b, _ in actual if b not in expected_scores],
+        "scores": {
+            b: [expected_scores[b], actual_scores[b]] for b in common if actual_scores[b] != expected_scores[b]
+        },
+        "order_changed": common != [b for b, _ in actual if b in expected_scores],
+    }
+
+
+class ShadowRunner:
+    """
+    Samples requests at `sample_rate` and compares `engine` against the
+    primary results on one daemon thread, fed by a bounded queue.
+    """
+
+    def __init__(
+        self,
+        engine_name: str,
+        sample_rate: float,
+        queue_size: int = 1000,
+        log_path: Optional[str] = None,
+        seed: Optional[int] = None,
+    ):
+        self.engine_name = engine_name
+        self.engine = SHADOW_ENGINES[engine_name]
+        self.sample_rate = sample_rate
+        self.log_path = log_path
+        self._random = random.Random(seed)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._deltas: deque = deque(maxlen=LATENCY_WINDOW)
+        self.sampled = 0
+        self.dropped = 0
+        self.compared = 0
+        self.mismatches = 0
+        self.errors = 0
+        self.primary_seconds = 0.0
+        self.shadow_seconds = 0.0
+
+    def submit(
+        self,
+        questionnaire: QuestionnaireRequest,
+        limit: int,
+        min_confidence: float,
+        primary: List[ScoredBenefit],
+        early_exit: bool = False,
+    ) -> bool:
+        """
+        Queue a served request for comparison if it is sampled. Never blocks.
+        `early_exit` is the request's, so the primary engine is timed on the
+        path that served it.
+        """
+        if self._random.random() >= self.sample_rate:
+            return False
+        self._start()
+        try:
+            self._queue.put_nowait((questionnaire, limit, min_confidence, list(primary), early_exit))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.sampled += 1
+        return True
+
+    def _start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="eligibility-shadow", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        log = open(self.log_path, "a", encoding="utf-8") if self.log_path else None
+        try:
+            while True:
+                item = self._queue.get()
+                try:
+                    if item is None:
+                        return
+                    self._compare(log, *item)
+                except Exception:
+                    with self._lock:
+                        self.errors += 1
+                finally:
+                    self._queue.task_done()
+        finally:
+            if log is not None:
+                log.close()
+
+    def _compare(self, log, questionnaire, limit, min_confidence, primary, early_exit):
+        start = time.perf_counter()
+        try:
+            # uncached, like the shadow engine; `primary` is what was served
+            region = resolve_region(questionnaire.zip_code)
+            _evaluate(questionnaire, region, get_income_tables(), limit, min_confidence, early_exit)
+            primary_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            shadow = self.engine(questionnaire, limit, min_confidence)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            record = {"error": repr(e)}
+        else:
+            shadow_seconds = time.perf_counter() - start
+            diff = diff_results(primary, shadow)
+            with self._lock:
+                self.compared += 1
+                self.primary_seconds += primary_seconds
+                self.shadow_seconds += shadow_seconds
+                self._deltas.append(shadow_seconds - primary_seconds)
+                if diff is not None:
+                    self.mismatches += 1
+            if diff is None:
+                return
+            record = {"diff": diff, "primary_ms": primary_seconds * 1e3, "shadow_ms": shadow_seconds * 1e3}
+        if log is not None:
+            record.update(
+                engine=self.engine_name,
+                time=time.time(),
+                limit=limit,
+                min_confidence=min_confidence,
+                questionnaire=questionnaire.model_dump(mode="json"),
+            )
+            log.write(json.dumps(record) + "\n")
+            log.flush()
+
+    def drain(self):
+        """
+        Block until every queued comparison is done.
+        """
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """
+        Finish the queued comparisons and stop the thread.
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            deltas = np.array(self._deltas) * 1e3
+            return {
+                "engine": self.engine_name,
+                "sample_rate": self.sample_rate,
+                "sampled": self.sampled,
+                "dropped": self.dropped,
+                "queued": self._queue.qsize(),
+                "compared": self.compared,
+                "mismatches": self.mismatches,
+                "mismatch_rate": round(self.mismatches / self.compared, 6) if self.compared else 0.0,
+                "errors": self.errors,
+                "primary_mean_ms": round(self.primary_seconds / self.compared * 1e3, 4) if self.compared else None,
+                "shadow_mean_ms": round(self.shadow_seconds / self.compared * 1e3, 4) if self.compared else None,
+                # shadow minus primary latency, over the last LATENCY_WINDOW comparisons
+                "delta_p50_ms": round(float(np.percentile(deltas, 50)), 4) if len(deltas) else None,
+                "delta_p99_ms": round(float(np.percentile(deltas, 99)), 4) if len(deltas) else None,
+            }
+
+
+def create_shadow_runner() -> Optional[ShadowRunner]:
+    """
+    The runner configured in settings, or None when shadow mode is off.
+    """
+    if not settings.SHADOW_ENGINE or settings.SHADOW_SAMPLE_RATE <= 0.0:
+        return None
+    if settings.SHADOW_ENGINE not in SHADOW_ENGINES:
+        raise ValueError(f"Unknown shadow engine {settings.SHADOW_ENGINE!r}; known: {sorted(SHADOW_ENGINES)}")
+    return ShadowRunner(
+        settings.SHADOW_ENGINE,
+        settings.SHADOW_SAMPLE_RATE,
+        settings.SHADOW_QUEUE_SIZE,
+        settings.SHADOW_LOG_PATH or None,
+    )
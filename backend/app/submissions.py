@@ -0,0 +1,344 @@
+# backend/app/submissions.py
+"""
+Data access for eligibility submissions from async handlers. With an
+async session factory the queries await the driver on the event loop, so
+a request waiting on the database holds no thread; without one (SQLite)
+the same queries run through sync sessions on the threadpool.
+
+Submissions from the eligibility endpoints go through SubmissionWriter,
+which queues them and inserts them in batches off the request path. They
+are read back a keyset page at a time, or streamed in chunks from a
+server-side cursor for export.
+
+SQLAlchemy and the drivers are imported on first use rather than with
+this module, to keep cold starts light.
+"""
+import asyncio
+import csv
+import io
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cached_property
+from typing import AsyncIterator, Iterable, Iterator, List, NamedTuple, Optional
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from app.models import QuestionnaireRequest
+from app.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+SUBMISSION_CSV_COLUMNS = ["id", "created_at", *QuestionnaireRequest.model_fields]
+
+
+@dataclass
+class SubmissionFilters:
+    """
+    Which submissions to list or export: created in [since, until), a zip
+    code starting with `zip_prefix`, a household size. None matches all.
+    """
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    zip_prefix: Optional[str] = None
+    household_size: Optional[str] = None
+
+    def select(self):
+        """
+        The filtered query for (id, submission_data, created_at), newest
+        first.
+        """
+        from sqlalchemy import select
+        from app.orm import EligibilitySubmission
+
+        data = EligibilitySubmission.submission_data
+        query = select(EligibilitySubmission.id, data, EligibilitySubmission.created_at)
+        if self.since is not None:
+            query = query.where(EligibilitySubmission.created_at >= self.since)
+        if self.until is not None:
+            query = query.where(EligibilitySubmission.created_at < self.until)
+        if self.zip_prefix:
+            query = query.where(data["zip_code"].as_string().startswith(self.zip_prefix, autoescape=True))
+        if self.household_size is not None:
+            query = query.where(data["household_size"].as_string() == self.household_size)
+        return query.order_by(EligibilitySubmission.id.desc())
+
+
+class SubmissionPage(NamedTuple):
+    submissions: List[dict]
+    # pass back as `cursor` for the next page; None on the last page
+    next_cursor: Optional[int]
+
+
+def submission_row(id: int, data, created_at: Optional[datetime]) -> dict:
+    return {"id": id, "data": data, "created_at": created_at.isoformat() if created_at else None}
+
+
+def submission_csv_row(row: dict) -> list:
+    data = row["data"] if isinstance(row["data"], dict) else {}
+    return [row["id"], row["created_at"] or "", *(data.get(name, "") for name in SUBMISSION_CSV_COLUMNS[2:])]
+
+
+def _csv_lines(rows: Iterable[list]) -> bytes:
+    out = io.StringIO()
+    csv.writer(out).writerows(rows)
+    return out.getvalue().encode("utf-8")
+
+
+class SubmissionStore:
+    """
+    Submissions in the database at `url` (DATABASE_URL by default), through
+    the shared engines of app.database, created on first use.
+    """
+
+    def __init__(self, url: Optional[str] = None):
+        self.url = url
+
+    @cached_property
+    def async_session_factory(self):
+        from app.database import create_async_session_factory
+
+        return create_async_session_factory(self.url)
+
+    def _sync_session(self):
+        from app.database import get_sessionmaker
+
+        return get_sessionmaker(self.url)()
+
+    @property
+    def is_async(self) -> bool:
+        return self.async_session_factory is not None
+
+    async def session(self) -> AsyncIterator:
+        """
+        Request-scoped session, for Depends(): an AsyncSession with an async
+        driver, otherwise a sync Session to be used through the threadpool.
+        Rolled back if the request fails and always closed.
+        """
+        if self.is_async:
+            async with self.async_session_factory() as db:
+                try:
+                    yield db
+                except Exception:
+                    await db.rollback()
+                    raise
+            return
+        db = self._sync_session()
+        try:
+            yield db
+        except Exception:
+            await run_in_threadpool(db.rollback)
+            raise
+        finally:
+            await run_in_threadpool(db.close)
+
+    async def add(self, submission_data: dict):
+        await self.add_many([submission_data])
+
+    @staticmethod
+    def _insert():
+        """
+        INSERT for submissions stamped with the database's clock, so
+        created_at is set (and the since/until filters work) whether or not
+        the table has a default for it.
+        """
+        from sqlalchemy import func, insert
+        from app.orm import EligibilitySubmission
+
+        return insert(EligibilitySubmission.__table__).values(created_at=func.now())
+
+    async def add_many(self, submissions: List[dict]):
+        """
+        Insert all of `submissions` in one executemany, sent as multi-row
+        INSERTs by the driver.
+        """
+        if not submissions:
+            return
+        rows = [{"submission_data": data} for data in submissions]
+        if self.is_async:
+            async with self.async_session_factory() as db:
+                await db.execute(self._insert(), rows)
+                await db.commit()
+        else:
+            await run_in_threadpool(self._add_many_sync, rows)
+
+    def _add_many_sync(self, rows: List[dict]):
+        # the context manager closes the session, rolling back if the commit raises
+        with self._sync_session() as db:
+            db.execute(self._insert(), rows)
+            db.commit()
+
+    async def page(self, db, filters: SubmissionFilters, limit: int, cursor: Optional[int] = None) -> SubmissionPage:
+        """
+        Up to `limit` submissions matching `filters`, newest first, read
+        through the session from session(). `cursor` is the next_cursor of
+        the previous page: a keyset on the primary key, so every page costs
+        the same however deep it is.
+        """
+        query = filters.select().limit(limit + 1)
+        if cursor is not None:
+            from app.orm import EligibilitySubmission
+
+            query = query.where(EligibilitySubmission.id < cursor)
+        if self.is_async:
+            rows = (await db.execute(query)).all()
+        else:
+            rows = await run_in_threadpool(lambda: db.execute(query).all())
+        items = [submission_row(*row) for row in rows[:limit]]
+        next_cursor = items[-1]["id"] if len(rows) > limit else None
+        return SubmissionPage(items, next_cursor)
+
+    async def stream(self, filters: SubmissionFilters, chunk_size: int = 1000) -> AsyncIterator[List[dict]]:
+        """
+        Every submission matching `filters`, newest first, in lists of at
+        most `chunk_size`. Reads through a server-side cursor on its own
+        connection, fetching a chunk at a time, so memory does not grow
+        with the table.
+        """
+        query = filters.select().execution_options(yield_per=chunk_size)
+        if self.is_async:
+            async with self.async_session_factory() as db:
+                result = await db.stream(query)
+                async for rows in result.partitions():
+                    yield [submission_row(*row) for row in rows]
+            return
+        async for chunk in iterate_in_threadpool(self._stream_sync(query)):
+            yield chunk
+
+    def _stream_sync(self, query) -> Iterator[List[dict]]:
+        with self._sync_session() as db:
+            result = db.execute(query.execution_options(stream_results=True))
+            for rows in result.partitions():
+                yield [submission_row(*row) for row in rows]
+
+    async def export(
+        self, filters: SubmissionFilters, fmt: str = "ndjson", chunk_size: int = 1000
+    ) -> AsyncIterator[bytes]:
+        """
+        stream() encoded as NDJSON, or as CSV with one column per
+        questionnaire field, one bytes chunk per fetched chunk of rows.
+        """
+        if fmt == "csv":
+            yield _csv_lines([SUBMISSION_CSV_COLUMNS])
+        async for rows in self.stream(filters, chunk_size):
+            if fmt == "csv":
+                yield _csv_lines(submission_csv_row(row) for row in rows)
+            else:
+                yield b"".join(dumps(row) + b"\n" for row in rows)
+
+
+class SubmissionWriter:
+    """
+    Write-behind buffer in front of a SubmissionStore. enqueue() returns as
+    soon as the submission is queued; a background task inserts what is
+    queued with one add_many per batch, flushing at `batch_size` rows or
+    `flush_interval` seconds after the first row of a batch. A full queue
+    makes enqueue() wait (backpressure) and close() drains the queue.
+
+    Until start() is called from the running loop, enqueue() writes
+    through to the store.
+    """
+
+    def __init__(
+        self,
+        store: SubmissionStore,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+    ):
+        self.store = store
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing: Optional[asyncio.Event] = None
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._closing = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def enqueue(self, submission_data: dict):
+        if not self.running:
+            await self.store.add(submission_data)
+            return
+        self.enqueued += 1
+        await self._queue.put(submission_data)
+
+    async def _get(self, timeout: Optional[float]) -> Optional[dict]:
+        """
+        The next queued submission, or None after `timeout` seconds or,
+        once the queue is empty, after close().
+        """
+        try:
+            return self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            if self._closing.is_set():
+                return None
+        get = asyncio.ensure_future(self._queue.get())
+        closing = asyncio.ensure_future(self._closing.wait())
+        done, _ = await asyncio.wait({get, closing}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        closing.cancel()
+        if get in done:
+            return get.result()
+        # a cancelled get leaves its item queued
+        get.cancel()
+        return None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._get(None)
+            if first is None:
+                return
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                item = await self._get(max(0.0, deadline - loop.time()))
+                if item is None:
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[dict]):
+        try:
+            await self.store.add_many(batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception:
+            self.failed += len(batch)
+            logger.exception("Failed to insert %d eligibility submissions", len(batch))
+
+    async def close(self):
+        """
+        Insert everything still queued, without waiting out flush_interval,
+        then stop the background task.
+        """
+        if not self.running:
+            return
+        self._closing.set()
+        await self._task
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "enqueued": self.enqueued,
+            # queued or in the batch being collected or inserted
+            "pending": self.enqueued - self.written - self.failed,
+            "max_queue": self.max_queue,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed,
+        }
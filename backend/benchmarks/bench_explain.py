@@ -0,0 +1,56 @@
+# backend/benchmarks/bench_explain.py
+"""
+Cost of explanation traces: the /api/eligibility scoring step with
+explain disabled against bare score_eligibility, and the cost of a trace
+when enabled. The result cache is disabled so every call scores.
+
+    cd backend && python -m benchmarks.bench_explain [--check]
+
+With --check the exit status is 1 when the disabled path is measurably
+(more than 5%) slower than bare scoring.
+"""
+import sys
+import timeit
+from app.eligibility import ELIGIBILITY_CACHE, score_eligibility
+from app.explain import explain_eligibility
+from app.models import QuestionnaireRequest
+
+QUESTIONNAIRE = QuestionnaireRequest(
+    age=40, zip_code="94110", annual_income=20000, household_size="3",
+    has_children=True, is_veteran=True, is_disabled=False,
+)
+# beyond this is more than timing noise
+MAX_OVERHEAD = 0.05
+
+
+def scoring_step(questionnaire, explain):
+    # mirrors check_eligibility
+    eligible = score_eligibility(questionnaire)
+    explanation = explain_eligibility(questionnaire) if explain else None
+    return eligible, explanation
+
+
+def per_call(stmt, number: int) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=7)) / number * 1e9
+
+
+def main(argv) -> int:
+    ELIGIBILITY_CACHE.maxsize = 0
+    q, number = QUESTIONNAIRE, 50_000
+
+    bare = per_call(lambda: score_eligibility(q), number)
+    disabled = per_call(lambda: scoring_step(q, False), number)
+    enabled = per_call(lambda: scoring_step(q, True), number // 10)
+    overhead = disabled / bare - 1.0
+    print(f"{'bare':>16}: {bare:8.0f} ns/request")
+    print(f"{'explain=false':>16}: {disabled:8.0f} ns/request ({overhead:+.1%})")
+    print(f"{'explain=true':>16}: {enabled:8.0f} ns/request")
+
+    if "--check" in argv and overhead > MAX_OVERHEAD:
+        print(f"explain=false adds {overhead:.1%} over bare scoring")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,89 @@
+# backend/benchmarks/bench_export.py
+"""
+Memory of the streaming submissions export: fills temporary SQLite
+databases with synthetic submissions at each of `--rows` sizes, drains
+SubmissionStore.export() over each, and reports rows/s and the traced
+allocation peak. The peak should not grow with the table.
+
+    cd backend && python -m benchmarks.bench_export [--rows 100000 1000000] [--check]
+
+With --check the exit status is 1 when the peak at the largest size is
+more than PEAK_GROWTH_LIMIT times the peak at the smallest.
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+import tracemalloc
+from itertools import cycle, islice
+from pathlib import Path
+from typing import Dict, List
+from sqlalchemy import insert
+from app.database import get_engine
+from app.orm import EligibilitySubmission
+from app.submissions import SubmissionFilters, SubmissionStore
+from benchmarks.synthetic import synthetic_population
+
+PEAK_GROWTH_LIMIT = 1.5
+INSERT_CHUNK = 10_000
+
+
+def fill(url: str, rows: int, seed: int = 1):
+    engine = get_engine(url)
+    EligibilitySubmission.__table__.create(engine)
+    population = [{"submission_data": q.model_dump(mode="json")} for q in synthetic_population(10_000, seed)]
+    source = cycle(population)
+    with engine.begin() as conn:
+        for _ in range(0, rows, INSERT_CHUNK):
+            conn.execute(insert(EligibilitySubmission), list(islice(source, INSERT_CHUNK)))
+
+
+async def _drain(store: SubmissionStore, fmt: str, chunk_size: int) -> int:
+    size = 0
+    async for chunk in store.export(SubmissionFilters(), fmt, chunk_size):
+        size += len(chunk)
+    return size
+
+
+def measure_export(url: str, rows: int, fmt: str, chunk_size: int) -> Dict[str, float]:
+    store = SubmissionStore(url)
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = asyncio.run(_drain(store, fmt, chunk_size))
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"rows": rows, "bytes": size, "seconds": seconds, "rows_per_s": rows / seconds, "peak_mb": peak / 2**20}
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args(argv)
+
+    results: List[Dict[str, float]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sorted(args.rows):
+            url = f"sqlite:///{Path(tmp) / f'submissions_{rows}.db'}"
+            fill(url, rows)
+            result = measure_export(url, rows, args.format, args.chunk_size)
+            get_engine(url).dispose()
+            results.append(result)
+            print(
+                f"{rows:>10} rows: {result['rows_per_s']:.0f} rows/s, {result['bytes'] / 2**20:.0f} MB exported, "
+                f"peak {result['peak_mb']:.1f} MB traced"
+            )
+
+    growth = results[-1]["peak_mb"] / results[0]["peak_mb"]
+    print(f"peak at {results[-1]['rows']} rows is {growth:.2f}x the peak at {results[0]['rows']} rows")
+    if args.check and growth > PEAK_GROWTH_LIMIT:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
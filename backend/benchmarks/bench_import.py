@@ -0,0 +1,109 @@
+# backend/benchmarks/bench_import.py
+"""
+Cold-start cost of the API: `python -X importtime -c "import app.main"`
+in a fresh interpreter, parsed into the total and the slowest modules,
+and the time from a fresh interpreter to the first /api/eligibility
+response (against a temporary SQLite database).
+
+    cd backend && python -m benchmarks.bench_import [--runs N] [--check]
+
+With --check the exit status is 1 when the median import takes longer
+than IMPORT_BUDGET_MS or any module in DEFERRED_MODULES is imported with
+app.main.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+from app.init_db import create_schema
+
+IMPORT_BUDGET_MS = 800.0
+# only needed by some endpoints, or after the response; must not load with app.main
+DEFERRED_MODULES = (
+    "sqlalchemy", "pymysql", "aiomysql", "numpy", "pdfkit", "weasyprint", "jinja2", "requests", "bs4",
+)
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+_FIRST_REQUEST = """
+import json, time
+import httpx  # the test client's own dependency, not part of the app's start
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    response = client.post("/api/eligibility", json={
+        "age": 35, "zip_code": "94110", "annual_income": 20000, "household_size": "3", "has_children": True,
+    })
+    responded = time.perf_counter()
+print(json.dumps({"status": response.status_code, "import_s": imported - start, "first_response_s": responded - start}))
+"""
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """
+    module -> (self, cumulative) microseconds from -X importtime output.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def import_profile() -> Dict[str, Tuple[int, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def first_response(database_url: str) -> dict:
+    create_schema(database_url)
+    env = {**os.environ, "DATABASE_URL": database_url}
+    result = subprocess.run(
+        [sys.executable, "-c", _FIRST_REQUEST], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args(argv)
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    totals: List[float] = [profile["app.main"][1] / 1e3 for profile in profiles]
+    median = statistics.median(totals)
+    print(f"import app.main: median {median:.0f} ms over {args.runs} runs (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    last = profiles[-1]
+    for name, (self_us, cumulative_us) in sorted(last.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {self_us / 1e3:8.1f} ms self {cumulative_us / 1e3:8.1f} ms cumulative  {name}")
+    loaded = sorted(m for m in DEFERRED_MODULES if m in last)
+    if loaded:
+        print(f"deferred modules imported with app.main: {', '.join(loaded)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first = first_response(f"sqlite:///{Path(tmp) / 'submissions.db'}")
+    print(
+        f"first /api/eligibility response: {first['first_response_s'] * 1e3:.0f} ms after start "
+        f"({first['import_s'] * 1e3:.0f} ms importing), status {first['status']}"
+    )
+
+    if args.check and (median > IMPORT_BUDGET_MS or loaded or first["status"] != 200):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,75 @@
+# backend/benchmarks/bench_rescreen.py
+"""
+Re-screening throughput against the number of worker processes, on a
+temporary SQLite database of synthetic submissions.
+
+    cd backend && python -m benchmarks.bench_rescreen [--rows N] [--check]
+
+With --check the exit status is 1 when the largest pool runs at less
+than 80% of linear scaling from one worker.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from sqlalchemy import create_engine, insert
+from app.models import EligibilitySubmission
+from app.rescreen import rescreen_submissions
+
+MIN_EFFICIENCY = 0.8
+
+
+def synthetic_submissions(count: int, seed: int = 11) -> list:
+    rnd = random.Random(seed)
+    return [
+        {
+            "age": rnd.randint(18, 90),
+            "zip_code": rnd.choice(["94110", "90012", "10001", "60601", "560001", "99999"]),
+            "annual_income": round(rnd.uniform(0, 90000), 2),
+            "household_size": rnd.choice(["1", "2", "3", "4", "5+"]),
+            "has_children": rnd.random() < 0.5,
+            "is_veteran": rnd.random() < 0.1,
+            "is_disabled": rnd.random() < 0.15,
+        }
+        for _ in range(count)
+    ]
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args(argv)
+
+    cores = os.cpu_count() or 1
+    pools = sorted({1, *(n for n in (2, 4, 8, 16, 32) if n <= cores), cores})
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'submissions.db'}"
+        engine = create_engine(url)
+        EligibilitySubmission.__table__.create(engine)
+        with engine.begin() as conn:
+            rows = [{"submission_data": s} for s in synthetic_submissions(args.rows)]
+            conn.execute(insert(EligibilitySubmission), rows)
+        engine.dispose()
+
+        rates = {}
+        with open(os.devnull, "wb") as sink:
+            for workers in pools:
+                start = time.perf_counter()
+                written = rescreen_submissions(url, sink, workers=workers)
+                rates[workers] = written / (time.perf_counter() - start)
+                efficiency = rates[workers] / (rates[1] * workers)
+                print(f"{workers:>3} workers: {rates[workers]:10.0f} rows/s ({efficiency:.0%} of linear)")
+
+    efficiency = rates[pools[-1]] / (rates[1] * pools[-1])
+    if args.check and efficiency < MIN_EFFICIENCY:
+        print(f"{pools[-1]} workers reach {efficiency:.0%} of linear scaling")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,122 @@
+# backend/benchmarks/bench_schemes.py
+"""
+Single-questionnaire latency against the California programs plus a
+synthetic myscheme.gov.in catalog of scraped-looking schemes, and the
+cost of extracting their criteria. The result cache is disabled so every
+call scores.
+
+    cd backend && python -m benchmarks.bench_schemes [--schemes N] [--check]
+
+With --check the exit status is 1 when any questionnaire takes longer
+than 5 ms.
+"""
+import argparse
+import random
+import sys
+import timeit
+from app.benefits_data import CALIFORNIA_BENEFITS
+from app.eligibility import score_eligibility
+from app.categories.scheme_criteria import STATE_REGIONS, build_scheme_catalog
+from app.models import Benefit, QuestionnaireRequest
+from app.rules import compile_catalog, load_rule_spec
+from benchmarks.synthetic import use_catalog
+
+MAX_LATENCY_MS = 5.0
+
+QUESTIONNAIRES = {
+    "IN, all fields": QuestionnaireRequest(
+        age=34, zip_code="560001", annual_income=180000, household_size="4", has_children=True,
+        is_veteran=False, is_disabled=False, gender="female", social_category="obc", occupation="farmer",
+    ),
+    "IN, disabled": QuestionnaireRequest(
+        age=62, zip_code="600001", annual_income=90000, household_size="2", has_children=False,
+        is_veteran=False, is_disabled=True, gender="male", social_category="sc", occupation="weaver",
+    ),
+    "IN, no categories": QuestionnaireRequest(
+        age=22, zip_code="110001", annual_income=300000, household_size="1", has_children=False,
+        is_veteran=False, is_disabled=False,
+    ),
+    "unknown zip": QuestionnaireRequest(
+        age=45, zip_code="00000", annual_income=50000, household_size="3", has_children=True,
+        is_veteran=False, is_disabled=False, gender="female", social_category="general", occupation="student",
+    ),
+    "US": QuestionnaireRequest(
+        age=40, zip_code="94110", annual_income=20000, household_size="3", has_children=True,
+        is_veteran=True, is_disabled=False,
+    ),
+}
+
+_SUBJECTS = ["women", "girls", "farmers", "students", "fishermen", "artisans", "weavers", "street vendors",
+             "construction workers", "unemployed youth", "widows", "senior citizens", "transgender persons"]
+_CATEGORIES = ["SC", "ST", "OBC", "EWS", "SC/ST", "minority"]
+
+
+def synthetic_schemes(count: int, seed: int = 7) -> list:
+    """
+    Scheme dicts shaped like fetch_scheme_details() output, with 1-4
+    eligibility conditions each.
+    """
+    rnd = random.Random(seed)
+    states = [name.title() for name in STATE_REGIONS]
+    schemes = []
+    for i in range(count):
+        subject = rnd.choice(_SUBJECTS)
+        eligibility = [f"The applicant should be one of the {subject}."]
+        if rnd.random() < 0.6:
+            eligibility.append(f"The applicant must be a resident of {rnd.choice(states)}.")
+        if rnd.random() < 0.5:
+            lakhs = rnd.choice([1, 1.5, 2, 2.5, 3, 5, 8])
+            eligibility.append(f"Annual family income should not exceed Rs. {lakhs} lakh.")
+        if rnd.random() < 0.4:
+            low = rnd.choice([14, 18, 21, 40, 60])
+            eligibility.append(f"Age between {low} and {low + rnd.choice([10, 20, 40])} years.")
+        if rnd.random() < 0.3:
+            eligibility.append(f"Reserved for {rnd.choice(_CATEGORIES)} applicants.")
+        if rnd.random() < 0.1:
+            eligibility.append("Persons with disabilities of 40% or more.")
+        schemes.append({
+            "title": f"Scheme {i} for {subject}",
+            "link": f"https://www.myscheme.gov.in/schemes/scheme-{i}",
+            "eligibility": eligibility,
+        })
+    return schemes
+
+
+def scheme_catalog(schemes: list):
+    catalog = build_scheme_catalog(schemes)
+    benefits = CALIFORNIA_BENEFITS + tuple(Benefit(**entry) for entry in catalog["benefits"])
+    spec = load_rule_spec()
+    spec["rules"] = {**spec["rules"], **catalog["rules"]}
+    return compile_catalog(benefits, spec)
+
+
+def per_call(stmt, number: int) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schemes", type=int, default=3000)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args(argv)
+
+    schemes = synthetic_schemes(args.schemes)
+    extract = per_call(lambda: build_scheme_catalog(schemes), 1)
+    catalog = scheme_catalog(schemes)
+    print(f"{len(catalog)} rules; criteria extraction {extract / len(schemes) * 1e6:.1f} us/scheme")
+
+    worst = 0.0
+    with use_catalog(catalog):
+        for name, q in QUESTIONNAIRES.items():
+            ms = per_call(lambda: score_eligibility(q), 200) * 1e3
+            worst = max(worst, ms)
+            print(f"{name:>18}: {ms:7.3f} ms/questionnaire")
+
+    if args.check and worst > MAX_LATENCY_MS:
+        print(f"slowest questionnaire took {worst:.3f} ms, over {MAX_LATENCY_MS} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,92 @@
+# backend/benchmarks/load_eligibility.py
+"""
+Load test for a running server: `--clients` concurrent connections post
+synthetic questionnaires to /api/eligibility (every request also writes a
+submission) until `--requests` have completed, then report throughput,
+latency percentiles and errors.
+
+    cd backend && python -m benchmarks.load_eligibility --url http://localhost:8080 [--clients 1000]
+
+Run it against two builds of the server with the same database to compare
+them, e.g. before and after a change to the request path.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Dict, List
+import httpx
+import numpy as np
+from benchmarks.synthetic import synthetic_population
+
+
+async def run_load(client: httpx.AsyncClient, payloads: List[bytes], clients: int, requests: int) -> Dict[str, float]:
+    """
+    Drive `client` with `clients` concurrent workers, each posting the next
+    payload as soon as its previous request completes.
+    """
+    latencies: List[float] = []
+    errors = 0
+    issued = 0
+
+    async def worker():
+        nonlocal errors, issued
+        while issued < requests:
+            body = payloads[issued % len(payloads)]
+            issued += 1
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/api/eligibility", content=body, headers={"content-type": "application/json"}
+                )
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    seconds = time.perf_counter() - start
+    ms = np.array(latencies) * 1e3 if latencies else np.zeros(1)
+    return {
+        "clients": clients,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "seconds": seconds,
+        "requests_per_s": len(latencies) / seconds,
+        "latency_p50_ms": float(np.percentile(ms, 50)),
+        "latency_p90_ms": float(np.percentile(ms, 90)),
+        "latency_p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+async def _main(args) -> Dict[str, float]:
+    payloads = [q.model_dump_json().encode() for q in synthetic_population(args.population)]
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        return await run_load(client, payloads, args.clients, args.requests)
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--population", type=int, default=10_000)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(_main(args))
+    print(
+        f"{result['clients']} clients: {result['requests_per_s']:.0f} requests/s, "
+        f"p50 {result['latency_p50_ms']:.1f} ms, p90 {result['latency_p90_ms']:.1f} ms, "
+        f"p99 {result['latency_p99_ms']:.1f} ms, {result['errors']} errors"
+    )
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,187 @@
+# backend/benchmarks/suite.py
+"""
+Engine benchmark suite: for synthetic catalogs of 3 (the real one), 1k
+and 100k programs, per-request score_eligibility latency percentiles,
+evaluate_batch throughput, allocations per request and per batch, and
+catalog compile time, over a synthetic population.
+
+    cd backend && python -m benchmarks.suite [--catalogs 3,1000,100000]
+        [--output results.json] [--baseline old.json --threshold 0.1]
+
+Results are written as JSON (by default to benchmarks/results/<commit>.json).
+With --baseline, every metric is compared against an earlier run and the
+exit status is 1 when any is worse by more than --threshold.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+from app.batch import columns_from_questionnaires, evaluate_batch
+from app.eligibility import score_eligibility
+from benchmarks.synthetic import synthetic_catalog, synthetic_population, use_catalog
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+# batch temporaries are (rows x programs) float64 arrays; bound their size
+BATCH_CELLS = 2_000_000
+# metrics where a larger value is better; all others are costs
+HIGHER_IS_BETTER = {"batch_rows_per_s"}
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    return float(np.percentile(samples, q))
+
+
+def measure_latency(population, budget: float, min_requests: int = 50) -> Dict[str, float]:
+    """
+    score_eligibility latency in microseconds, cycling through the
+    population until `budget` seconds have passed.
+    """
+    samples: List[float] = []
+    deadline = time.perf_counter() + budget
+    i = 0
+    while len(samples) < min_requests or time.perf_counter() < deadline:
+        q = population[i % len(population)]
+        start = time.perf_counter_ns()
+        score_eligibility(q)
+        samples.append((time.perf_counter_ns() - start) / 1e3)
+        i += 1
+    return {
+        "requests": len(samples),
+        "latency_p50_us": _percentile(samples, 50),
+        "latency_p90_us": _percentile(samples, 90),
+        "latency_p99_us": _percentile(samples, 99),
+        "latency_mean_us": statistics.fmean(samples),
+    }
+
+
+def measure_batch(catalog, population, budget: float) -> Dict[str, float]:
+    rows = max(1, min(len(population), BATCH_CELLS // len(catalog)))
+    columns = columns_from_questionnaires(population[:rows])
+    done, start = 0, time.perf_counter()
+    while done == 0 or time.perf_counter() - start < budget:
+        evaluate_batch(**columns, catalog=catalog)
+        done += rows
+    return {"batch_rows": rows, "batch_rows_per_s": done / (time.perf_counter() - start)}
+
+
+def measure_allocations(catalog, population, samples: int = 50) -> Dict[str, float]:
+    """
+    Peak bytes allocated by tracemalloc's count during one request (mean
+    and max over `samples`) and during one batch.
+    """
+    peaks = []
+    tracemalloc.start()
+    try:
+        for q in population[:samples]:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            score_eligibility(q)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+        rows = max(1, min(len(population), BATCH_CELLS // len(catalog)))
+        columns = columns_from_questionnaires(population[:rows])
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        evaluate_batch(**columns, catalog=catalog)
+        batch_peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    return {
+        "request_alloc_mean_bytes": statistics.fmean(peaks),
+        "request_alloc_max_bytes": float(max(peaks)),
+        "batch_alloc_bytes_per_row": batch_peak / rows,
+    }
+
+
+def run(sizes: List[int], population_size: int, budget: float) -> Dict[str, Dict[str, float]]:
+    population = synthetic_population(population_size)
+    results = {}
+    for size in sizes:
+        start = time.perf_counter()
+        catalog = synthetic_catalog(size)
+        metrics = {"programs": len(catalog), "compile_s": time.perf_counter() - start}
+        with use_catalog(catalog):
+            # warm the breakpoint tables and lazily built state first
+            for q in population[:100]:
+                score_eligibility(q)
+            metrics.update(measure_latency(population, budget))
+            metrics.update(measure_batch(catalog, population, budget))
+            metrics.update(measure_allocations(catalog, population))
+        results[str(size)] = metrics
+        print(
+            f"{size:>7} programs: p50 {metrics['latency_p50_us']:9.1f} us  "
+            f"p99 {metrics['latency_p99_us']:9.1f} us  "
+            f"batch {metrics['batch_rows_per_s']:10.0f} rows/s  "
+            f"alloc {metrics['request_alloc_mean_bytes']:9.0f} B/request",
+            file=sys.stderr,
+        )
+    return results
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    Metrics worse than the baseline by more than `threshold` (a fraction).
+    Counts and compile-independent sizes are skipped.
+    """
+    regressions = []
+    for size, metrics in current["results"].items():
+        before = baseline["results"].get(size, {})
+        for name, value in metrics.items():
+            if name in ("programs", "requests", "batch_rows") or not before.get(name):
+                continue
+            change = value / before[name] - 1.0
+            worse = -change if name in HIGHER_IS_BETTER else change
+            if worse > threshold:
+                regressions.append(f"{size} programs {name}: {before[name]:.4g} -> {value:.4g} ({change:+.1%})")
+    return regressions
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--catalogs", default="3,1000,100000", help="comma-separated catalog sizes")
+    parser.add_argument("--population", type=int, default=10_000)
+    parser.add_argument("--budget", type=float, default=3.0, help="seconds per latency/throughput measurement")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    commit = _commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": run([int(n) for n in args.catalogs.split(",")], args.population, args.budget),
+    }
+    output = args.output or RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
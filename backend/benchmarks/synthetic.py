@@ -0,0 +1,130 @@
+# backend/benchmarks/synthetic.py
+"""
+Synthetic catalogs and populations for the benchmarks. Everything is
+seeded, so two runs (or two commits) measure the same inputs.
+"""
+import csv
+import random
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+import app.eligibility as eligibility
+from app.benefits_data import get_all_benefits
+from app.breakpoints import BreakpointIndex
+from app.models import Benefit, QuestionnaireRequest
+from app.regions import REGIONS_CSV
+from app.rules import BOOLEAN_FIELDS, CompiledCatalog, compile_catalog, load_rule_spec
+
+# household sizes roughly as in the American Community Survey
+HOUSEHOLD_WEIGHTS = {"1": 0.28, "2": 0.35, "3": 0.15, "4": 0.13, "5+": 0.09}
+# annual income is log-normal around this median, widening with sigma
+MEDIAN_INCOME = 45000.0
+INCOME_SIGMA = 0.9
+
+# a few DSL score expressions, so their compiled code is shared through the cache
+_DSL_SCORES = (
+    "min(90, max(0, 100 - fpl_ratio * 35))",
+    "80 if age >= 60 else max(0, 70 - fpl_ratio * 20)",
+    "min(85, 60 + household_size * 5) if fpl_ratio < 2.5 else 0",
+)
+
+
+def sample_zip_codes() -> Dict[str, str]:
+    """
+    One ZIP code per US state, from the start of its first prefix range.
+    """
+    zips: Dict[str, str] = {}
+    with open(REGIONS_CSV, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(line for line in f if not line.startswith("#")):
+            if row["country"] == "US" and row["region"] not in zips:
+                zips[row["region"]] = row["first"].ljust(5, "1")
+    return zips
+
+
+def synthetic_population(count: int, seed: int = 1) -> List[QuestionnaireRequest]:
+    """
+    Questionnaires with log-normal incomes, weighted household sizes,
+    children more likely in larger households, and ZIP codes spread over
+    every state (California over-represented, as it has real programs).
+    """
+    rnd = random.Random(seed)
+    zips = sample_zip_codes()
+    zip_pool = list(zips.values()) + [zips["US-CA"]] * len(zips)
+    sizes, weights = zip(*HOUSEHOLD_WEIGHTS.items())
+    population = []
+    for _ in range(count):
+        size = rnd.choices(sizes, weights)[0]
+        members = rnd.randint(5, 9) if size == "5+" else int(size)
+        population.append(QuestionnaireRequest(
+            age=rnd.randint(18, 90),
+            zip_code=rnd.choice(zip_pool),
+            annual_income=round(rnd.lognormvariate(0.0, INCOME_SIGMA) * MEDIAN_INCOME * members ** 0.5, 2),
+            household_size=size,
+            household_members=members if size == "5+" else None,
+            has_children=members > 2 and rnd.random() < 0.7 or members == 2 and rnd.random() < 0.2,
+            is_veteran=rnd.random() < 0.06,
+            is_disabled=rnd.random() < 0.12,
+        ))
+    return population
+
+
+def synthetic_catalog(programs: int, seed: int = 1) -> CompiledCatalog:
+    """
+    The real catalog when `programs` is its size; otherwise `programs`
+    generated rules: regional and national, flag requirements, SMI gates,
+    age limits and about 1% DSL scores.
+    """
+    real = get_all_benefits()
+    if programs == len(real):
+        return compile_catalog(real, load_rule_spec())
+    rnd = random.Random(seed)
+    states = list(sample_zip_codes())
+    benefits: List[Benefit] = []
+    rules = {}
+    for i in range(programs):
+        benefit_id = f"synthetic-{i:06d}"
+        benefits.append(Benefit(
+            id=benefit_id,
+            name=f"Synthetic program {i}",
+            description="Generated for benchmarking",
+            estimated_amount=f"${rnd.randint(1, 20) * 50}/month",
+            confidence_score=0.0,
+            requirements=["Resident of the program's state", "Income below the program limit"],
+            application_url=f"https://example.org/programs/{i}",
+            documents_needed=["Photo ID", "Proof of income"],
+        ))
+        rule = {
+            "max_fpl_ratio": rnd.choice([1.0, 1.3, 1.5, 2.0, 2.5, 4.0]),
+            "score": {
+                "base": rnd.uniform(70.0, 110.0),
+                "slope": rnd.uniform(0.0, 50.0),
+                "cap": rnd.choice([80.0, 85.0, 90.0, 95.0]),
+            },
+        }
+        if rnd.random() < 0.8:
+            rule["regions"] = [rnd.choice(states)]
+        if rnd.random() < 0.3:
+            rule["requires"] = [rnd.choice(BOOLEAN_FIELDS)]
+        if rnd.random() < 0.1:
+            rule["max_smi_ratio"] = rnd.choice([0.6, 0.8])
+        if rnd.random() < 0.1:
+            rule["min_age"] = rnd.choice([18, 55, 60, 65])
+        if rnd.random() < 0.01:
+            rule["score"] = rnd.choice(_DSL_SCORES)
+        rules[benefit_id] = rule
+    return compile_catalog(benefits, {"version": 1, "boosts": {"is_veteran": 5.0, "is_disabled": 5.0}, "rules": rules})
+
+
+@contextmanager
+def use_catalog(catalog: CompiledCatalog):
+    """
+    Route score_eligibility through `catalog`, with the result cache off,
+    restoring the module state afterwards.
+    """
+    saved: Tuple = (eligibility.COMPILED_CATALOG, eligibility.BREAKPOINT_INDEX, eligibility.ELIGIBILITY_CACHE.maxsize)
+    eligibility.COMPILED_CATALOG = catalog
+    eligibility.BREAKPOINT_INDEX = BreakpointIndex(catalog, eligibility.MIN_CONFIDENCE)
+    eligibility.ELIGIBILITY_CACHE.maxsize = 0
+    try:
+        yield
+    finally:
+        eligibility.COMPILED_CATALOG, eligibility.BREAKPOINT_INDEX, eligibility.ELIGIBILITY_CACHE.maxsize = saved
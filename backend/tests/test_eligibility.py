@@ -0,0 +1,921 @@
+from app.models import EligibilityResponse, QuestionnaireRequest
+from app.eligibility import calculate_eligibility, COMPILED_CATALOG
+from app.benefits_data import get_all_benefits
+from app.rules import compile_catalog
+import pytest
+
+
+def make_questionnaire(**overrides):
+    data = dict(
+        age=35,
+        zip_code="94110",
+        annual_income=20000,
+        household_size="3",
+        has_children=True,
+        is_veteran=False,
+        is_disabled=False,
+    )
+    data.update(overrides)
+    return QuestionnaireRequest(**data)
+
+
+def test_scores_match_program_formulas():
+    results = calculate_eligibility(make_questionnaire(is_veteran=True))
+    # ratio = 20000 / 25820
+    assert [(b.id, b.confidence_score) for b in results] == [
+        ("calfresh", 81.8),
+        ("liheap", 69.0),
+        ("calworks", 56.3),
+    ]
+
+
+def test_income_gate_is_strict():
+    # exactly 200% FPL for a single person is no longer eligible for CalFresh
+    results = calculate_eligibility(make_questionnaire(annual_income=30120, household_size="1"))
+    assert "calfresh" not in [b.id for b in results]
+
+
+def test_calworks_requires_children():
+    results = calculate_eligibility(make_questionnaire(annual_income=5000, has_children=False))
+    assert "calworks" not in [b.id for b in results]
+
+
+def test_candidates_are_pruned_by_ratio():
+    assert len(COMPILED_CATALOG.candidates(0.5)) == 3
+    assert [r.benefit.id for r in COMPILED_CATALOG.candidates(1.2)] == ["liheap", "calfresh"]
+    assert COMPILED_CATALOG.candidates(2.0) == []
+
+
+def test_rules_for_unknown_benefits_are_rejected():
+    spec = {"rules": {"missing": {"score": {"base": 50.0, "slope": 1.0}}}}
+    with pytest.raises(ValueError):
+        compile_catalog(get_all_benefits(), spec)
+
+
+def test_batch_matches_single_evaluation():
+    import numpy as np
+    from app.batch import evaluate_batch, columns_from_questionnaires
+
+    questionnaires = [
+        make_questionnaire(annual_income=income, household_size=size, has_children=children, is_disabled=disabled)
+        for income in (0, 9000, 18000, 27000, 45000)
+        for size in ("1", "3", "5+")
+        for children in (True, False)
+        for disabled in (True, False)
+    ]
+    result = evaluate_batch(**columns_from_questionnaires(questionnaires), dtype=np.float64)
+    for row, q in enumerate(questionnaires):
+        expected = [(b.id, b.confidence_score) for b in calculate_eligibility(q)]
+        assert [(s.benefit.id, s.confidence_score) for s in result.top_benefits(row)] == expected
+
+
+def test_batch_applies_negative_boosts_in_rule_order():
+    import numpy as np
+    from app.batch import evaluate_batch, columns_from_questionnaires
+
+    score = {"base": 95.0, "slope": 50.0, "cap": 90.0}
+    benefits = get_all_benefits()
+    spec = {"rules": {
+        # clamped at 100 before the penalty in one rule, after it in the other
+        benefits[0].id: {"score": score, "boosts": {"is_veteran": 30.0, "is_disabled": -25.0}},
+        benefits[1].id: {"score": score, "boosts": {"is_disabled": -25.0, "is_veteran": 30.0}},
+    }}
+    catalog = compile_catalog(benefits, spec)
+    questionnaires = [
+        make_questionnaire(annual_income=income, is_veteran=veteran, is_disabled=disabled)
+        for income in (0, 5000, 12000, 20000)
+        for veteran in (True, False)
+        for disabled in (True, False)
+    ]
+    batch = evaluate_batch(**columns_from_questionnaires(questionnaires), catalog=catalog, dtype=np.float64)
+    arrays = catalog.batch_arrays
+    again = evaluate_batch(**columns_from_questionnaires(questionnaires), catalog=catalog, dtype=np.float64)
+    assert arrays is not None and catalog.batch_arrays is arrays and (again.confidence == batch.confidence).all()
+    for row, q in enumerate(questionnaires):
+        ratio = q.annual_income / 25820
+        for rule in catalog.rules:
+            expected = rule.score(q, ratio) if ratio < rule.max_fpl_ratio else 0.0
+            column = batch.benefit_ids.index(rule.benefit.id)
+            assert batch.confidence[row, column] == (expected if expected > 30.0 else 0.0)
+    assert batch.confidence[0, 0] == 75.0 and batch.confidence[0, 1] == 95.0
+
+
+def test_cache_hits_and_version_invalidation():
+    from app.cache import LRUCache
+
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1, version="v1")
+    cache.put("b", 2, version="v1")
+    assert cache.get("a", version="v1") == 1
+    cache.put("c", 3, version="v1")  # evicts "b", the least recently used
+    assert cache.get("b", version="v1") is None
+    assert cache.get("a", version="v2") is None  # new catalog version drops everything
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["invalidations"]) == (1, 2, 1, 1)
+
+
+def test_breakpoint_tables_match_compiled_rules():
+    from types import SimpleNamespace
+    from app.breakpoints import BreakpointIndex
+    from app.eligibility import BREAKPOINT_INDEX, MIN_CONFIDENCE
+    from app.rules import BOOLEAN_FIELDS
+
+    def rank(item):
+        return (-item[0], item[1])
+
+    # a boost that saturates at 100 before a penalty lands, in either order
+    benefits = get_all_benefits()
+    mixed = compile_catalog(benefits, {"rules": {
+        benefits[0].id: {"score": {"base": 95.0, "slope": 50.0, "cap": 100.0},
+                         "boosts": {"is_veteran": 10.0, "is_disabled": -10.0}},
+        benefits[1].id: {"score": {"base": 95.0, "slope": 50.0, "cap": 100.0},
+                         "boosts": {"is_disabled": -10.0, "is_veteran": 10.0}},
+    }})
+    mixed_index = BreakpointIndex(mixed, MIN_CONFIDENCE)
+    assert [(c, r.position) for c, r in mixed_index.table((False, True, True)).score(0.02)] == [(94.0, 1), (90.0, 0)]
+
+    for catalog, index in ((COMPILED_CATALOG, BREAKPOINT_INDEX), (mixed, mixed_index)):
+        for flags in [(c, v, d) for c in (True, False) for v in (True, False) for d in (True, False)]:
+            q = SimpleNamespace(**dict(zip(BOOLEAN_FIELDS, flags)))
+            table = index.table(flags)
+            for ratio in table.breakpoints + [0.0, 0.02, 0.37, 0.99, 1.25, 1.999, 3.0]:
+                expected = [
+                    (round(rule.score(q, ratio), 1), rule.position)
+                    for rule in catalog.candidates(ratio)
+                    if rule.applies(q) and rule.score(q, ratio) > MIN_CONFIDENCE
+                ]
+                scored = [(c, rule.position) for c, rule in table.score(ratio)]
+                assert sorted(scored, key=rank) == sorted(expected, key=rank)
+
+
+@pytest.mark.parametrize("limit,min_confidence", [(1, 30.0), (2, 30.0), (10, 60.0), (3, 0.0)])
+def test_top_k_and_early_exit_agree(limit, min_confidence):
+    from app.eligibility import score_eligibility
+
+    for income in (0, 6000, 12000, 20000, 30000, 40000):
+        q = make_questionnaire(annual_income=income, is_veteran=True)
+        full = calculate_eligibility(q)
+        expected = [(b.id, b.confidence_score) for b in full if b.confidence_score > min_confidence][:limit]
+        for early_exit in (False, True):
+            scored = score_eligibility(q, limit=limit, min_confidence=min_confidence, early_exit=early_exit)
+            assert [(s.benefit.id, s.confidence_score) for s in scored] == expected
+
+
+def test_candidate_index_applies_flags_and_region():
+    q = make_questionnaire(has_children=False)
+    assert [r.benefit.id for r in COMPILED_CATALOG.candidates(0.5, q)] == ["liheap", "calfresh"]
+    assert [r.benefit.id for r in COMPILED_CATALOG.candidates(0.5, q, region="us-ca")] == ["liheap", "calfresh"]
+    assert COMPILED_CATALOG.candidates(0.5, q, region="US-NY") == []
+
+
+@pytest.mark.parametrize("zip_code,expected", [("94110", "US-CA"), ("10001-2345", "US-NY"), ("560001", "IN-KA"), ("12", None)])
+def test_resolve_region(zip_code, expected):
+    from app.regions import resolve_region
+
+    assert resolve_region(zip_code) == expected
+
+
+def test_regional_programs_follow_zip_code():
+    low_income = dict(annual_income=5000)
+    assert len(calculate_eligibility(make_questionnaire(zip_code="90001", **low_income))) == 3
+    assert calculate_eligibility(make_questionnaire(zip_code="10001", **low_income)) == []
+    # unresolvable codes keep every program
+    assert len(calculate_eligibility(make_questionnaire(zip_code="n/a", **low_income))) == 3
+
+
+def test_income_tables_cover_exact_household_sizes():
+    from app.income_tables import load_income_tables
+
+    tables = load_income_tables("2024")
+    assert tables.fpl_row(None)[1:6] == (15060, 20440, 25820, 31200, 36580)
+    assert tables.fpl_row(None)[7] == 15060 + 5380 * 6
+    assert tables.fpl_row("US-AK")[1] == 18810
+    assert tables.smi_row("US-CA")[4] == 126000
+    assert tables.smi_row("US-CA")[7] == pytest.approx(126000 * 1.35)
+
+
+def test_hot_swapped_tables_apply_smi_gate():
+    from app.income_tables import build_income_tables, install_income_tables, load_income_tables
+
+    spec = {
+        "smi_size_factors": [1.0],
+        "smi_extra_person_factor": 0.0,
+        "years": {"test": {"fpl": {"US": {"base": 15060, "per_person": 5380}}, "smi_4": {"US-CA": 10000}}},
+    }
+    q = make_questionnaire(annual_income=9000)
+    assert "liheap" in [b.id for b in calculate_eligibility(q)]
+    previous = install_income_tables(build_income_tables(spec, "test"))
+    try:
+        # 9000 is 90% of this median income, above LIHEAP's 60% limit
+        assert "liheap" not in [b.id for b in calculate_eligibility(q)]
+    finally:
+        install_income_tables(previous or load_income_tables("2024"))
+
+
+def _dsl_catalog():
+    from app.rules import load_rule_spec
+
+    spec = load_rule_spec()
+    spec["rules"]["calworks"] = {
+        "regions": ["US-CA"],
+        "when": "has_children and fpl_ratio < 1.0 and age < 60",
+        "score": "min(85, max(0, 90 - fpl_ratio * 50))",
+    }
+    return compile_catalog(get_all_benefits(), spec)
+
+
+def test_dsl_rules_match_declarative_rules(tmp_path, monkeypatch):
+    import numpy as np
+    from app.batch import evaluate_batch, columns_from_questionnaires
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "RULE_CACHE_DIR", str(tmp_path))
+    catalog = _dsl_catalog()
+    declarative = {r.benefit.id: r for r in COMPILED_CATALOG.rules}
+    questionnaires = [
+        make_questionnaire(annual_income=income, age=age, is_veteran=True)
+        for income in (0, 9000, 18000, 25819, 40000)
+        for age in (30, 70)
+    ]
+    rule = catalog.dsl_rules[0]
+    for q in questionnaires:
+        ratio = q.annual_income / 25820
+        expected = declarative["calworks"].score(q, ratio) if q.age < 60 and ratio < 1.0 else 0.0
+        assert rule.score(q, ratio) == pytest.approx(expected)
+
+    batch = evaluate_batch(**columns_from_questionnaires(questionnaires), catalog=catalog, dtype=np.float64)
+    column = batch.benefit_ids.index("calworks")
+    for row, q in enumerate(questionnaires):
+        ratio = q.annual_income / 25820
+        expected = declarative["calworks"].score(q, ratio) if q.age < 60 and ratio < 1.0 else 0.0
+        assert batch.confidence[row, column] == pytest.approx(expected if expected > 30.0 else 0.0)
+
+
+@pytest.mark.parametrize("source", ["__import__('os')", "fpl_ratio ** 2", "q.__class__", "income < 1", "age in (1, 2)"])
+def test_dsl_rejects_unsupported_syntax(source):
+    from app.rule_dsl import RuleSyntaxError, parse_expression
+
+    with pytest.raises(RuleSyntaxError):
+        parse_expression(source)
+
+
+def test_dsl_rules_are_cached_on_disk(tmp_path, monkeypatch):
+    from app import rule_dsl
+
+    rule = rule_dsl.load_dsl_rule("age >= 65", "50 + fpl_ratio", cache_dir=tmp_path)
+    assert len(list(tmp_path.glob("*.bin"))) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached rule was recompiled")
+
+    monkeypatch.setattr(rule_dsl, "compile_rule_source", fail)
+    cached = rule_dsl.load_dsl_rule("age >= 65", "50 + fpl_ratio", cache_dir=tmp_path)
+    q = make_questionnaire(age=70)
+    assert cached.score(q, 0.5) == rule.score(q, 0.5) == 50.5
+    assert cached.variables == {"age", "fpl_ratio"}
+
+
+def test_dsl_rule_cache_is_opt_in_and_private(tmp_path, monkeypatch):
+    import marshal
+    import os
+    from app import rule_dsl
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "RULE_CACHE_DIR", "")
+    rule = rule_dsl.load_dsl_rule(None, "50 + fpl_ratio")
+    assert rule_dsl.default_cache_dir() is None and rule.score(make_questionnaire(), 0.5) == 50.5
+
+    # a planted entry in a directory others can write to is never executed
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    os.chmod(shared, 0o777)
+    planted = rule_dsl.compile_rule_source(None, "999")
+    (shared / f"{rule_dsl.rule_hash(None, '50 + fpl_ratio')}.bin").write_bytes(marshal.dumps(planted))
+    assert rule_dsl.load_dsl_rule(None, "50 + fpl_ratio", cache_dir=shared).score(make_questionnaire(), 0.5) == 50.5
+
+    private = tmp_path / "private"
+    rule_dsl.load_dsl_rule(None, "50 + fpl_ratio", cache_dir=private)
+    assert os.stat(private).st_mode & 0o777 == 0o700
+    assert all(os.stat(path).st_mode & 0o777 == 0o600 for path in private.glob("*.bin"))
+
+
+@pytest.mark.parametrize(
+    "score", ["min(90, 10 / fpl_ratio)", "-5 / fpl_ratio", "0 / fpl_ratio", "age / (household_size - 3)"]
+)
+def test_dsl_division_by_zero_matches_numpy(score):
+    import math
+    import numpy as np
+    from app.rule_dsl import load_dsl_rule
+
+    rule = load_dsl_rule(None, score)
+    q = make_questionnaire(age=40, household_size="3")
+    scalar = rule.score(q, 0.0, household_size=3)
+    cols = {"fpl_ratio": np.zeros(1), "age": np.full(1, 40.0), "household_size": np.full(1, 3)}
+    with np.errstate(all="raise"):
+        vector = float(np.broadcast_to(rule.score_vector(cols, np), (1,))[0])
+    assert (math.isnan(scalar) and math.isnan(vector)) or scalar == vector
+
+
+def test_session_deltas_rescore_dependent_rules_only():
+    from app.eligibility import score_eligibility
+    from app.models import QuestionnaireDelta as Delta
+    from app.sessions import create_session
+
+    session = create_session()
+    session.apply(Delta(age=35, zip_code="94110", annual_income=20000))
+    assert session.missing_fields() == ["household_size", "has_children"]
+    assert session.results() == []
+
+    session.apply(Delta(household_size="3", has_children=False))
+    assert session.rescored == 3
+    assert session.results() == score_eligibility(make_questionnaire(has_children=False))
+
+    # only CalWORKs requires children
+    session.apply(Delta(has_children=True))
+    assert session.rescored == 1
+    assert session.results() == score_eligibility(make_questionnaire())
+
+    session.apply(Delta(age=36))
+    assert session.rescored == 0
+
+    session.apply(Delta(annual_income=9000, is_veteran=True))
+    assert session.rescored == 3
+    assert session.results() == score_eligibility(make_questionnaire(age=36, annual_income=9000, is_veteran=True))
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app import main
+    from app.database import get_engine
+    from app.models import EligibilitySubmission
+    from app.submissions import SubmissionWriter
+
+    url = f"sqlite:///{tmp_path / 'submissions.db'}"
+    EligibilitySubmission.__table__.create(get_engine(url))
+    # the app's store on SQLite, read through sync sessions
+    monkeypatch.setattr(main.SUBMISSIONS, "url", url)
+    monkeypatch.setitem(main.SUBMISSIONS.__dict__, "async_session_factory", None)
+    # not started, so submissions are written through to the store
+    monkeypatch.setattr(main, "SUBMISSION_WRITER", SubmissionWriter(main.SUBMISSIONS))
+    yield TestClient(main.app)
+    get_engine(url).dispose()
+
+
+def test_batch_endpoint_accepts_json_and_ndjson_in_input_order(api):
+    import json
+
+    questionnaires = [make_questionnaire(annual_income=income) for income in (40000, 0, 25000, 9000)]
+    expected = [json.loads(EligibilityResponse(
+        eligible_benefits=calculate_eligibility(q), user_data=q
+    ).model_dump_json()) for q in questionnaires]
+    bodies = [q.model_dump(mode="json") for q in questionnaires]
+
+    response = api.post("/api/eligibility/batch", json=bodies)
+    assert response.status_code == 200 and response.json() == expected
+    ndjson = "\n".join(json.dumps(body) for body in bodies) + "\n\n"
+    response = api.post(
+        "/api/eligibility/batch", content=ndjson, headers={"content-type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200 and response.json() == expected
+
+
+def test_batch_endpoint_rejects_oversized_and_invalid_batches(api, monkeypatch):
+    import json
+    from app.config import settings
+
+    body = make_questionnaire().model_dump(mode="json")
+    ndjson = {"content-type": "application/x-ndjson"}
+    monkeypatch.setattr(settings, "BATCH_MAX_ITEMS", 3)
+    # counted before validation: invalid items over the limit still get 413
+    assert api.post("/api/eligibility/batch", json=[{"age": "unknown"}] * 4).status_code == 413
+    too_many = "\n".join(['{"age": "unknown"}'] * 4)
+    assert api.post("/api/eligibility/batch", content=too_many, headers=ndjson).status_code == 413
+
+    bad = [body, {**body, "age": "unknown"}]
+    response = api.post("/api/eligibility/batch", json=bad)
+    assert response.status_code == 422 and response.json()["detail"][0]["loc"][:2] == [1, "age"]
+    lines = "\n".join([json.dumps(body), "", json.dumps(bad[1])])
+    response = api.post("/api/eligibility/batch", content=lines, headers=ndjson)
+    assert response.status_code == 422 and response.json()["detail"]["line"] == 3
+    invalid_json = api.post("/api/eligibility/batch", content=b"[{", headers={"content-type": "application/json"})
+    assert invalid_json.status_code == 422
+
+    monkeypatch.setattr(settings, "BATCH_MAX_ITEMS", 10000)
+    monkeypatch.setattr(settings, "BATCH_MAX_BYTES", 100)
+    assert api.post("/api/eligibility/batch", json=[body] * 2).status_code == 413
+
+
+def test_eligibility_endpoint_errors_keep_status_and_hide_details(api, monkeypatch):
+    from fastapi import HTTPException
+    from app import main
+
+    def fail(error):
+        def score(*args):
+            raise error
+        return score
+
+    body = make_questionnaire().model_dump(mode="json")
+    monkeypatch.setattr(main, "score_eligibility", fail(HTTPException(status_code=503, detail="busy")))
+    response = api.post("/api/eligibility", json=body)
+    assert (response.status_code, response.json()["detail"]) == (503, "busy")
+    monkeypatch.setattr(main, "score_eligibility", fail(RuntimeError("mysql://user:secret@db")))
+    response = api.post("/api/eligibility", json=body)
+    assert response.status_code == 500 and "secret" not in response.text
+
+
+def test_income_sensitivity_matches_rescoring(monkeypatch):
+    from app import sensitivity
+    from app.eligibility import score_eligibility
+    from app.sensitivity import income_sensitivity
+
+    programs = {p.benefit_id: p for p in income_sensitivity(make_questionnaire(is_veteran=True))}
+    calfresh = programs["calfresh"]
+    # 200% of the size-3 FPL; below it the veteran boost saturates at 100 until the cap kink
+    assert calfresh.eligible_income.model_dump() == {"min_income": 0.0, "max_income": 51640.0, "max_inclusive": False}
+    assert calfresh.income_headroom == 31640.0
+    assert [(p.annual_income, p.confidence_score) for p in calfresh.confidence_curve] == [
+        (0.0, 100.0), (4303.33, 100.0), (51640.0, 45.0)
+    ]
+
+    for program in programs.values():
+        top = program.eligible_income.max_income
+        below = score_eligibility(make_questionnaire(is_veteran=True, annual_income=top - 0.01), limit=100)
+        above = score_eligibility(make_questionnaire(is_veteran=True, annual_income=top), limit=100)
+        assert program.benefit_id in [b.benefit.id for b in below]
+        assert program.benefit_id not in [b.benefit.id for b in above]
+
+    # mixed-sign boosts: the curve is linear between its vertices only if
+    # it has one where each running boost sum saturates
+    benefits = get_all_benefits()
+    mixed = compile_catalog(benefits, {"rules": {
+        benefits[0].id: {"score": {"base": 95.0, "slope": 50.0, "cap": 100.0},
+                         "boosts": {"is_veteran": 10.0, "is_disabled": -10.0}},
+        benefits[1].id: {"score": {"base": 95.0, "slope": 50.0, "cap": 100.0},
+                         "boosts": {"is_disabled": -10.0, "is_veteran": 10.0}},
+    }})
+    monkeypatch.setattr(sensitivity, "COMPILED_CATALOG", mixed)
+    q = make_questionnaire(is_veteran=True, is_disabled=True)
+    programs = {p.benefit_id: p for p in income_sensitivity(q)}
+    assert [(p.annual_income, p.confidence_score) for p in programs[benefits[0].id].confidence_curve] == [
+        (0.0, 90.0), (2582.0, 90.0), (33566.0, 30.0)
+    ]
+    for rule in mixed.rules:
+        curve = programs[rule.benefit.id].confidence_curve
+        for a, b in zip(curve, curve[1:]):
+            mid = (a.annual_income + b.annual_income) / 2 / 25820
+            assert rule.score(q, mid) == pytest.approx((a.confidence_score + b.confidence_score) / 2, abs=0.1)
+
+
+@pytest.mark.parametrize("limit,min_confidence", [(10, 30.0), (2, 30.0), (10, 60.0)])
+def test_explanation_agrees_with_results(limit, min_confidence):
+    from app.eligibility import score_eligibility
+    from app.explain import explain_eligibility
+
+    for q in (make_questionnaire(is_veteran=True), make_questionnaire(annual_income=24000, has_children=False)):
+        explanation = explain_eligibility(q, limit, min_confidence)
+        selected = [t.benefit_id for t in explanation.benefits if t.outcome == "selected"]
+        results = score_eligibility(q, limit, min_confidence)
+        assert sorted(selected) == sorted(b.benefit.id for b in results)
+        for trace in explanation.benefits:
+            if trace.final_confidence is not None:
+                assert trace.outcome != "gate_failed"
+                assert (trace.outcome == "below_cutoff") == (trace.final_confidence <= min_confidence)
+
+
+def test_explanation_traces_gates_and_boosts():
+    from app.explain import explain_eligibility
+
+    explanation = explain_eligibility(make_questionnaire(has_children=False, is_disabled=True))
+    traces = {t.benefit_id: t for t in explanation.benefits}
+    calworks = traces["calworks"]
+    assert calworks.outcome == "gate_failed"
+    assert [(p.name, p.passed) for p in calworks.predicates if not p.passed] == [("has_children", False)]
+    assert calworks.final_confidence is None
+
+    calfresh = traces["calfresh"]
+    assert calfresh.clamped_confidence == pytest.approx(100.0 - 20000 / 25820 * 30.0, abs=1e-4)
+    assert [(b.field, b.amount) for b in calfresh.boosts] == [("is_disabled", 5.0)]
+    assert calfresh.final_confidence == pytest.approx(calfresh.clamped_confidence + 5.0, abs=1e-4)
+
+
+def test_scheme_criteria_are_extracted_from_eligibility_text():
+    from app.categories.scheme_criteria import extract_criteria, criteria_to_rule
+
+    criteria = extract_criteria(
+        "The applicant should be a woman belonging to SC/ST category.\n"
+        "Annual family income should not exceed Rs. 2.5 lakh.\n"
+        "Age between 18 and 40 years.\n"
+        "Must be a resident of Tamil Nadu."
+    )
+    assert (criteria.max_income, criteria.min_age, criteria.max_age) == (250000.0, 18.0, 40.0)
+    assert (criteria.regions, criteria.gender, criteria.social_category) == (("IN-TN",), ("female",), ("sc", "st"))
+    assert criteria_to_rule(criteria)["match"] == {"gender": ["female"], "social_category": ["sc", "st"]}
+
+    monthly = extract_criteria("Farmers aged 60 years and above. Monthly income less than ₹10,000.")
+    assert (monthly.max_income, monthly.min_age, monthly.occupation) == (120000.0, 60.0, ("farmer",))
+    # "st" in prose is not the Scheduled Tribes abbreviation; boys and girls is no restriction
+    assert extract_criteria("Boys and girls in the first year of study").kinds == 0
+
+    # groups that are only mentioned restrict nothing
+    for text in (
+        "All residents of Kerala. 5% reservation for PwD candidates.",
+        "Priority will be given to women, SC/ST applicants and farmers. Resident of Kerala.",
+        "Residents of Kerala, including widows, fishermen and persons with disabilities, can apply.",
+    ):
+        mentioned = extract_criteria(text)
+        assert mentioned.regions == ("IN-KL",) and mentioned.kinds == 1, text
+        assert not (mentioned.gender or mentioned.social_category or mentioned.occupation), text
+        assert not mentioned.requires_disability, text
+    rule = criteria_to_rule(extract_criteria("All residents of Kerala. 5% reservation for PwD candidates."))
+    assert "requires" not in rule and "match" not in rule and rule["boosts"] == {"is_disabled": 10.0}
+    only = extract_criteria("This scheme is only for persons with disabilities.")
+    assert only.requires_disability and criteria_to_rule(only)["requires"] == ["is_disabled"]
+
+
+def test_scheme_rules_gate_on_questionnaire_fields(caplog):
+    import numpy as np
+    from app.batch import evaluate_batch, columns_from_questionnaires
+    from app.categories.scheme_criteria import build_scheme_catalog
+    from app.models import Benefit
+    from app.regions import resolve_region
+
+    scheme = {
+        "title": "Kalaignar Magalir Scheme",
+        "link": "https://www.myscheme.gov.in/schemes/kms",
+        "eligibility": [
+            "Women belonging to SC/ST families.",
+            "Annual family income should not exceed Rs. 2.5 lakh.",
+            "Age between 18 and 40 years.",
+            "Resident of Tamil Nadu.",
+        ],
+    }
+    unparsed = {"title": "Scheme Without Criteria", "link": "https://www.myscheme.gov.in/schemes/swc"}
+    catalog = build_scheme_catalog([scheme, unparsed, scheme])
+    assert [b["id"] for b in catalog["benefits"]] == ["myscheme-kalaignar-magalir-scheme"]
+    assert "1 schemes with no extractable criteria and 1 repeated titles" in caplog.text
+    benefits = tuple(Benefit(**entry) for entry in catalog["benefits"])
+    compiled = compile_catalog(benefits, {"rules": catalog["rules"]})
+    eligible = dict(
+        zip_code="600001", annual_income=250000, age=40, gender="female", social_category="st", has_children=False
+    )
+    cases = [
+        (eligible, True),
+        ({**eligible, "annual_income": 250001}, False),
+        ({**eligible, "age": 41}, False),
+        ({**eligible, "gender": "male"}, False),
+        ({**eligible, "social_category": None}, False),
+        ({**eligible, "zip_code": "560001"}, False),
+        # a dollar income under the rupee ceiling, from a US household
+        ({**eligible, "zip_code": "94110", "annual_income": 20000}, False),
+    ]
+    questionnaires = [make_questionnaire(**fields) for fields, _ in cases]
+    result = evaluate_batch(**columns_from_questionnaires(questionnaires), catalog=compiled)
+    for (fields, expected), q, row in zip(cases, questionnaires, result.confidence):
+        assert (len(compiled.candidates(0.0, q, resolve_region(q.zip_code))) == 1) is expected
+        assert bool(row[0] > 0) is expected
+    assert compiled.dependents({"gender"}) and not compiled.dependents({"is_veteran"})
+
+
+def test_rescreen_submissions_in_id_order(tmp_path):
+    import io
+    import json
+    from sqlalchemy import create_engine, insert
+    from app.batch import score_eligibility_batch
+    from app.models import EligibilitySubmission
+    from app.rescreen import rescreen, rescreen_submissions
+
+    url = f"sqlite:///{tmp_path / 'submissions.db'}"
+    engine = create_engine(url)
+    EligibilitySubmission.__table__.create(engine)
+    rows = [
+        make_questionnaire(annual_income=income, is_veteran=income % 3 == 0).model_dump(mode="json")
+        for income in range(0, 60000, 500)
+    ]
+    rows[4] = {"age": "unknown"}
+    with engine.begin() as conn:
+        conn.execute(insert(EligibilitySubmission), [{"submission_data": row} for row in rows])
+    engine.dispose()
+
+    valid = [QuestionnaireRequest(**row) for row in rows if "zip_code" in row]
+    scored = iter(score_eligibility_batch(valid))
+    expected = [
+        [{"id": b.benefit.id, "confidence_score": b.confidence_score} for b in next(scored)]
+        if "zip_code" in row else None
+        for row in rows
+    ]
+    output = io.BytesIO()
+    # small chunks and a single slot in flight exercise ordering and backpressure
+    assert rescreen_submissions(url, output, workers=2, chunk_size=7, max_in_flight=1) == len(rows)
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [line["id"] for line in lines] == list(range(1, len(rows) + 1))
+    assert [line["eligible_benefits"] for line in lines] == expected
+
+    screened = list(rescreen(enumerate(rows), workers=2, chunk_size=5))
+    assert [key for key, _ in screened] == list(range(len(rows)))
+    assert [s and [{"id": b, "confidence_score": c} for b, c in s] for _, s in screened] == expected
+
+
+def test_rescreen_worker_reuses_catalog_and_registry_engine(tmp_path, monkeypatch):
+    from app import database, rescreen
+    from app.eligibility import RULE_SPEC
+    from app.income_tables import get_income_tables
+
+    def fail(*args):
+        raise AssertionError("an unchanged catalog was compiled again")
+
+    url = f"sqlite:///{tmp_path / 'submissions.db'}"
+    monkeypatch.setattr(rescreen, "compile_catalog", fail)
+    rescreen._init_worker(get_all_benefits(), RULE_SPEC, get_income_tables(), 5, url)
+    assert rescreen._catalog is COMPILED_CATALOG and rescreen._engine is database.get_engine(url)
+
+    # a forked child starts with no connection of the parent's checked in
+    with rescreen._engine.connect():
+        pass
+    assert rescreen._engine.pool.checkedin() == 1
+    database._reset_after_fork()
+    assert rescreen._engine.pool.checkedin() == 0
+    rescreen._engine.dispose()
+
+
+def test_cli_streams_rows_and_counts_rejects():
+    import io
+    import json
+    from app.cli import ResultWriter, read_rows, screen_stream
+
+    source = io.StringIO(
+        "age,zip_code,annual_income,household_size,has_children,is_veteran,gender\n"
+        "35,94110,20000,3,true,yes,\n"
+        "unknown,94110,20000,3,true,no,\n"
+        "35,94110,24000,3,false,no,female\n"
+    )
+    sink, rejects = io.StringIO(), io.StringIO()
+    stats = screen_stream(read_rows(source, "csv"), ResultWriter(sink, "ndjson"), rejects, batch_size=2)
+    assert (stats.rows, stats.scored, stats.rejected) == (3, 2, 1)
+
+    lines = [json.loads(line) for line in sink.getvalue().splitlines()]
+    assert [line["row"] for line in lines] == [2, 4]
+    expected = calculate_eligibility(make_questionnaire(is_veteran=True))
+    assert lines[0]["eligible_benefits"] == [{"id": b.id, "confidence_score": b.confidence_score} for b in expected]
+    assert json.loads(rejects.getvalue())["row"] == 3
+
+    ndjson = io.StringIO(make_questionnaire().model_dump_json() + "\n\n{not json\n")
+    sink = io.StringIO()
+    stats = screen_stream(read_rows(ndjson, "ndjson"), ResultWriter(sink, "csv"))
+    assert (stats.rows, stats.rejected) == (2, 1)
+    header, row = sink.getvalue().splitlines()
+    assert header == "row,benefit_ids,confidence_scores"
+    assert row == "1,calfresh;liheap;calworks,76.8;64.0;51.3"
+
+
+def test_shadow_runner_compares_engines_off_the_request_path(tmp_path):
+    import json
+    from app.eligibility import score_eligibility
+    from app.shadow import SHADOW_ENGINES, ShadowRunner, diff_results, register_engine
+
+    questionnaires = [
+        make_questionnaire(annual_income=income, has_children=income % 2 == 0, is_disabled=income > 30000)
+        for income in range(0, 60000, 3000)
+    ]
+    for engine in ("linear", "early_exit", "batch"):
+        runner = ShadowRunner(engine, sample_rate=1.0)
+        for q in questionnaires:
+            assert runner.submit(q, 10, 30.0, score_eligibility(q), engine == "early_exit")
+        runner.drain()
+        stats = runner.stats()
+        runner.close()
+        assert (stats["compared"], stats["mismatches"], stats["errors"]) == (len(questionnaires), 0, 0)
+        # served from the cache, but both engines are timed uncached
+        assert stats["primary_mean_ms"] > 0 and stats["shadow_mean_ms"] > 0
+
+    # calfresh scores 60.02, above a 60.0 cutoff but 60.0 once rounded
+    q = make_questionnaire(annual_income=(100.0 - 60.02) / 30.0 * 25820)
+    primary = score_eligibility(q, 10, 60.0)
+    assert ("calfresh", 60.0) in [(s.benefit.id, s.confidence_score) for s in primary]
+    assert diff_results(primary, SHADOW_ENGINES["batch"](q, 10, 60.0)) is None
+
+    register_engine("drops_calfresh", lambda q, limit, min_confidence: [
+        s for s in score_eligibility(q, limit, min_confidence) if s.benefit.id != "calfresh"
+    ])
+    log_path = tmp_path / "shadow.ndjson"
+    runner = ShadowRunner("drops_calfresh", sample_rate=1.0, log_path=str(log_path))
+    q = make_questionnaire()
+    runner.submit(q, 10, 30.0, score_eligibility(q))
+    runner.close()
+    assert runner.stats()["mismatches"] == 1
+    record = json.loads(log_path.read_text())
+    assert record["diff"]["missing"] == ["calfresh"] and record["questionnaire"]["zip_code"] == q.zip_code
+
+    assert not ShadowRunner("linear", sample_rate=0.0).submit(q, 10, 30.0, [])
+
+
+def test_encoded_responses_match_pydantic_serialization(monkeypatch):
+    import app.responses as responses
+    from app.eligibility import ScoredBenefit, score_eligibility
+    from app.explain import explain_eligibility
+    from app.models import EligibilityResponse
+
+    q = make_questionnaire(is_veteran=True, gender="female")
+    scored = score_eligibility(q)
+    explanation = explain_eligibility(q, 10, 30.0)
+    expected = EligibilityResponse(
+        eligible_benefits=[s.materialize() for s in scored], user_data=q, explanation=explanation
+    )
+    assert responses.encode_eligibility_response(scored, q, explanation) == expected.model_dump_json().encode()
+
+    # an edited entry under the same id is re-encoded; non-ASCII text stays as is, like pydantic writes it
+    edited = scored[0].benefit.model_copy(update={"description": "Ayuda alimentaria — año 2024"})
+    rescored = [ScoredBenefit(edited, 100.0)]
+    expected = EligibilityResponse(eligible_benefits=[rescored[0].materialize()], user_data=q)
+    assert responses.encode_eligibility_response(rescored, q) == expected.model_dump_json().encode()
+
+    # the standard library fallback encodes the same bytes
+    monkeypatch.setattr(responses, "orjson", None)
+    monkeypatch.setattr(responses, "_FRAGMENTS", {})
+    assert responses.encode_eligibility_response(rescored, q) == expected.model_dump_json().encode()
+
+
+def test_submission_store_falls_back_to_sync_sessions_for_sqlite(tmp_path):
+    import asyncio
+    from app.database import async_database_url, create_async_session_factory, get_engine
+    from app.models import EligibilitySubmission
+    from app.submissions import SubmissionFilters, SubmissionStore
+
+    assert async_database_url("mysql+pymysql://u:p@db/benefits") == "mysql+aiomysql://u:p@db/benefits"
+    url = f"sqlite:///{tmp_path / 'submissions.db'}"
+    assert async_database_url(url) is None and create_async_session_factory(url) is None
+
+    EligibilitySubmission.__table__.create(get_engine(url))
+    store = SubmissionStore(url)
+    rows = [make_questionnaire(annual_income=income).model_dump(mode="json") for income in (0, 10000, 20000)]
+
+    async def roundtrip():
+        await store.add(rows[0])
+        await store.add_many(rows[1:])
+        await store.add_many([])
+        session = store.session()
+        db = await session.__anext__()
+        try:
+            return await store.page(db, SubmissionFilters(), limit=10)
+        finally:
+            await session.aclose()
+
+    assert not store.is_async
+    page = asyncio.run(roundtrip())
+    assert [s["data"] for s in page.submissions] == rows[::-1] and page.next_cursor is None
+    get_engine(url).dispose()
+
+
+def test_submission_writer_batches_and_drains(tmp_path):
+    import asyncio
+    from app.database import get_engine, get_sessionmaker
+    from app.models import EligibilitySubmission
+    from app.submissions import SubmissionStore, SubmissionWriter
+
+    url = f"sqlite:///{tmp_path / 'submissions.db'}"
+    engine = get_engine(url)
+    EligibilitySubmission.__table__.create(engine)
+    store = SubmissionStore(url)
+    rows = [make_questionnaire(annual_income=income).model_dump(mode="json") for income in range(0, 25000, 1000)]
+
+    async def run():
+        # a queue smaller than the input makes enqueue wait for the writer
+        writer = SubmissionWriter(store, max_queue=4, batch_size=10, flush_interval=60.0)
+        await writer.enqueue(rows[0])  # not started: written through
+        writer.start()
+        for row in rows[1:]:
+            await writer.enqueue(row)
+        await writer.close()
+        with get_sessionmaker(url)() as db:
+            return writer.stats(), db.query(EligibilitySubmission).order_by(EligibilitySubmission.id).all()
+
+    stats, stored = asyncio.run(run())
+    assert [s.submission_data for s in stored] == rows
+    assert (stats["written"], stats["failed"], stats["pending"], stats["running"]) == (len(rows) - 1, 0, 0, False)
+    assert stats["batches"] < len(rows) - 1
+    engine.dispose()
+
+
+def test_submissions_page_by_keyset_and_stream_in_chunks(tmp_path):
+    import asyncio
+    import csv
+    import io
+    import json
+    from datetime import datetime, timedelta, timezone
+    from app.database import get_engine
+    from app.models import EligibilitySubmission
+    from app.submissions import SUBMISSION_CSV_COLUMNS, SubmissionFilters, SubmissionStore, SubmissionWriter
+
+    url = f"sqlite:///{tmp_path / 'submissions.db'}"
+    engine = get_engine(url)
+    EligibilitySubmission.__table__.create(engine)
+    store = SubmissionStore(url)
+    rows = [
+        make_questionnaire(zip_code=f"9{i % 3}1{i:02d}", household_size=str(i % 4 + 1)).model_dump(mode="json")
+        for i in range(20)
+    ]
+    # SQLite's clock is UTC
+    yesterday = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=1)
+    filters = SubmissionFilters(since=yesterday, zip_prefix="91")
+    expected = [i + 1 for i in reversed(range(20)) if rows[i]["zip_code"].startswith("91")]
+
+    async def run():
+        writer = SubmissionWriter(store, batch_size=7)
+        writer.start()
+        for row in rows:
+            await writer.enqueue(row)
+        await writer.close()
+        session = store.session()
+        db = await session.__anext__()
+        try:
+            ids, cursor, pages = [], None, 0
+            while True:
+                page = await store.page(db, filters, limit=2, cursor=cursor)
+                ids += [s["id"] for s in page.submissions]
+                pages += 1
+                if page.next_cursor is None:
+                    break
+                cursor = page.next_cursor
+            sized = await store.page(db, SubmissionFilters(household_size="2"), limit=100)
+            before = await store.page(db, SubmissionFilters(until=yesterday), limit=100)
+        finally:
+            await session.aclose()
+        chunks = [chunk async for chunk in store.stream(filters, chunk_size=2)]
+        ndjson = b"".join([chunk async for chunk in store.export(filters, "ndjson", chunk_size=2)])
+        exported = b"".join([chunk async for chunk in store.export(filters, "csv", chunk_size=2)])
+        return ids, pages, sized, before, chunks, ndjson, exported
+
+    ids, pages, sized, before, chunks, ndjson, exported = asyncio.run(run())
+    assert ids == expected and pages == (len(expected) + 1) // 2
+    assert [s["id"] for s in sized.submissions] == [i + 1 for i in reversed(range(20)) if i % 4 == 1]
+    assert before.submissions == []
+    assert max(len(chunk) for chunk in chunks) == 2
+    assert [row["id"] for chunk in chunks for row in chunk] == expected
+    lines = [json.loads(line) for line in ndjson.splitlines()]
+    assert [line["id"] for line in lines] == expected
+    assert lines[0]["data"] == rows[expected[0] - 1]
+    assert datetime.fromisoformat(lines[0]["created_at"]) > yesterday
+    table = list(csv.DictReader(io.StringIO(exported.decode())))
+    assert list(table[0]) == SUBMISSION_CSV_COLUMNS
+    assert [(int(r["id"]), r["zip_code"]) for r in table] == [(i, rows[i - 1]["zip_code"]) for i in expected]
+    engine.dispose()
+
+
+def test_submissions_endpoints_filter_what_eligibility_requests_stored(api):
+    from datetime import datetime, timedelta, timezone
+
+    for zip_code in ("94110", "10001", "94103"):
+        response = api.post("/api/eligibility", json=make_questionnaire(zip_code=zip_code).model_dump(mode="json"))
+        assert response.status_code == 200
+    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).replace(tzinfo=None).isoformat()
+
+    page = api.get("/api/submissions", params={"since": yesterday, "limit": 2}).json()
+    assert [s["data"]["zip_code"] for s in page["submissions"]] == ["94103", "10001"]
+    rest = api.get("/api/submissions", params={"since": yesterday, "cursor": page["next_cursor"]}).json()
+    assert [s["data"]["zip_code"] for s in rest["submissions"]] == ["94110"] and rest["next_cursor"] is None
+    assert api.get("/api/submissions", params={"until": yesterday}).json()["submissions"] == []
+    export = api.get("/api/submissions/export", params={"format": "csv", "since": yesterday, "zip_prefix": "941"})
+    assert export.headers["content-type"].startswith("text/csv")
+    assert [line.split(",")[3] for line in export.text.splitlines()[1:]] == ["94103", "94110"]
+
+
+def test_pool_stats_count_checkouts_and_waits(tmp_path):
+    from sqlalchemy import create_engine, exc
+    from sqlalchemy.pool import QueuePool
+    from app.database import PoolStats, _instrument, _timed_pool_class
+
+    stats = PoolStats()
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=_timed_pool_class(QueuePool, stats), pool_size=1, max_overflow=0, pool_timeout=0.05,
+    )
+    _instrument(engine, stats)
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    with engine.connect():
+        pass
+    snapshot = stats.snapshot(engine.pool)
+    assert (snapshot["checkouts"], snapshot["checkins"], snapshot["connects"]) == (2, 2, 1)
+    assert (snapshot["waits"], snapshot["timeouts"], snapshot["checked_out"]) == (1, 1, 0)
+    assert snapshot["max_wait_seconds"] >= 0.05
+    engine.dispose()
+
+
+def test_schema_compiles_for_mysql():
+    from sqlalchemy.dialects import mysql
+    from sqlalchemy.schema import CreateTable
+    from app.database import Base
+    import app.orm  # noqa: F401  registers the tables on Base
+
+    assert {"users", "eligibility_submissions", "benefits"} <= set(Base.metadata.tables)
+    for table in Base.metadata.sorted_tables:
+        CreateTable(table).compile(dialect=mysql.dialect())
+
+
+def test_app_import_defers_database_and_numpy():
+    from benchmarks.bench_import import DEFERRED_MODULES, import_profile
+
+    profile = import_profile()
+    assert "app.main" in profile
+    assert not set(DEFERRED_MODULES) & set(profile)